@@ -5,7 +5,7 @@ from collections import namedtuple
 from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from functools import reduce
-from typing import Any, List, Mapping, NamedTuple, Sequence, Set, Tuple, Union
+from typing import Any, Hashable, List, Mapping, NamedTuple, Sequence, Set, Tuple, Union
 
 from django.utils.functional import cached_property
 from parsimonious.exceptions import IncompleteParseError
@@ -37,6 +37,7 @@ from sentry.search.utils import (
     parse_size,
 )
 from sentry.snuba.dataset import Dataset
+from sentry.utils.lru import LRUCache
 from sentry.utils.snuba import is_duration_measurement, is_measurement, is_span_op_breakdown
 from sentry.utils.validators import is_event_id, is_span_id
 
@@ -514,6 +515,9 @@ class SearchVisitor(NodeVisitor):
             config = SearchConfig()
         self.config = config
         self.params = params if params is not None else {}
+        # Set once a filter was resolved relative to the current time, which
+        # makes the result unfit for caching.
+        self.is_time_relative = False
         if builder is None:
             # Avoid circular import
             from sentry.search.events.builder import UnresolvedQuery
@@ -676,6 +680,7 @@ class SearchVisitor(NodeVisitor):
                 from_val, to_val = parse_datetime_range(value.text)
             except InvalidQuery as exc:
                 raise InvalidSearchQuery(str(exc))
+            self.is_time_relative = True
 
             # TODO: Handle negations
             if from_val is not None:
@@ -885,6 +890,7 @@ class SearchVisitor(NodeVisitor):
                 from_val, to_val = parse_datetime_range(search_value.text)
             except InvalidQuery as exc:
                 raise InvalidSearchQuery(str(exc))
+            self.is_time_relative = True
 
             if from_val is not None:
                 operator = ">="
@@ -1167,11 +1173,66 @@ default_config = SearchConfig(
 )
 
 
-def parse_search_query(
-    query, config=None, params=None, builder=None, config_overrides=None
-) -> list[SearchFilter]:
-    if config is None:
-        config = default_config
+#: Parse trees by query. Visiting a tree doesn't modify it, so trees are
+#: shared by all callers, whatever config and builder they use. Trees are
+#: many times larger than their query, so the cache is bounded by the total
+#: length of the cached queries.
+_tree_cache: LRUCache[str, Node] = LRUCache(
+    max_bytes=32 * 1024, sizeof=lambda tree: len(tree.full_text)
+)
+
+#: Results of queries parsed without a custom builder, keyed by
+#: `_get_result_cache_key`. Results are stored as tuples of immutable filters.
+_result_cache: LRUCache[Hashable, tuple[Any, ...]] = LRUCache(max_size=1000)
+
+#: Params which are not looked at while parsing, but differ between otherwise
+#: identical requests.
+_UNCACHED_PARAMS = frozenset(["start", "end"])
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(item) for item in value)
+    return value
+
+
+def _get_result_cache_key(query: str, config: SearchConfig, params: Any) -> Hashable | None:
+    """
+    Returns the key of the cached result of ``query`` or `None` if the
+    config or params cannot be used as part of a key.
+    """
+    if params is not None and not isinstance(params, Mapping):
+        return None
+    if params:
+        params = {key: value for key, value in params.items() if key not in _UNCACHED_PARAMS}
+    key = (
+        query,
+        type(config),
+        _freeze(vars(config)),
+        config.allow_boolean,
+        config.free_text_key,
+        _freeze(params),
+    )
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def clear_parse_cache() -> None:
+    _tree_cache.clear()
+    _result_cache.clear()
+
+
+def _parse_tree(query: str) -> Node:
+    tree = _tree_cache.get(query)
+    if tree is not None:
+        return tree
 
     try:
         tree = event_search_grammar.parse(query)
@@ -1186,6 +1247,34 @@ def parse_search_query(
             )
         )
 
+    _tree_cache.set(query, tree)
+    return tree
+
+
+def parse_search_query(
+    query, config=None, params=None, builder=None, config_overrides=None
+) -> list[SearchFilter]:
+    """
+    Parses ``query`` into a list of filters.
+
+    Parse trees are cached by query, and results by query, config and params
+    unless a ``builder`` is passed (which may resolve fields differently) or
+    the query contains dates relative to the current time. Every caller gets
+    its own list, but the filters in it are shared and must not be modified.
+    """
+    if config is None:
+        config = default_config
     if config_overrides:
         config = SearchConfig.create_from(config, **config_overrides)
-    return SearchVisitor(config, params=params, builder=builder).visit(tree)
+
+    cache_key = _get_result_cache_key(query, config, params) if builder is None else None
+    if cache_key is not None:
+        cached = _result_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
+    visitor = SearchVisitor(config, params=params, builder=builder)
+    result = visitor.visit(_parse_tree(query))
+    if cache_key is not None and not visitor.is_time_relative:
+        _result_cache.set(cache_key, tuple(result))
+    return result
@@ -1,9 +1,16 @@
+import logging
+
+from django.db import connections, router, transaction
 from django.db.models import F
+from django.db.models.signals import post_save
 
 from sentry.signals import buffer_incr_complete
 from sentry.tasks.process_buffer import process_incr
+from sentry.utils import metrics
 from sentry.utils.services import Service
 
+logger = logging.getLogger(__name__)
+
 
 class Buffer(Service):
     """
@@ -19,7 +26,7 @@ class Buffer(Service):
     keep up with the updates.
     """
 
-    __all__ = ("get", "incr", "process", "process_pending", "validate")
+    __all__ = ("get", "incr", "process", "process_batch", "process_pending", "validate")
 
     def get(self, model, columns, filters):
         """
@@ -93,3 +100,133 @@ class Buffer(Service):
             created=created,
             sender=model,
         )
+
+    def process_batch(self, model, updates):
+        """
+        Applies many buffered increments for ``model`` using one set-based
+        ``UPDATE ... FROM (VALUES ...)`` statement per distinct set of columns.
+
+        ``updates`` is a list of ``(columns, filters, extra)`` tuples. Only updates
+        that filter on the primary key alone can be coalesced; everything else,
+        duplicate primary keys within the batch, (for models other than
+        ``Group``) rows that do not exist yet and every row of a statement that
+        failed are returned to the caller so they can go through ``process`` one
+        at a time.
+        """
+        from sentry.models.group import Group
+
+        leftover = []
+        grouped = {}
+        for columns, filters, extra in updates:
+            extra = extra or {}
+            if (
+                not (columns or extra)
+                or len(filters) != 1
+                or next(iter(filters)) not in ("pk", model._meta.pk.name)
+            ):
+                leftover.append((columns, filters, extra))
+                continue
+
+            pk = next(iter(filters.values()))
+            batch = grouped.setdefault((tuple(sorted(columns)), tuple(sorted(extra))), {})
+            if pk in batch:
+                leftover.append((columns, filters, extra))
+                continue
+            batch[pk] = (columns, filters, extra)
+
+        for (column_names, extra_names), batch in grouped.items():
+            try:
+                updated = self._bulk_update(model, column_names, extra_names, batch)
+            except Exception:
+                # Don't let one bad row take the whole batch down with it.
+                metrics.incr(
+                    "buffer.process_batch.failed",
+                    tags={"module": model.__module__, "model": model.__name__},
+                    skip_internal=True,
+                )
+                logger.exception(
+                    "buffer.process_batch.failed",
+                    extra={"model": model.__name__, "rows": len(batch)},
+                )
+                leftover.extend(batch.values())
+                continue
+
+            if model is Group:
+                # Mirror `Model.update`, which keeps the group cache fresh
+                # through `post_save`. Groups which were deleted by the time
+                # we flush buffers are dropped, same as in `process`.
+                for group in Group.objects.filter(id__in=updated):
+                    post_save.send(sender=Group, instance=group, created=False)
+
+            for pk, (columns, filters, extra) in batch.items():
+                if pk not in updated and model is not Group:
+                    leftover.append((columns, filters, extra))
+                    continue
+                buffer_incr_complete.send_robust(
+                    model=model,
+                    columns=columns,
+                    filters=filters,
+                    extra=extra,
+                    created=False,
+                    sender=model,
+                )
+
+        return leftover
+
+    def _bulk_update(self, model, column_names, extra_names, batch):
+        """
+        Runs a single ``UPDATE`` for ``batch`` (a mapping of primary key to
+        ``(columns, filters, extra)``) and returns the primary keys it touched.
+        """
+        from sentry.models.group import Group
+
+        using = router.db_for_write(model)
+        connection = connections[using]
+        qn = connection.ops.quote_name
+
+        opts = model._meta
+        table = qn(opts.db_table)
+        fields = [opts.pk] + [opts.get_field(name) for name in column_names + extra_names]
+        # The primary key is an auto field, whose `db_type` is the serial
+        # pseudo-type, so use the type a reference to it would have instead.
+        casts = [opts.pk.rel_db_type(connection)] + [
+            field.db_type(connection) for field in fields[1:]
+        ]
+        aliases = [qn(field.column) for field in fields]
+
+        assignments = []
+        for name in column_names:
+            column = qn(opts.get_field(name).column)
+            assignments.append(f"{column} = {table}.{column} + v.{column}")
+        for name in extra_names:
+            column = qn(opts.get_field(name).column)
+            assignments.append(f"{column} = v.{column}")
+        # HACK: same as `ScoreClause`, but computed per row from the values
+        # we are flushing.
+        if model is Group and "times_seen" in column_names and "last_seen" in extra_names:
+            assignments.append(
+                f'"score" = log({table}."times_seen" + v."times_seen") * 600 '
+                f'+ floor(extract(epoch from v."last_seen"))'
+            )
+
+        row = "({})".format(", ".join(f"%s::{cast}" for cast in casts))
+        params = []
+        for pk, (columns, _, extra) in batch.items():
+            params.append(pk)
+            params.extend(columns[name] for name in column_names)
+            params.extend(
+                opts.get_field(name).get_db_prep_save(extra[name], connection)
+                for name in extra_names
+            )
+
+        sql = (
+            f"UPDATE {table} SET {', '.join(assignments)} "
+            f"FROM (VALUES {', '.join([row] * len(batch))}) AS v({', '.join(aliases)}) "
+            f"WHERE {table}.{qn(opts.pk.column)} = v.{aliases[0]} "
+            f"RETURNING {table}.{qn(opts.pk.column)}"
+        )
+        # Run in its own transaction (or savepoint), so that a failed statement
+        # does not abort the transaction the per-row fallback runs in.
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return {pk for (pk,) in cursor.fetchall()}
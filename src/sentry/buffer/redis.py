@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import atexit
 import logging
+import multiprocessing.util
+import os
 import pickle
 import threading
 from datetime import date, datetime, timezone
 from time import time
 
+from celery.signals import task_postrun, worker_process_shutdown
 from django.db import models
 from django.utils.encoding import force_bytes, force_str
 
@@ -73,14 +77,52 @@ class RedisBuffer(Buffer):
     key_expire = 60 * 60  # 1 hour
     pending_key = "b:p"
 
-    def __init__(self, pending_partitions=1, incr_batch_size=2, **options):
+    def __init__(
+        self,
+        pending_partitions=1,
+        incr_batch_size=2,
+        bulk_process=False,
+        pending_drain_chunk_size=None,
+        pending_drain_time_budget=50,
+        local_aggregation_window=None,
+        local_aggregation_max_events=1000,
+        **options,
+    ):
         self.is_redis_cluster, self.cluster, options = get_dynamic_cluster_from_options(
             "SENTRY_BUFFER_OPTIONS", options
         )
         self.pending_partitions = pending_partitions
         self.incr_batch_size = incr_batch_size
+        # When set, `process_pending` pops the pending set in chunks of this
+        # size instead of loading it whole, and stops once the time budget (in
+        # seconds) is spent so the stampede lock is released before it expires.
+        self.pending_drain_chunk_size = pending_drain_chunk_size
+        self.pending_drain_time_budget = pending_drain_time_budget
+        # When set, `incr` sums increments for identical (model, filters) in
+        # process and writes them to Redis in one pipeline once the window (in
+        # seconds) has passed or the number of buffered calls reaches the limit.
+        self.local_aggregation_window = local_aggregation_window
+        self.local_aggregation_max_events = local_aggregation_max_events
+        self._local_buffer = {}
+        self._local_buffer_events = 0
+        self._local_buffer_lock = threading.Lock()
+        self._local_buffer_timer = None
+        self._exit_flush_pid = None
+        if self.local_aggregation_window is not None:
+            atexit.register(self.flush_local_buffer)
+            # Children must not inherit (and later flush a second time) the
+            # increments buffered by their parent.
+            os.register_at_fork(after_in_child=self._reset_local_buffer)
+            # Celery workers write out increments after every task, and before
+            # a pool process is recycled or shut down.
+            task_postrun.connect(self._flush_local_buffer_on_signal, weak=False)
+            worker_process_shutdown.connect(self._flush_local_buffer_on_signal, weak=False)
+        # When enabled, `process` drains a whole batch of keys in pipelines and
+        # coalesces the increments into one UPDATE per model and column set.
+        self.bulk_process = bulk_process
         assert self.pending_partitions > 0
         assert self.incr_batch_size > 0
+        assert self.pending_drain_chunk_size is None or self.pending_drain_chunk_size > 0
 
     def get_routing_client(self):
         if self.is_redis_cluster:
@@ -192,10 +234,19 @@ class RedisBuffer(Buffer):
             pipe.hget(key, f"i+{col}")
         results = pipe.execute()
 
-        return {
+        values = {
             col: (int(results[i]) if results[i] is not None else 0) for i, col in enumerate(columns)
         }
 
+        if self.local_aggregation_window is not None:
+            with self._local_buffer_lock:
+                entry = self._local_buffer.get(key)
+                if entry is not None:
+                    for col in columns:
+                        values[col] += entry["columns"].get(col, 0)
+
+        return values
+
     def incr(self, model, columns, filters, extra=None, signal_only=None, return_incr_results=True):
         """
         Increment the key by doing the following:
@@ -205,25 +256,39 @@ class RedisBuffer(Buffer):
             - Perform a set (last write wins) on extra
             - Perform a set on signal_only (only if True)
         - Add hashmap key to pending flushes
+
+        If local aggregation is enabled, the increment is summed in process
+        first and written out later by `flush_local_buffer`.
         """
 
-        key = self._make_key(model, filters)
-        pending_key = self._make_pending_key_from_key(key)
-        # We can't use conn.map() due to wanting to support multiple pending
-        # keys (one per Redis partition)
-        if self.is_redis_cluster:
-            conn = self.cluster
+        if self.local_aggregation_window is not None:
+            self._incr_local(model, columns, filters, extra, signal_only)
         else:
-            conn = self.cluster.get_local_client_for_key(key)
+            key = self._make_key(model, filters)
+            # We can't use conn.map() due to wanting to support multiple pending
+            # keys (one per Redis partition)
+            if self.is_redis_cluster:
+                conn = self.cluster
+            else:
+                conn = self.cluster.get_local_client_for_key(key)
+
+            pipe = conn.pipeline()
+            self._add_incr_to_pipeline(pipe, key, model, columns, filters, extra, signal_only)
+            pipe.execute()
+
+        metrics.incr(
+            "buffer.incr",
+            skip_internal=True,
+            tags={"module": model.__module__, "model": model.__name__},
+        )
+
+    def _add_incr_to_pipeline(self, pipe, key, model, columns, filters, extra, signal_only):
+        pending_key = self._make_pending_key_from_key(key)
 
-        pipe = conn.pipeline()
         pipe.hsetnx(key, "m", f"{model.__module__}.{model.__name__}")
         _validate_json_roundtrip(filters, model)
 
-        if self.is_redis_cluster:
-            pipe.hsetnx(key, "f", json.dumps(self._dump_values(filters)))
-        else:
-            pipe.hsetnx(key, "f", pickle.dumps(filters))
+        pipe.hsetnx(key, "f", self._encode_filters(filters))
 
         for column, amount in columns.items():
             pipe.hincrby(key, "i+" + column, amount)
@@ -234,23 +299,190 @@ class RedisBuffer(Buffer):
             # e.g. "update score if last_seen or times_seen is changed"
             _validate_json_roundtrip(extra, model)
             for column, value in extra.items():
-                if self.is_redis_cluster:
-                    pipe.hset(key, "e+" + column, json.dumps(self._dump_value(value)))
-                else:
-                    pipe.hset(key, "e+" + column, pickle.dumps(value))
+                pipe.hset(key, "e+" + column, self._encode_extra_value(value))
 
         if signal_only is True:
             pipe.hset(key, "s", "1")
 
         pipe.expire(key, self.key_expire)
         pipe.zadd(pending_key, {key: time()})
-        pipe.execute()
 
-        metrics.incr(
-            "buffer.incr",
-            skip_internal=True,
-            tags={"module": model.__module__, "model": model.__name__},
-        )
+    def _encode_filters(self, filters):
+        if self.is_redis_cluster:
+            return json.dumps(self._dump_values(filters))
+        return pickle.dumps(filters)
+
+    def _encode_extra_value(self, value):
+        if self.is_redis_cluster:
+            return json.dumps(self._dump_value(value))
+        return pickle.dumps(value)
+
+    def _incr_local(self, model, columns, filters, extra, signal_only):
+        key = self._make_key(model, filters)
+
+        # Validate everything that is only encoded when the buffer is flushed,
+        # which may happen in another thread, where errors would go unnoticed.
+        for column, amount in columns.items():
+            if not isinstance(amount, int):
+                raise TypeError(f"invalid amount for {column}: {amount!r}")
+        self._encode_filters(filters)
+        for value in (extra or {}).values():
+            self._encode_extra_value(value)
+
+        with self._local_buffer_lock:
+            self._register_exit_flush()
+            entry = self._local_buffer.get(key)
+            if entry is None:
+                entry = self._local_buffer[key] = {
+                    "model": model,
+                    "columns": {},
+                    "filters": filters,
+                    "extra": {},
+                    "signal_only": None,
+                    "events": 0,
+                }
+            for column, amount in columns.items():
+                entry["columns"][column] = entry["columns"].get(column, 0) + amount
+            if extra:
+                entry["extra"].update(extra)
+            if signal_only is True:
+                entry["signal_only"] = True
+            entry["events"] += 1
+
+            self._local_buffer_events += 1
+            should_flush = self._local_buffer_events >= self.local_aggregation_max_events
+            if not should_flush:
+                self._schedule_local_flush()
+
+        if should_flush:
+            self.flush_local_buffer()
+
+    def _schedule_local_flush(self):
+        # Make sure increments are written out within the window even if no
+        # further calls arrive. Must be called with the local buffer lock held.
+        if self._local_buffer_timer is None:
+            self._local_buffer_timer = threading.Timer(
+                self.local_aggregation_window, self.flush_local_buffer
+            )
+            self._local_buffer_timer.daemon = True
+            self._local_buffer_timer.start()
+
+    def _register_exit_flush(self):
+        # atexit handlers don't run in multiprocessing children (such as the
+        # ones of arroyo consumers), which leave through os._exit. Their
+        # finalizers do, so register one in each process that buffers
+        # increments. Must be called with the local buffer lock held.
+        pid = os.getpid()
+        if self._exit_flush_pid != pid:
+            self._exit_flush_pid = pid
+            multiprocessing.util.Finalize(self, self.flush_local_buffer, exitpriority=10)
+
+    def _flush_local_buffer_on_signal(self, **kwargs):
+        self.flush_local_buffer()
+
+    def _restore_local_entries(self, entries):
+        # Merges entries that could not be written back into the local buffer,
+        # so they are retried with the next flush. Entries aggregated since
+        # were recorded later, so their extra values win.
+        with self._local_buffer_lock:
+            for key, entry in entries.items():
+                current = self._local_buffer.get(key)
+                if current is None:
+                    self._local_buffer[key] = entry
+                    continue
+                for column, amount in entry["columns"].items():
+                    current["columns"][column] = current["columns"].get(column, 0) + amount
+                current["extra"] = {**entry["extra"], **current["extra"]}
+                if entry["signal_only"] is True:
+                    current["signal_only"] = True
+                current["events"] += entry["events"]
+            self._local_buffer_events += sum(entry["events"] for entry in entries.values())
+            self._schedule_local_flush()
+
+    def _reset_local_buffer(self):
+        self._local_buffer = {}
+        self._local_buffer_events = 0
+        self._local_buffer_lock = threading.Lock()
+        self._local_buffer_timer = None
+
+    def flush_local_buffer(self):
+        """
+        Writes all increments aggregated in this process to Redis, using a
+        single pipeline per Redis host.
+        """
+        with self._local_buffer_lock:
+            entries = self._local_buffer
+            events = self._local_buffer_events
+            self._local_buffer = {}
+            self._local_buffer_events = 0
+            if self._local_buffer_timer is not None:
+                self._local_buffer_timer.cancel()
+                self._local_buffer_timer = None
+
+        if not entries:
+            return
+
+        # Pipelines and the entries written by them, per Redis host
+        pipes = {}
+        if self.is_redis_cluster:
+
+            def get_host(key):
+                if None not in pipes:
+                    pipes[None] = (self.cluster.pipeline(), {})
+                return None
+
+        else:
+            router = self.cluster.get_router()
+
+            def get_host(key):
+                host_id = router.get_host_for_key(key)
+                if host_id not in pipes:
+                    pipes[host_id] = (self.cluster.get_local_client(host_id).pipeline(), {})
+                return host_id
+
+        for key, entry in entries.items():
+            pipe, pipe_entries = pipes[get_host(key)]
+            try:
+                self._add_incr_to_pipeline(
+                    pipe,
+                    key,
+                    entry["model"],
+                    entry["columns"],
+                    entry["filters"],
+                    entry["extra"],
+                    entry["signal_only"],
+                )
+            except Exception:
+                # `incr` validates its arguments, so this is not expected. Drop
+                # the entry rather than retrying it forever.
+                logger.exception("buffer.local-flush.invalid_entry", extra={"key": key})
+                continue
+            pipe_entries[key] = entry
+
+        unflushed = {}
+        error = None
+        for pipe, pipe_entries in pipes.values():
+            if error is None:
+                try:
+                    pipe.execute()
+                    continue
+                except Exception as e:
+                    error = e
+            unflushed.update(pipe_entries)
+
+        if error is not None:
+            logger.error(
+                "buffer.local-flush.failed",
+                exc_info=error,
+                extra={"keys": len(unflushed), "total_keys": len(entries)},
+            )
+            # Pending increments are not lost, the next flush retries them.
+            self._restore_local_entries(unflushed)
+            raise error
+
+        metrics.incr("buffer.local-flush", skip_internal=True)
+        metrics.timing("buffer.local-flush.keys", len(entries))
+        metrics.timing("buffer.local-flush.events", events)
 
     def process_pending(self, partition=None):
         if partition is None and self.pending_partitions > 1:
@@ -276,7 +508,9 @@ class RedisBuffer(Buffer):
 
         try:
             keycount = 0
-            if self.is_redis_cluster:
+            if self.pending_drain_chunk_size is not None:
+                keycount = self._drain_pending(pending_key, pending_buffer)
+            elif self.is_redis_cluster:
                 keys = self.cluster.zrange(pending_key, 0, -1)
                 keycount += len(keys)
 
@@ -311,6 +545,49 @@ class RedisBuffer(Buffer):
         finally:
             client.delete(lock_key)
 
+    def _drain_pending(self, pending_key, pending_buffer):
+        """
+        Drains ``pending_key`` in bounded chunks, dispatching `process_incr` as
+        soon as ``pending_buffer`` fills up, so memory stays flat regardless of
+        how large the backlog is. Keys are only removed from the pending set
+        once their batch was dispatched, so a crash in between never loses
+        them. Anything left once the time budget is spent is picked up by the
+        next run.
+        """
+        deadline = time() + self.pending_drain_time_budget
+
+        if self.is_redis_cluster:
+            clients = [self.cluster]
+        else:
+            # Pending sets are kept per host, so drain every host separately.
+            clients = [self.cluster.get_local_client(host_id) for host_id in self.cluster.hosts]
+
+        keycount = 0
+        for client in clients:
+            while time() < deadline:
+                keys = client.zrange(pending_key, 0, self.pending_drain_chunk_size - 1)
+                if not keys:
+                    break
+                keycount += len(keys)
+                for key in keys:
+                    pending_buffer.append(force_str(key))
+                    if pending_buffer.full():
+                        process_incr.apply_async(kwargs={"batch_keys": pending_buffer.flush()})
+                # Dispatch the remainder as well before removing the chunk,
+                # otherwise the next chunk would read the same keys again.
+                if not pending_buffer.empty():
+                    process_incr.apply_async(kwargs={"batch_keys": pending_buffer.flush()})
+                client.zrem(pending_key, *keys)
+
+        if time() >= deadline:
+            metrics.incr("buffer.pending-drain.budget-exceeded", skip_internal=False)
+            logger.info(
+                "buffer.pending-drain.budget-exceeded",
+                extra={"pending_key": pending_key, "keycount": keycount},
+            )
+
+        return keycount
+
     def process(self, key=None, batch_keys=None):
         assert not (key is None and batch_keys is None)
         assert not (key is not None and batch_keys is not None)
@@ -318,12 +595,170 @@ class RedisBuffer(Buffer):
         if key is not None:
             batch_keys = [key]
 
+        if self.bulk_process and len(batch_keys) > 1:
+            self._process_batch(batch_keys)
+            return
+
         for key in batch_keys:
             self._process_single_incr(key)
 
     def _process(self, model, columns, filters, extra=None, signal_only=None):
         return super().process(model, columns, filters, extra, signal_only)
 
+    def _load_buffered_values(self, values):
+        """
+        Decodes the hash stored by `incr` into ``(model, columns, filters, extra,
+        signal_only)``, or returns ``None`` if the hash was empty.
+        """
+        # XXX(python3): In python2 this isn't as important since redis will
+        # return string tyes (be it, byte strings), but in py3 we get bytes
+        # back, and really we just want to deal with keys as strings.
+        values = {force_str(k): v for k, v in values.items()}
+
+        if not values:
+            return None
+
+        model = import_string(force_str(values.pop("m")))
+
+        if values["f"].startswith(b"{" if not self.is_redis_cluster else "{"):
+            filters = self._load_values(json.loads(force_str(values.pop("f"))))
+        else:
+            # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+            filters = pickle.loads(force_bytes(values.pop("f")))
+
+        incr_values = {}
+        extra_values = {}
+        signal_only = None
+        for k, v in values.items():
+            if k.startswith("i+"):
+                incr_values[k[2:]] = int(v)
+            elif k.startswith("e+"):
+                if v.startswith(b"[" if not self.is_redis_cluster else "["):
+                    extra_values[k[2:]] = self._load_value(json.loads(force_str(v)))
+                else:
+                    # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+                    extra_values[k[2:]] = pickle.loads(force_bytes(v))
+            elif k == "s":
+                signal_only = bool(int(v))  # Should be 1 if set
+
+        return model, incr_values, filters, extra_values, signal_only
+
+    def _process_batch(self, batch_keys):
+        """
+        Flushes a batch of keys at once. Locks are taken and the hashes drained
+        in pipelines (one per Redis host), then the increments are handed to
+        `Buffer.process_batch` grouped by model so that every distinct column
+        set becomes a single UPDATE.
+        """
+        lock_keys = {key: self._make_lock_key(key) for key in batch_keys}
+
+        # prevent a stampede due to the way we use celery etas + duplicate
+        # tasks
+        if self.is_redis_cluster:
+            pipe = self.cluster.pipeline(transaction=False)
+            for lock_key in lock_keys.values():
+                pipe.set(lock_key, "1", nx=True, ex=10)
+            acquired = dict(zip(lock_keys, pipe.execute()))
+        else:
+            with self.cluster.map() as conn:
+                promises = {
+                    key: conn.set(lock_key, "1", nx=True, ex=10)
+                    for key, lock_key in lock_keys.items()
+                }
+            acquired = {key: promise.value for key, promise in promises.items()}
+
+        locked_keys = [key for key in batch_keys if acquired[key]]
+        for key in batch_keys:
+            if not acquired[key]:
+                metrics.incr("buffer.revoked", tags={"reason": "locked"}, skip_internal=False)
+                logger.debug("buffer.revoked.locked", extra={"redis_key": key})
+
+        try:
+            by_model = {}
+            for key, values in zip(locked_keys, self._drain_keys(locked_keys)):
+                loaded = self._load_buffered_values(values)
+                if loaded is None:
+                    metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
+                    logger.debug("buffer.revoked.empty", extra={"redis_key": key})
+                    continue
+
+                model, incr_values, filters, extra_values, signal_only = loaded
+                if signal_only:
+                    self._process(model, incr_values, filters, extra_values, signal_only)
+                    continue
+                by_model.setdefault(model, []).append((incr_values, filters, extra_values))
+
+            for model, updates in by_model.items():
+                with metrics.timer(
+                    "buffer.process_batch",
+                    tags={"module": model.__module__, "model": model.__name__},
+                ):
+                    leftover = self.process_batch(model, updates)
+                metrics.incr(
+                    "buffer.process_batch.coalesced",
+                    amount=len(updates) - len(leftover),
+                    tags={"module": model.__module__, "model": model.__name__},
+                    skip_internal=True,
+                )
+                for incr_values, filters, extra_values in leftover:
+                    # The hashes are drained already, so keep going when a
+                    # single row fails rather than losing the rest of them.
+                    try:
+                        self._process(model, incr_values, filters, extra_values)
+                    except Exception:
+                        metrics.incr(
+                            "buffer.process_batch.row_failed",
+                            tags={"module": model.__module__, "model": model.__name__},
+                            skip_internal=True,
+                        )
+                        logger.exception(
+                            "buffer.process_batch.row_failed",
+                            extra={"model": model.__name__, "filters": filters},
+                        )
+        finally:
+            if self.is_redis_cluster:
+                pipe = self.cluster.pipeline(transaction=False)
+                for key in locked_keys:
+                    pipe.delete(lock_keys[key])
+                pipe.execute()
+            else:
+                with self.cluster.map() as conn:
+                    for key in locked_keys:
+                        conn.delete(lock_keys[key])
+
+    def _drain_keys(self, keys):
+        """
+        Reads and deletes the hashes for ``keys``, removing them from their
+        pending set. Returns the hashes in the same order as ``keys``.
+        """
+        if not keys:
+            return []
+
+        if self.is_redis_cluster:
+            pipe = self.cluster.pipeline(transaction=False)
+            for key in keys:
+                pipe.hgetall(key)
+                pipe.zrem(self._make_pending_key_from_key(key), key)
+                pipe.delete(key)
+            return pipe.execute()[::3]
+
+        # Pending sets are kept per host, next to the keys they reference, so
+        # every host gets a single pipeline with all of its keys.
+        router = self.cluster.get_router()
+        keys_by_host = {}
+        for key in keys:
+            keys_by_host.setdefault(router.get_host_for_key(key), []).append(key)
+
+        results = {}
+        for host_id, host_keys in keys_by_host.items():
+            pipe = self.cluster.get_local_client(host_id).pipeline()
+            for key in host_keys:
+                pipe.hgetall(key)
+                pipe.zrem(self._make_pending_key_from_key(key), key)
+                pipe.delete(key)
+            results.update(zip(host_keys, pipe.execute()[::3]))
+        return [results[key] for key in keys]
+
     def _process_single_incr(self, key):
         if self.is_redis_cluster:
             client = self.cluster
@@ -352,39 +787,13 @@ class RedisBuffer(Buffer):
             pipe.delete(key)
             values = pipe.execute()[0]
 
-            # XXX(python3): In python2 this isn't as important since redis will
-            # return string tyes (be it, byte strings), but in py3 we get bytes
-            # back, and really we just want to deal with keys as strings.
-            values = {force_str(k): v for k, v in values.items()}
-
-            if not values:
+            loaded = self._load_buffered_values(values)
+            if loaded is None:
                 metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
                 logger.debug("buffer.revoked.empty", extra={"redis_key": key})
                 return
 
-            model = import_string(force_str(values.pop("m")))
-
-            if values["f"].startswith(b"{" if not self.is_redis_cluster else "{"):
-                filters = self._load_values(json.loads(force_str(values.pop("f"))))
-            else:
-                # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                filters = pickle.loads(force_bytes(values.pop("f")))
-
-            incr_values = {}
-            extra_values = {}
-            signal_only = None
-            for k, v in values.items():
-                if k.startswith("i+"):
-                    incr_values[k[2:]] = int(v)
-                elif k.startswith("e+"):
-                    if v.startswith(b"[" if not self.is_redis_cluster else "["):
-                        extra_values[k[2:]] = self._load_value(json.loads(force_str(v)))
-                    else:
-                        # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                        extra_values[k[2:]] = pickle.loads(force_bytes(v))
-                elif k == "s":
-                    signal_only = bool(int(v))  # Should be 1 if set
-
+            model, incr_values, filters, extra_values, signal_only = loaded
             self._process(model, incr_values, filters, extra_values, signal_only)
         finally:
             client.delete(lock_key)
@@ -123,6 +123,7 @@ SENTRY_INTEGRATION_ERROR_LOG_REDIS_CLUSTER = "default"
 SENTRY_DEBUG_FILES_REDIS_CLUSTER = "default"
 SENTRY_MONITORS_REDIS_CLUSTER = "default"
 SENTRY_STATISTICAL_DETECTORS_REDIS_CLUSTER = "default"
+SENTRY_INGEST_PROFILER_REDIS_CLUSTER = "default"
 
 # Hosts that are allowed to use system token authentication.
 # http://en.wikipedia.org/wiki/Reserved_IP_addresses
@@ -2105,10 +2106,24 @@ SENTRY_DEFAULT_MAX_EVENTS_PER_MINUTE = "90%"
 SENTRY_SNUBA = os.environ.get("SNUBA", "http://127.0.0.1:1218")
 SENTRY_SNUBA_TIMEOUT = 30
 SENTRY_SNUBA_CACHE_TTL_SECONDS = 60
+# Options for a process-wide LRU of Snuba query results in front of the
+# shared cache (see ``sentry.utils.lru.LRUCache``), e.g.
+# ``{"max_bytes": 32 * 1024 * 1024}``. Disabled when empty.
+SENTRY_SNUBA_LOCAL_CACHE: dict[str, Any] = {}
 
 # Node storage backend
 SENTRY_NODESTORE = "sentry.nodestore.django.DjangoNodeStorage"
 SENTRY_NODESTORE_OPTIONS: dict[str, Any] = {}
+# Options for a process-wide LRU of node payloads in front of the nodestore
+# backend (see ``sentry.utils.lru.LRUCache``), e.g.
+# ``{"max_bytes": 64 * 1024 * 1024, "ttl": 60}``. Disabled when empty.
+# Invalidation is process-local: other processes may serve a node that was
+# rewritten or deleted for up to ``ttl`` seconds.
+SENTRY_NODESTORE_LOCAL_CACHE: dict[str, Any] = {}
+# Directory with trained zstd dictionaries for node payloads (see
+# ``sentry nodestore train-dictionary``). When it contains dictionaries, new
+# payloads are compressed with the one matching the event platform.
+SENTRY_NODESTORE_DICTIONARY_DIR: str | None = None
 
 # Node storage backend used for ArtifactBundle indexing (aka FlatFileIndex aka BundleIndex)
 SENTRY_INDEXSTORE = "sentry.nodestore.django.DjangoNodeStorage"
@@ -2245,6 +2260,13 @@ SENTRY_SOURCE_FETCH_SOCKET_TIMEOUT = 2
 # Maximum content length for source files before we abort fetching
 SENTRY_SOURCE_FETCH_MAX_SIZE = 40 * 1024 * 1024
 
+# Options for a process-wide LRU of parsed sourcemaps shared by all events
+# processed in a process (see ``sentry.utils.lru.LRUCache``), e.g.
+# ``{"max_bytes": 512 * 1024 * 1024, "ttl": 600}``. The size of an entry is
+# the size of the minified source and sourcemap it was built from. Disabled
+# when empty.
+SENTRY_SOURCEMAP_CACHE: dict[str, Any] = {}
+
 # Maximum content length for cache value.  Currently used only to avoid
 # pointless compression of sourcemaps and other release files because we
 # silently fail to cache the compressed result anyway.  Defaults to None which
@@ -3663,12 +3685,18 @@ SENTRY_POST_PROCESS_LOCKS_BACKEND_OPTIONS = {
     "options": {"cluster": "default"},
 }
 
+# Maximum number of threads a post process job uses to run its read-only steps
+# concurrently (see the `post-process.concurrent-pipeline.rollout` option)
+SENTRY_POST_PROCESS_PIPELINE_WORKERS = 8
+
 # maximum number of projects allowed to query snuba with for the organization_vitals_overview endpoint
 ORGANIZATION_VITALS_OVERVIEW_PROJECT_LIMIT = 300
 
 
-# Default string indexer cache options
-SENTRY_STRING_INDEXER_CACHE_OPTIONS = {
+# Default string indexer cache options. Add e.g. ``"local_cache": {"max_size": 100000}``
+# to keep mappings in a process-wide LRU in front of the shared cache, and
+# ``"negative_ttl": 60`` to also remember strings which failed to resolve there.
+SENTRY_STRING_INDEXER_CACHE_OPTIONS: dict[str, Any] = {
     "cache_name": "default",
 }
 SENTRY_POSTGRES_INDEXER_RETRY_COUNT = 2
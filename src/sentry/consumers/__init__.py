@@ -54,6 +54,42 @@ def multiprocessing_options(
     ]
 
 
+def ingest_events_options() -> List[click.Option]:
+    """Return a list of ingest-events and ingest-attachments options."""
+    options = multiprocessing_options(default_max_batch_size=100)
+    options.append(
+        click.Option(
+            ["--threads", "num_threads"],
+            type=int,
+            default=1,
+            help="Process messages in this many threads, instead of in the consumer thread.",
+        )
+    )
+    options.append(
+        click.Option(
+            ["--max-pending-futures"],
+            type=int,
+            default=16,
+            help="Maximum number of (batches of) messages in flight when using threads.",
+        )
+    )
+    return options
+
+
+def ingest_transactions_options() -> List[click.Option]:
+    """Return a list of ingest-transactions options."""
+    options = ingest_events_options()
+    options.append(
+        click.Option(
+            ["--save-batch-size"],
+            type=int,
+            default=None,
+            help="Save transactions of the same project in batches of up to this size.",
+        )
+    )
+    return options
+
+
 def ingest_replay_recordings_options() -> List[click.Option]:
     """Return a list of ingest-replay-recordings options."""
     options = multiprocessing_options(default_max_batch_size=10)
@@ -61,6 +97,39 @@ def ingest_replay_recordings_options() -> List[click.Option]:
     return options
 
 
+def ingest_monitors_options() -> List[click.Option]:
+    """Return a list of ingest-monitors options."""
+    options = [
+        click.Option(
+            ["--mode"],
+            type=click.Choice(["serial", "parallel"]),
+            default="serial",
+            help="The mode to process check-ins in. Parallel mode processes batches of check-ins, "
+            "with the check-ins of unrelated monitors in parallel threads.",
+        ),
+        click.Option(
+            ["--max-batch-size"],
+            type=int,
+            default=500,
+            help="Maximum number of check-ins to batch before processing in parallel.",
+        ),
+        click.Option(
+            ["--max-batch-time-ms", "max_batch_time"],
+            type=int,
+            default=1000,
+            callback=convert_max_batch_time,
+            help="Maximum time (in milliseconds) to wait before processing a batch in parallel.",
+        ),
+        click.Option(
+            ["--max-workers"],
+            type=int,
+            default=None,
+            help="The maximum number of threads to process the check-ins of a batch with.",
+        ),
+    ]
+    return options
+
+
 _METRICS_INDEXER_OPTIONS = [
     click.Option(["--input-block-size"], type=int, default=DEFAULT_BLOCK_SIZE),
     click.Option(["--output-block-size"], type=int, default=DEFAULT_BLOCK_SIZE),
@@ -127,6 +196,7 @@ KAFKA_CONSUMERS: Mapping[str, ConsumerDefinition] = {
     "ingest-monitors": {
         "topic": settings.KAFKA_INGEST_MONITORS,
         "strategy_factory": "sentry.monitors.consumers.monitor_consumer.StoreMonitorCheckInStrategyFactory",
+        "click_options": ingest_monitors_options(),
     },
     "billing-metrics-consumer": {
         "topic": settings.KAFKA_SNUBA_GENERIC_METRICS,
@@ -184,7 +254,7 @@ KAFKA_CONSUMERS: Mapping[str, ConsumerDefinition] = {
     "ingest-events": {
         "topic": settings.KAFKA_INGEST_EVENTS,
         "strategy_factory": "sentry.ingest.consumer.factory.IngestStrategyFactory",
-        "click_options": multiprocessing_options(default_max_batch_size=100),
+        "click_options": ingest_events_options(),
         "static_args": {
             "consumer_type": "events",
         },
@@ -192,7 +262,7 @@ KAFKA_CONSUMERS: Mapping[str, ConsumerDefinition] = {
     "ingest-attachments": {
         "topic": settings.KAFKA_INGEST_ATTACHMENTS,
         "strategy_factory": "sentry.ingest.consumer.factory.IngestStrategyFactory",
-        "click_options": multiprocessing_options(default_max_batch_size=100),
+        "click_options": ingest_events_options(),
         "static_args": {
             "consumer_type": "attachments",
         },
@@ -200,7 +270,7 @@ KAFKA_CONSUMERS: Mapping[str, ConsumerDefinition] = {
     "ingest-transactions": {
         "topic": settings.KAFKA_INGEST_TRANSACTIONS,
         "strategy_factory": "sentry.ingest.consumer.factory.IngestStrategyFactory",
-        "click_options": multiprocessing_options(default_max_batch_size=100),
+        "click_options": ingest_transactions_options(),
         "static_args": {
             "consumer_type": "transactions",
         },
@@ -142,10 +142,21 @@ class NodeData(MutableMapping):
             See documentation of nodestore.
         """
 
+        subkeys = self.get_subkeys_to_save(subkeys)
+        if subkeys is not None:
+            nodestore.backend.set_subkeys(self.id, subkeys)
+
+    def get_subkeys_to_save(self, subkeys=None):
+        """
+        Returns the payload `save` would write to nodestore, or ``None`` if
+        there is nothing to save. This allows writing many nodes in one batch
+        through `nodestore.set_subkeys_multi`.
+        """
+
         # We never loaded any data for reading or writing, so there
         # is nothing to save.
         if self._node_data is None:
-            return
+            return None
 
         # We can't put our wrappers into the nodestore, so we need to
         # ensure that the data is converted into a plain old dict
@@ -155,8 +166,7 @@ class NodeData(MutableMapping):
 
         subkeys = subkeys or {}
         subkeys[None] = to_write
-
-        nodestore.backend.set_subkeys(self.id, subkeys)
+        return subkeys
 
 
 class NodeField(GzippedDictField):
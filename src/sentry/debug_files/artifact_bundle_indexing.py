@@ -2,10 +2,12 @@ from __future__ import annotations
 
 import hashlib
 import logging
+import mmap
 import random
+import struct
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, NamedTuple, Optional, Tuple, TypeVar
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, TypeVar, Union
 
 import sentry_sdk
 from django.db import DatabaseError, router
@@ -472,6 +474,20 @@ FilesByDebugID = Dict[str, List[int]]
 
 T = TypeVar("T")
 
+BinaryBuffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+# The binary index starts with a header, followed by fixed size records of all bundles, all urls and all
+# debug ids (both sorted by key), followed by the variable sized data the records point to. All offsets are
+# relative to the start of the buffer.
+_BINARY_MAGIC = b"FFIX"
+_BINARY_VERSION = 1
+# magic, version, is_complete, number of bundles, urls and debug ids
+_HEADER = struct.Struct("<4sB?xxIII")
+# bundle id, timestamp offset and length
+_BUNDLE_RECORD = struct.Struct("<QII")
+# key offset and length, bundle indexes offset and count
+_ENTRY_RECORD = struct.Struct("<IIII")
+
 
 class FlatFileIndex:
     def __init__(self):
@@ -517,6 +533,58 @@ class FlatFileIndex:
 
         return json.dumps(json_idx)
 
+    def from_binary(self, buffer: BinaryBuffer) -> None:
+        view = FlatFileIndexView(buffer)
+
+        self._is_complete = view.is_complete
+        self._bundles = view.bundles
+        self._files_by_url = dict(view.iter_files_by_url())
+        self._files_by_debug_id = dict(view.iter_files_by_debug_id())
+
+    def to_binary(self) -> bytes:
+        """
+        Encodes the index in the binary format read by `FlatFileIndexView`.
+        """
+        data = bytearray()
+        header_size = (
+            _HEADER.size
+            + len(self._bundles) * _BUNDLE_RECORD.size
+            + (len(self._files_by_url) + len(self._files_by_debug_id)) * _ENTRY_RECORD.size
+        )
+
+        def append(value: bytes) -> int:
+            offset = header_size + len(data)
+            data.extend(value)
+            return offset
+
+        records = bytearray(
+            _HEADER.pack(
+                _BINARY_MAGIC,
+                _BINARY_VERSION,
+                self._is_complete,
+                len(self._bundles),
+                len(self._files_by_url),
+                len(self._files_by_debug_id),
+            )
+        )
+        for bundle in self._bundles:
+            timestamp = datetime.isoformat(bundle.timestamp).encode()
+            records += _BUNDLE_RECORD.pack(bundle.id, append(timestamp), len(timestamp))
+
+        for collection in (self._files_by_url, self._files_by_debug_id):
+            # Keys are sorted by their encoded bytes, which is the order lookups compare them in.
+            for key, indexes in sorted(
+                (key.encode(), indexes) for key, indexes in collection.items()
+            ):
+                records += _ENTRY_RECORD.pack(
+                    append(key),
+                    len(key),
+                    append(struct.pack(f"<{len(indexes)}I", *indexes)),
+                    len(indexes),
+                )
+
+        return bytes(records + data)
+
     def enforce_size_limits(self) -> int:
         """
         This enforced reasonable limits on the data we put into the `FlatFileIndex` by removing
@@ -622,3 +690,92 @@ class FlatFileIndex:
                 return index, bundle
 
         return None
+
+
+class FlatFileIndexView:
+    """
+    Reads a binary encoded `FlatFileIndex` (see `FlatFileIndex.to_binary`) in place.
+
+    The buffer can be anything supporting the buffer protocol, including an mmap of a file, and only the records
+    visited by the binary search of a lookup are decoded, instead of the whole index.
+    """
+
+    def __init__(self, buffer: BinaryBuffer):
+        self._buffer = memoryview(buffer)
+        if len(self._buffer) < _HEADER.size:
+            raise ValueError("Buffer is too small to contain a flat file index")
+
+        magic, version, is_complete, num_bundles, num_urls, num_debug_ids = _HEADER.unpack_from(
+            self._buffer
+        )
+        if magic != _BINARY_MAGIC or version != _BINARY_VERSION:
+            raise ValueError("Buffer does not contain a supported flat file index")
+
+        self.is_complete: bool = is_complete
+        self._num_bundles = num_bundles
+        self._num_urls = num_urls
+        self._num_debug_ids = num_debug_ids
+        self._urls_offset = _HEADER.size + num_bundles * _BUNDLE_RECORD.size
+        self._debug_ids_offset = self._urls_offset + num_urls * _ENTRY_RECORD.size
+        self._bundles: Optional[Bundles] = None
+
+    @property
+    def bundles(self) -> Bundles:
+        if self._bundles is None:
+            bundles = []
+            for i in range(self._num_bundles):
+                bundle_id, offset, length = _BUNDLE_RECORD.unpack_from(
+                    self._buffer, _HEADER.size + i * _BUNDLE_RECORD.size
+                )
+                timestamp = str(self._buffer[offset : offset + length], "utf-8")
+                bundles.append(BundleMeta(bundle_id, datetime.fromisoformat(timestamp)))
+            self._bundles = bundles
+        return self._bundles
+
+    def _get_key(self, records_offset: int, i: int) -> bytes:
+        offset, length, _, _ = _ENTRY_RECORD.unpack_from(
+            self._buffer, records_offset + i * _ENTRY_RECORD.size
+        )
+        return self._buffer[offset : offset + length].tobytes()
+
+    def _get_indexes(self, records_offset: int, i: int) -> List[int]:
+        _, _, offset, count = _ENTRY_RECORD.unpack_from(
+            self._buffer, records_offset + i * _ENTRY_RECORD.size
+        )
+        return list(struct.unpack_from(f"<{count}I", self._buffer, offset))
+
+    def _lookup(self, records_offset: int, count: int, key: str) -> List[int]:
+        encoded_key = key.encode()
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._get_key(records_offset, mid) < encoded_key:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        if lo < count and self._get_key(records_offset, lo) == encoded_key:
+            return self._get_indexes(records_offset, lo)
+        return []
+
+    def _iter(self, records_offset: int, count: int) -> Iterator[Tuple[str, List[int]]]:
+        for i in range(count):
+            yield self._get_key(records_offset, i).decode(), self._get_indexes(records_offset, i)
+
+    def get_bundle_indexes_by_url(self, url: str) -> List[int]:
+        """
+        Returns the indexes into `bundles` of the bundles containing `url`, the newest bundle last.
+        """
+        return self._lookup(self._urls_offset, self._num_urls, url)
+
+    def get_bundle_indexes_by_debug_id(self, debug_id: str) -> List[int]:
+        """
+        Returns the indexes into `bundles` of the bundles containing `debug_id`, the newest bundle last.
+        """
+        return self._lookup(self._debug_ids_offset, self._num_debug_ids, debug_id)
+
+    def iter_files_by_url(self) -> Iterator[Tuple[str, List[int]]]:
+        return self._iter(self._urls_offset, self._num_urls)
+
+    def iter_files_by_debug_id(self) -> Iterator[Tuple[str, List[int]]]:
+        return self._iter(self._debug_ids_offset, self._num_debug_ids)
@@ -40,6 +40,7 @@ from sentry import (
     eventstream,
     eventtypes,
     features,
+    nodestore,
     options,
     quotas,
     reprocessing2,
@@ -71,6 +72,7 @@ from sentry.grouping.api import (
     load_grouping_config,
 )
 from sentry.grouping.result import CalculatedHashes
+from sentry.ingest import profiler
 from sentry.ingest.inbound_filters import FilterStatKeys
 from sentry.issues.grouptype import GroupCategory
 from sentry.issues.issue_occurrence import IssueOccurrence
@@ -119,6 +121,7 @@ from sentry.tasks.integrations import kick_off_status_syncs
 from sentry.tasks.process_buffer import buffer_incr
 from sentry.tasks.relay import schedule_invalidate_project_config
 from sentry.tsdb.base import TSDBModel
+from sentry.tsdb.batch import TSDBWriteBatch
 from sentry.types.activity import ActivityType
 from sentry.types.group import GroupSubStatus
 from sentry.utils import json, metrics
@@ -410,7 +413,8 @@ class EventManager:
         # Normalize if needed
         if not self._normalized:
             if not assume_normalized:
-                self.normalize(project_id=project_id)
+                with profiler.stage("normalize"):
+                    self.normalize(project_id=project_id)
             self._normalized = True
 
         with metrics.timer("event_manager.save.project.get_from_cache"):
@@ -523,7 +527,8 @@ class EventManager:
             op="event_manager",
             description="event_manager.save.calculate_event_grouping",
         ), metrics.timer("event_manager.calculate_event_grouping", tags=metric_tags):
-            hashes = _calculate_event_grouping(project, job["event"], grouping_config)
+            with profiler.stage("grouping"):
+                hashes = _calculate_event_grouping(project, job["event"], grouping_config)
 
         # Because this logic is not complex enough we want to special case the situation where we
         # migrate from a hierarchical hash to a non hierarchical hash.  The reason being that
@@ -1224,14 +1229,16 @@ def _get_or_create_group_release(
 
 
 @metrics.wraps("save_event.tsdb_record_all_metrics")
+@profiler.stage("tsdb")
 def _tsdb_record_all_metrics(jobs: Sequence[Job]) -> None:
     """
-    Do all tsdb-related things for save_event in here s.t. we can potentially
-    put everything in a single redis pipeline someday.
+    Do all tsdb-related things for save_event in here, collected into one
+    batch so that the writes of all jobs are sent at once.
     """
 
     # XXX: validate whether anybody actually uses those metrics
 
+    batch = TSDBWriteBatch(tsdb.backend)
     for job in jobs:
         incrs = []
         frequencies = []
@@ -1271,20 +1278,22 @@ def _tsdb_record_all_metrics(jobs: Sequence[Job]) -> None:
             records.append((TSDBModel.users_affected_by_project, project_id, (user.tag_value,)))
 
         if incrs:
-            tsdb.backend.incr_multi(incrs, timestamp=event.datetime, environment_id=environment.id)
+            batch.incr_multi(incrs, timestamp=event.datetime, environment_id=environment.id)
 
         if records:
-            tsdb.backend.record_multi(
-                records, timestamp=event.datetime, environment_id=environment.id
-            )
+            batch.record_multi(records, timestamp=event.datetime, environment_id=environment.id)
 
         if frequencies:
-            tsdb.backend.record_frequency_multi(frequencies, timestamp=event.datetime)
+            batch.record_frequency_multi(frequencies, timestamp=event.datetime)
+
+    batch.flush()
 
 
 @metrics.wraps("save_event.nodestore_save_many")
+@profiler.stage("nodestore")
 def _nodestore_save_many(jobs: Sequence[Job]) -> None:
     inserted_time = datetime.utcnow().replace(tzinfo=timezone.utc).timestamp()
+    to_save = {}
     for job in jobs:
         # Write the event to Nodestore
         subkeys = {}
@@ -1300,10 +1309,18 @@ def _nodestore_save_many(jobs: Sequence[Job]) -> None:
                 subkeys["unprocessed"] = unprocessed
 
         job["event"].data["nodestore_insert"] = inserted_time
-        job["event"].data.save(subkeys=subkeys)
+        node_subkeys = job["event"].data.get_subkeys_to_save(subkeys=subkeys)
+        if node_subkeys is not None:
+            to_save[job["event"].data.id] = node_subkeys
+
+    if len(to_save) == 1:
+        nodestore.backend.set_subkeys(*next(iter(to_save.items())))
+    elif to_save:
+        nodestore.backend.set_subkeys_multi(to_save)
 
 
 @metrics.wraps("save_event.eventstream_insert_many")
+@profiler.stage("eventstream")
 def _eventstream_insert_many(jobs: Sequence[Job]) -> None:
     for job in jobs:
         if is_sample_event(job):
@@ -1372,6 +1389,9 @@ def _eventstream_insert_many(jobs: Sequence[Job]) -> None:
             skip_consume=job.get("raw", False),
             group_states=group_states,
         )
+        # Lets batch saves tell which events have been persisted when a later
+        # step fails, see `save_transactions_batch`.
+        job["eventstream_inserted"] = True
 
 
 @metrics.wraps("save_event.track_outcome_accepted_many")
@@ -2658,6 +2678,80 @@ def save_transaction_events(jobs: Sequence[Job], projects: ProjectsMapping) -> S
     return jobs
 
 
+class TransactionBatchSaveError(Exception):
+    """
+    Raised by `save_transactions_batch` when saving a batch fails. ``persisted``
+    holds the indexes of the events which had already been inserted into the
+    eventstream, and must not be saved again.
+    """
+
+    def __init__(self, persisted: Sequence[int]) -> None:
+        super().__init__(persisted)
+        self.persisted = persisted
+
+
+@metrics.wraps("event_manager.save_transactions_batch")
+def save_transactions_batch(
+    project_id: int,
+    managers: Sequence[EventManager],
+    start_times: Sequence[Optional[int]],
+    assume_normalized: bool = False,
+) -> Sequence[Event]:
+    """
+    Saves many transactions of the same project at once. This is equivalent to
+    calling `EventManager.save` for each of them, but the `*_many` helpers
+    process the whole batch together, so that releases, environments,
+    nodestore and eventstream writes are shared between the events.
+
+    Raises `TransactionBatchSaveError` if saving fails.
+    """
+    for manager in managers:
+        if not manager._normalized:
+            if not assume_normalized:
+                with profiler.stage("normalize"):
+                    manager.normalize(project_id=project_id)
+            manager._normalized = True
+
+    with metrics.timer("event_manager.save.project.get_from_cache"):
+        project = Project.objects.get_from_cache(id=project_id)
+
+    with metrics.timer("event_manager.save.organization.get_from_cache"):
+        project.set_cached_field_value(
+            "organization", Organization.objects.get_from_cache(id=project.organization_id)
+        )
+
+    projects = {project.id: project}
+
+    jobs: list[Job] = []
+    for manager, start_time in zip(managers, start_times):
+        data = manager.get_data()
+        if data.get("type") != "transaction":
+            raise ValueError("Only transactions can be saved in batches")
+        jobs.append(
+            {"data": data, "project_id": project.id, "raw": False, "start_time": start_time}
+        )
+
+    try:
+        with sentry_sdk.start_span(op="event_manager.save.pull_out_data"):
+            _pull_out_data(jobs, projects)
+
+        for job in jobs:
+            job["data"]["project"] = project.id
+
+        save_transaction_events(jobs, projects)
+    except Exception as e:
+        raise TransactionBatchSaveError(
+            [index for index, job in enumerate(jobs) if job.get("eventstream_inserted")]
+        ) from e
+
+    if jobs and not project.flags.has_transactions:
+        first_transaction_received.send_robust(
+            project=project, event=jobs[0]["event"], sender=Project
+        )
+
+    return [job["event"] for job in jobs]
+
+
 @metrics.wraps("event_manager.save_generic_events")
 def save_generic_events(jobs: Sequence[Job], projects: ProjectsMapping) -> Sequence[Job]:
     with metrics.timer("event_manager.save_generic.organization_ids"):
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 import base64
+import copy
 import logging
 import os
 import zlib
 from hashlib import md5
-from typing import Any, Sequence
+from typing import Any, Dict, Iterable, Sequence, Tuple
 
 import msgpack
 import sentry_sdk
@@ -19,6 +20,7 @@ from sentry.grouping.component import GroupingComponent
 from sentry.stacktraces.functions import set_in_app
 from sentry.utils import metrics
 from sentry.utils.hashlib import hash_value
+from sentry.utils.lru import LRUCache
 from sentry.utils.safe import get_path, set_path
 from sentry.utils.strings import unescape_string
 
@@ -27,8 +29,11 @@ from .exceptions import InvalidEnhancerConfig
 from .matchers import (
     CalleeMatch,
     CallerMatch,
+    CategoryMatch,
     ExceptionFieldMatch,
+    FamilyMatch,
     FrameMatch,
+    InAppMatch,
     Match,
     create_match_frame,
 )
@@ -85,6 +90,10 @@ _        = space*
 VERSIONS = [1, 2]
 LATEST_VERSION = VERSIONS[-1]
 
+# Enhancements are loaded from their serialized form for every event that is
+# grouped, keep the parsed and compiled ones around.
+_loads_cache: LRUCache[bytes, Enhancements] = LRUCache(max_size=1000)
+
 
 class StacktraceState:
     def __init__(self):
@@ -127,14 +136,24 @@ class Enhancements:
         if bases is None:
             bases = []
         self.bases = bases
-
-        self._modifier_rules: list[Rule] = []
-        self._updater_rules: list[Rule] = []
-        for rule in self.iter_rules():
+        # `dumps()` memoized together with the version and bases it was
+        # computed for, which are reassigned in places.
+        self._dumps: tuple[tuple[Any, ...], str] | None = None
+
+        self._modifier_rules: list[CompiledRule] = []
+        self._updater_rules: list[CompiledRule] = []
+        # The compiled rules of the bases are shared, so that they are only
+        # compiled once when loading the configs.
+        for base_id in self.bases:
+            base = ENHANCEMENT_BASES.get(base_id)
+            if base:
+                self._modifier_rules.extend(base._modifier_rules)
+                self._updater_rules.extend(base._updater_rules)
+        for rule in self.rules:
             if modifier_rule := rule._as_modifier_rule():
-                self._modifier_rules.append(modifier_rule)
+                self._modifier_rules.append(CompiledRule(modifier_rule))
             if updater_rule := rule._as_updater_rule():
-                self._updater_rules.append(updater_rule)
+                self._updater_rules.append(CompiledRule(updater_rule))
 
     def apply_modifications_to_frame(
         self,
@@ -145,6 +164,7 @@ class Enhancements:
     ) -> None:
         """This applies the frame modifications to the frames itself. This does not affect grouping."""
         in_memory_cache: dict[str, str] = {}
+        match_cache: MatchCache = {}
 
         # Matching frames are used for matching rules
         match_frames = [create_match_frame(frame, platform) for frame in frames]
@@ -163,9 +183,16 @@ class Enhancements:
                 return
 
         with sentry_sdk.start_span(op="stacktrace_processing", description="apply_rules_to_frames"):
-            for rule in self._modifier_rules:
-                for idx, action in rule.get_matching_frame_actions(
-                    match_frames, platform, exception_data, in_memory_cache
+            frames_by_family = _get_frames_by_family(match_frames)
+            for compiled_rule in self._modifier_rules:
+                rule = compiled_rule.rule
+                for idx, action in compiled_rule.get_matching_frame_actions(
+                    match_frames,
+                    frames_by_family,
+                    platform,
+                    exception_data,
+                    in_memory_cache,
+                    match_cache,
                 ):
                     # Both frames and match_frames are updated
                     action.apply_modifications_to_frame(frames, match_frames, idx, rule=rule)
@@ -175,15 +202,22 @@ class Enhancements:
 
     def update_frame_components_contributions(self, components, frames, platform, exception_data):
         in_memory_cache: dict[str, str] = {}
+        match_cache: MatchCache = {}
 
         match_frames = [create_match_frame(frame, platform) for frame in frames]
+        frames_by_family = _get_frames_by_family(match_frames)
 
         stacktrace_state = StacktraceState()
         # Apply direct frame actions and update the stack state alongside
-        for rule in self._updater_rules:
-
-            for idx, action in rule.get_matching_frame_actions(
-                match_frames, platform, exception_data, in_memory_cache
+        for compiled_rule in self._updater_rules:
+            rule = compiled_rule.rule
+            for idx, action in compiled_rule.get_matching_frame_actions(
+                match_frames,
+                frames_by_family,
+                platform,
+                exception_data,
+                in_memory_cache,
+                match_cache,
             ):
                 action.update_frame_components_contributions(components, frames, idx, rule=rule)
                 action.modify_stacktrace_state(stacktrace_state, rule)
@@ -264,11 +298,15 @@ class Enhancements:
         ]
 
     def dumps(self):
-        return (
-            base64.urlsafe_b64encode(zlib.compress(msgpack.dumps(self._to_config_structure())))
-            .decode("ascii")
-            .strip("=")
-        )
+        key = (self.version, tuple(self.bases))
+        if self._dumps is None or self._dumps[0] != key:
+            dumped = (
+                base64.urlsafe_b64encode(zlib.compress(msgpack.dumps(self._to_config_structure())))
+                .decode("ascii")
+                .strip("=")
+            )
+            self._dumps = (key, dumped)
+        return self._dumps[1]
 
     def iter_rules(self):
         for base in self.bases:
@@ -288,17 +326,39 @@ class Enhancements:
             bases=bases,
         )
 
+    def _copy(self):
+        """
+        Returns a copy which shares the parsed and compiled rules, but whose
+        attributes can be reassigned or extended without affecting this one.
+        """
+        rv = copy.copy(self)
+        rv.rules = list(self.rules)
+        rv.bases = list(self.bases)
+        rv._modifier_rules = list(self._modifier_rules)
+        rv._updater_rules = list(self._updater_rules)
+        return rv
+
     @classmethod
     def loads(cls, data):
         if isinstance(data, str):
             data = data.encode("ascii", "ignore")
+        # Callers get a copy, so that the cached enhancements are never
+        # modified.
+        if cls is Enhancements:
+            rv = _loads_cache.get(data)
+            if rv is not None:
+                return rv._copy()
         padded = data + b"=" * (4 - (len(data) % 4))
         try:
-            return cls._from_config_structure(
+            rv = cls._from_config_structure(
                 msgpack.loads(zlib.decompress(base64.urlsafe_b64decode(padded)), raw=False)
             )
         except (LookupError, AttributeError, TypeError, ValueError) as e:
             raise ValueError("invalid stack trace rule config: %s" % e)
+        if cls is Enhancements:
+            _loads_cache.set(data, rv)
+            return rv._copy()
+        return rv
 
     @classmethod
     def from_config_string(self, s, bases=None, id=None):
@@ -402,6 +462,139 @@ class Rule:
         )
 
 
+MatchCache = Dict[Tuple[Match, Any], bool]
+
+
+class CompiledRule:
+    """
+    A rule prepared for being matched against all frames of a stacktrace.
+
+    Produces the same matches as `Rule.get_matching_frame_actions`, but
+
+    - only looks at the frames of the families the rule is restricted to,
+    - checks the cheap matchers of the frame itself first and
+    - memoizes the outcome of every matcher per matched value, so frames
+      sharing the same function, module, path, etc. are only matched once
+      per stacktrace.
+    """
+
+    def __init__(self, rule: Rule) -> None:
+        self.rule = rule
+
+        # The frame matchers with the offset of the frame they look at.
+        frame_matchers: list[tuple[Match, int]] = []
+        for matcher in rule._other_matchers:
+            if isinstance(matcher, CallerMatch):
+                frame_matchers.append((matcher.caller, -1))
+            elif isinstance(matcher, CalleeMatch):
+                frame_matchers.append((matcher.caller, 1))
+            else:
+                frame_matchers.append((matcher, 0))
+
+        # Matchers have no side effects, so their order does not change the
+        # outcome, only how soon a mismatch is found.
+        frame_matchers.sort(
+            key=lambda item: (
+                item[1] != 0,
+                not isinstance(item[0], (FamilyMatch, InAppMatch, CategoryMatch)),
+            )
+        )
+        self.frame_matchers = frame_matchers
+
+        self.families: frozenset[bytes] | None = None
+        for matcher, offset in frame_matchers:
+            if (
+                offset == 0
+                and isinstance(matcher, FamilyMatch)
+                and not matcher.negated
+                and b"all" not in matcher._flags
+            ):
+                families = frozenset(matcher._flags)
+                self.families = families if self.families is None else self.families & families
+
+    def get_matching_frame_actions(
+        self,
+        match_frames: Sequence[dict[str, Any]],
+        frames_by_family: dict[bytes, list[int]],
+        platform: str,
+        exception_data: dict[str, Any],
+        in_memory_cache: dict[str, str],
+        match_cache: MatchCache,
+    ) -> list[tuple[int, Action]]:
+        rule = self.rule
+        if not rule.matchers:
+            return []
+
+        for m in rule._exception_matchers:
+            if not _matches_frame(
+                m, match_frames, None, platform, exception_data, in_memory_cache, match_cache
+            ):
+                return []
+
+        if self.families is None:
+            indices: Iterable[int] = range(len(match_frames))
+        else:
+            indices = sorted(
+                idx for family in self.families for idx in frames_by_family.get(family, ())
+            )
+
+        rv = []
+        last_idx = len(match_frames) - 1
+        for idx in indices:
+            for m, offset in self.frame_matchers:
+                if offset and not 0 <= idx + offset <= last_idx:
+                    break
+                if not _matches_frame(
+                    m,
+                    match_frames,
+                    idx + offset,
+                    platform,
+                    exception_data,
+                    in_memory_cache,
+                    match_cache,
+                ):
+                    break
+            else:
+                for action in rule.actions:
+                    rv.append((idx, action))
+
+        return rv
+
+
+def _matches_frame(
+    matcher: Match,
+    match_frames: Sequence[dict[str, Any]],
+    idx: int | None,
+    platform: str,
+    exception_data: dict[str, Any],
+    in_memory_cache: dict[str, str],
+    match_cache: MatchCache,
+) -> bool:
+    if isinstance(matcher, ExceptionFieldMatch):
+        # Only depends on the exception, which is the same for all frames.
+        key: tuple[Match, Any] = (matcher, None)
+    elif isinstance(matcher, FrameMatch) and matcher.field is not None:
+        # Frames are mutated by the actions of earlier rules, so this has to
+        # look at the current value.
+        key = (matcher, match_frames[idx][matcher.field])  # type: ignore[index]
+    else:
+        return matcher.matches_frame(match_frames, idx, platform, exception_data, in_memory_cache)
+
+    rv = match_cache.get(key)
+    if rv is None:
+        rv = match_cache[key] = matcher.matches_frame(
+            match_frames, idx, platform, exception_data, in_memory_cache
+        )
+    return rv
+
+
+def _get_frames_by_family(match_frames: Sequence[dict[str, Any]]) -> dict[bytes, list[int]]:
+    rv: dict[bytes, list[int]] = {}
+    for idx, match_frame in enumerate(match_frames):
+        rv.setdefault(match_frame["family"], []).append(idx)
+    return rv
+
+
 class EnhancementsVisitor(NodeVisitor):
     visit_comment = visit_empty = lambda *a: None
     unwrapped_exceptions = (InvalidEnhancerConfig,)
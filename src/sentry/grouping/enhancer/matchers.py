@@ -118,6 +118,7 @@ class FrameMatch(Match):
 
     # Global registry of matchers
     instances: Dict[InstanceKey, Match] = {}
+    # The key of the match frame the outcome of the matcher depends on
     field: Any = None
 
     @classmethod
@@ -223,6 +224,9 @@ class PathMatch(PathLikeMatch):
 
 
 class FamilyMatch(FrameMatch):
+
+    field = "family"
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._flags = set(self._encoded_pattern.split(b","))
@@ -235,6 +239,9 @@ class FamilyMatch(FrameMatch):
 
 
 class InAppMatch(FrameMatch):
+
+    field = "in_app"
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._ref_val = get_rule_bool(self.pattern)
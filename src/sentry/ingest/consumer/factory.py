@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from functools import partial
 from typing import Any, Callable, Mapping, MutableMapping, NamedTuple, TypeVar
 
 from arroyo import Topic
@@ -13,7 +14,9 @@ from arroyo.processing.strategies import (
     ProcessingStrategy,
     ProcessingStrategyFactory,
     RunTask,
+    RunTaskInThreads,
 )
+from arroyo.processing.strategies.batching import BatchStep
 from arroyo.types import Commit, FilteredPayload, Message, Partition
 from django.conf import settings
 
@@ -23,7 +26,7 @@ from sentry.utils import kafka_config
 from sentry.utils.arroyo import RunTaskWithMultiprocessing
 
 from .attachment_event import decode_and_process_chunks, process_attachments_and_events
-from .simple_event import process_simple_event_message
+from .simple_event import process_simple_event_batch, process_simple_event_message
 
 
 class MultiProcessConfig(NamedTuple):
@@ -34,6 +37,11 @@ class MultiProcessConfig(NamedTuple):
     output_block_size: int
 
 
+class ThreadsConfig(NamedTuple):
+    num_threads: int
+    max_pending_futures: int
+
+
 TInput = TypeVar("TInput")
 TOutput = TypeVar("TOutput")
 
@@ -42,6 +50,7 @@ def maybe_multiprocess_step(
     mp: MultiProcessConfig | None,
     function: Callable[[Message[TInput]], TOutput],
     next_step: ProcessingStrategy[FilteredPayload | TOutput],
+    threads: ThreadsConfig | None = None,
 ) -> ProcessingStrategy[FilteredPayload | TInput]:
     if mp is not None:
         return RunTaskWithMultiprocessing(
@@ -53,6 +62,15 @@ def maybe_multiprocess_step(
             input_block_size=mp.input_block_size,
             output_block_size=mp.output_block_size,
         )
+    elif threads is not None:
+        # Results are forwarded (and therefore committed) in the order the
+        # messages were submitted, no matter which thread finishes first.
+        return RunTaskInThreads(
+            processing_function=function,
+            concurrency=threads.num_threads,
+            max_pending_futures=threads.max_pending_futures,
+            next_step=next_step,
+        )
     else:
         return RunTask(
             function=function,
@@ -69,9 +87,18 @@ class IngestStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
         max_batch_time: int,
         input_block_size: int,
         output_block_size: int,
+        save_batch_size: int | None = None,
+        num_threads: int = 1,
+        max_pending_futures: int = 16,
     ):
         self.consumer_type = consumer_type
         self.is_attachment_topic = consumer_type == ConsumerType.Attachments
+        self.max_batch_size = max_batch_size
+        self.max_batch_time = max_batch_time
+        # Transactions of the same project are saved together in batches of
+        # this size. Other event types are never batched, since they still
+        # have to go through preprocessing one by one.
+        self.save_batch_size = save_batch_size
 
         self.multi_process = None
         if num_processes > 1:
@@ -79,6 +106,10 @@ class IngestStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
                 num_processes, max_batch_size, max_batch_time, input_block_size, output_block_size
             )
 
+        self.threads = None
+        if num_threads > 1:
+            self.threads = ThreadsConfig(num_threads, max_pending_futures)
+
         self.health_checker = HealthChecker("ingest")
 
     def create_with_partitions(
@@ -87,9 +118,30 @@ class IngestStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
         partitions: Mapping[Partition, int],
     ) -> ProcessingStrategy[KafkaPayload]:
         mp = self.multi_process
+        threads = self.threads
 
         final_step = CommitOffsets(commit)
 
+        # Messages are processed in batches when transactions are saved in
+        # batches, or when they are processed in threads. The latter keeps the
+        # number of in-flight futures (and commits) low, and lets each thread
+        # prefetch the projects of a whole batch.
+        if not self.is_attachment_topic and (self.save_batch_size or threads is not None):
+            batch_processing_step = maybe_multiprocess_step(
+                mp,
+                partial(process_simple_event_batch, max_save_batch_size=self.save_batch_size),
+                final_step,
+                threads=threads,
+            )
+            batch_step = BatchStep(
+                max_batch_size=self.max_batch_size,
+                max_batch_time=self.max_batch_time,
+                next_step=batch_processing_step,
+            )
+            return create_backpressure_step(
+                health_checker=self.health_checker, next_step=batch_step
+            )
+
         if not self.is_attachment_topic:
             next_step = maybe_multiprocess_step(mp, process_simple_event_message, final_step)
             return create_backpressure_step(health_checker=self.health_checker, next_step=next_step)
@@ -104,7 +156,9 @@ class IngestStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
         # are being handled in a step before the event depending on them is processed in a
         # later step.
 
-        step_2 = maybe_multiprocess_step(mp, process_attachments_and_events, final_step)
+        step_2 = maybe_multiprocess_step(
+            mp, process_attachments_and_events, final_step, threads=threads
+        )
         # This `FilterStep` will skip over processing `None` (aka already handled attachment chunks)
         # in the second step. We filter this here explicitly,
         # to avoid arroyo from needlessly dispatching `None` messages.
@@ -113,7 +167,9 @@ class IngestStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
         # As the steps are defined (and types inferred) in reverse order, we would get a type error here,
         # as `step_1` outputs an `| None`, but the `filter_step` does not mention that in its type,
         # as it is inferred from the `step_2` input type which does not mention `| None`.
-        step_1 = maybe_multiprocess_step(mp, decode_and_process_chunks, filter_step)  # type:ignore
+        step_1 = maybe_multiprocess_step(
+            mp, decode_and_process_chunks, filter_step, threads=threads  # type:ignore
+        )
 
         return create_backpressure_step(health_checker=self.health_checker, next_step=step_1)
 
@@ -130,6 +186,9 @@ def get_ingest_consumer(
     output_block_size: int,
     force_topic: str | None,
     force_cluster: str | None,
+    save_batch_size: int | None = None,
+    num_threads: int = 1,
+    max_pending_futures: int = 16,
 ) -> StreamProcessor[KafkaPayload]:
     topic = force_topic or ConsumerType.get_topic_name(consumer_type)
     consumer_config = get_config(
@@ -151,6 +210,9 @@ def get_ingest_consumer(
             max_batch_time=max_batch_time,
             input_block_size=input_block_size,
             output_block_size=output_block_size,
+            save_batch_size=save_batch_size,
+            num_threads=num_threads,
+            max_pending_futures=max_pending_futures,
         ),
         commit_policy=ONCE_PER_SECOND,
     )
@@ -1,7 +1,7 @@
 import functools
 import logging
 import random
-from typing import Any, Mapping
+from typing import Any, List, Mapping, MutableMapping, Optional, Sequence, Set, Tuple
 
 import sentry_sdk
 from django.conf import settings
@@ -11,14 +11,20 @@ from sentry import eventstore, features
 from sentry.attachments import CachedAttachment, attachment_cache
 from sentry.event_manager import save_attachment
 from sentry.eventstore.processing import event_processing_store
+from sentry.ingest import profiler
 from sentry.ingest.userreport import Conflict, save_userreport
 from sentry.killswitches import killswitch_matches_context
 from sentry.models.project import Project
 from sentry.signals import event_accepted
-from sentry.tasks.store import preprocess_event, save_event_transaction
+from sentry.tasks.store import (
+    preprocess_event,
+    save_event_transaction,
+    save_event_transaction_batch,
+)
 from sentry.utils import json, metrics
 from sentry.utils.cache import cache_key_for_event
 from sentry.utils.dates import to_datetime
+from sentry.utils.iterators import chunked
 from sentry.utils.snuba import RateLimitExceeded
 
 logger = logging.getLogger(__name__)
@@ -50,11 +56,115 @@ def process_event(message: IngestMessage, project: Project) -> None:
     """
     Perform some initial filtering and deserialize the message payload.
     """
-    payload = message["payload"]
+    with profiler.profile("ingest_consumer.process_event", project_id=project.id):
+        with profiler.stage("store"):
+            stored = _store_event(message, project)
+        if stored is None:
+            return
+
+        data, cache_key = stored
+        with profiler.stage("dispatch"):
+            _dispatch_event(message, project, data, cache_key)
+
+        _mark_event_accepted(message, project, data)
+
+
+def _dispatch_event(message: IngestMessage, project: Project, data: Any, cache_key: str) -> None:
     start_time = float(message["start_time"])
     event_id = message["event_id"]
     project_id = int(message["project_id"])
-    remote_addr = message.get("remote_addr")
+    attachments = message.get("attachments") or ()
+
+    if data.get("type") == "transaction":
+        # No need for preprocess/process for transactions thus submit
+        # directly transaction specific save_event task.
+        save_event_transaction.delay(
+            cache_key=cache_key,
+            data=None,
+            start_time=start_time,
+            event_id=event_id,
+            project_id=project_id,
+        )
+    else:
+        # Preprocess this event, which spawns either process_event or
+        # save_event. Pass data explicitly to avoid fetching it again from the
+        # cache.
+        with sentry_sdk.start_span(op="ingest_consumer.process_event.preprocess_event"):
+            preprocess_event(
+                cache_key=cache_key,
+                data=data,
+                start_time=start_time,
+                event_id=event_id,
+                project=project,
+                has_attachments=bool(attachments),
+            )
+
+
+@trace_func(name="ingest_consumer.process_event_batch")
+@metrics.wraps("ingest_consumer.process_event_batch")
+def process_event_batch(
+    messages: Sequence[Tuple[IngestMessage, Project]], max_save_batch_size: int
+) -> None:
+    """
+    Like `process_event`, but for many messages at once. Transactions of the
+    same project are saved together by `save_event_transaction_batch`, in
+    chunks of up to ``max_save_batch_size`` events, while everything else is
+    dispatched exactly like `process_event` would.
+    """
+    transactions: MutableMapping[int, List[Tuple[IngestMessage, Project, Any, str]]] = {}
+    # Events are only marked as accepted once their batch is dispatched, so
+    # duplicates within the batch have to be caught here.
+    seen: Set[Tuple[int, str]] = set()
+
+    for message, project in messages:
+        deduplication_key = (int(message["project_id"]), message["event_id"])
+        if deduplication_key in seen:
+            logger.warning(
+                "pre-process-forwarder detected a duplicated event" " with id:%s for project:%s.",
+                message["event_id"],
+                message["project_id"],
+            )
+            continue
+
+        with profiler.profile("ingest_consumer.process_event", project_id=project.id):
+            with profiler.stage("store"):
+                stored = _store_event(message, project)
+            if stored is None:
+                continue
+
+            seen.add(deduplication_key)
+            data, cache_key = stored
+            if data.get("type") == "transaction":
+                transactions.setdefault(project.id, []).append((message, project, data, cache_key))
+                continue
+
+            with profiler.stage("dispatch"):
+                _dispatch_event(message, project, data, cache_key)
+            _mark_event_accepted(message, project, data)
+
+    for project_id, items in transactions.items():
+        for chunk in chunked(items, max_save_batch_size):
+            save_event_transaction_batch.delay(
+                cache_keys=[cache_key for _, _, _, cache_key in chunk],
+                start_times=[float(message["start_time"]) for message, _, _, _ in chunk],
+                event_ids=[message["event_id"] for message, _, _, _ in chunk],
+                project_id=project_id,
+            )
+            metrics.timing("ingest_consumer.process_event_batch.save_batch_size", len(chunk))
+
+            for message, project, data, _ in chunk:
+                _mark_event_accepted(message, project, data)
+
+
+def _store_event(message: IngestMessage, project: Project) -> Optional[Tuple[Any, str]]:
+    """
+    Deduplicate, load shed and parse the payload of an event message, then put
+    it into the event processing store. Returns the parsed event and its cache
+    key, or ``None`` if the event was dropped.
+    """
+    payload = message["payload"]
+    event_id = message["event_id"]
+    project_id = int(message["project_id"])
     attachments = message.get("attachments") or ()
 
     sentry_sdk.set_extra("event_id", event_id)
@@ -84,7 +194,7 @@ def process_event(message: IngestMessage, project: Project) -> None:
             event_id,
             project_id,
         )
-        return  # message already processed do not reprocess
+        return None  # message already processed do not reprocess
 
     if killswitch_matches_context(
         "store.load-shed-pipeline-projects",
@@ -96,7 +206,7 @@ def process_event(message: IngestMessage, project: Project) -> None:
     ):
         # This killswitch is for the worst of scenarios and should probably not
         # cause additional load on our logging infrastructure
-        return
+        return None
 
     # Parse the JSON payload. This is required to compute the cache key and
     # call process_event. The payload will be put into Kafka raw, to avoid
@@ -104,6 +214,7 @@ def process_event(message: IngestMessage, project: Project) -> None:
     # XXX: Do not use CanonicalKeyDict here. This may break preprocess_event
     # which assumes that data passed in is a raw dictionary.
     data = json.loads(payload, use_rapid_json=True)
+    profiler.set_context(event_type=data.get("type"))
 
     if project_id == settings.SENTRY_PROJECT:
         metrics.incr(
@@ -121,7 +232,7 @@ def process_event(message: IngestMessage, project: Project) -> None:
             "event_id": event_id,
         },
     ):
-        return
+        return None
 
     with metrics.timer("ingest_consumer._store_event"):
         cache_key = event_processing_store.store(data)
@@ -135,35 +246,18 @@ def process_event(message: IngestMessage, project: Project) -> None:
 
             attachment_cache.set(cache_key, attachments=attachment_objects, timeout=CACHE_TIMEOUT)
 
-    if data.get("type") == "transaction":
-        # No need for preprocess/process for transactions thus submit
-        # directly transaction specific save_event task.
-        save_event_transaction.delay(
-            cache_key=cache_key,
-            data=None,
-            start_time=start_time,
-            event_id=event_id,
-            project_id=project_id,
-        )
-    else:
-        # Preprocess this event, which spawns either process_event or
-        # save_event. Pass data explicitly to avoid fetching it again from the
-        # cache.
-        with sentry_sdk.start_span(op="ingest_consumer.process_event.preprocess_event"):
-            preprocess_event(
-                cache_key=cache_key,
-                data=data,
-                start_time=start_time,
-                event_id=event_id,
-                project=project,
-                has_attachments=bool(attachments),
-            )
+    return data, cache_key
+
 
+def _mark_event_accepted(message: IngestMessage, project: Project, data: Any) -> None:
     # remember for an 1 hour that we saved this event (deduplication protection)
+    deduplication_key = f"ev:{message['project_id']}:{message['event_id']}"
     cache.set(deduplication_key, "", CACHE_TIMEOUT)
 
     # emit event_accepted once everything is done
-    event_accepted.send_robust(ip=remote_addr, data=data, project=project, sender=process_event)
+    event_accepted.send_robust(
+        ip=message.get("remote_addr"), data=data, project=project, sender=process_event
+    )
 
 
 @trace_func(name="ingest_consumer.process_attachment_chunk")
@@ -200,7 +294,7 @@ def process_individual_attachment(message: IngestMessage, project: Project) -> N
     ):
         # This killswitch is for the worst of scenarios and should probably not
         # cause additional load on our logging infrastructure
-        return
+        return None
 
     try:
         # Attachments may be uploaded for events that already exist. Fetch the
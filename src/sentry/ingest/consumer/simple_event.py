@@ -1,13 +1,16 @@
 import logging
+from typing import Collection, List, Mapping, Optional, Tuple
 
 import msgpack
 from arroyo.backends.kafka.consumer import KafkaPayload
+from arroyo.processing.strategies.batching import ValuesBatch
 from arroyo.types import Message
 
+from sentry.models.options.project_option import ProjectOption
 from sentry.models.project import Project
 from sentry.utils import metrics
 
-from .processors import IngestMessage, process_event
+from .processors import IngestMessage, process_event, process_event_batch
 
 logger = logging.getLogger(__name__)
 
@@ -27,20 +30,74 @@ def process_simple_event_message(raw_message: Message[KafkaPayload]) -> None:
       `symbolicate_event` or `process_event`.
     """
 
-    raw_payload = raw_message.payload.value
-    message: IngestMessage = msgpack.unpackb(raw_payload, use_list=False)
+    message = _decode_simple_event_message(raw_message.payload)
+    project = _get_project(message["project_id"])
+    if project is None:
+        return
 
-    message_type = message["type"]
-    project_id = message["project_id"]
+    return process_event(message, project)
+
+
+def process_simple_event_batch(
+    raw_messages: Message[ValuesBatch[KafkaPayload]], max_save_batch_size: Optional[int] = None
+) -> None:
+    """
+    Processes a batch of Kafka Messages containing "simple" Event payloads.
+
+    Works like `process_simple_event_message`, except that the projects of the
+    whole batch and their options are fetched up front, instead of one cache
+    round trip per message. If ``max_save_batch_size`` is given, transactions
+    of the same project are handed to a single `save_event_transaction_batch`
+    task.
+    """
+    decoded = [
+        _decode_simple_event_message(raw_message.payload) for raw_message in raw_messages.payload
+    ]
+    projects = _prefetch_projects({message["project_id"] for message in decoded})
+
+    messages: List[Tuple[IngestMessage, Project]] = []
+    for message in decoded:
+        project = projects.get(message["project_id"])
+        if project is None:
+            logger.error("Project for ingested event does not exist: %s", message["project_id"])
+            continue
+        messages.append((message, project))
+
+    if max_save_batch_size:
+        if messages:
+            process_event_batch(messages, max_save_batch_size)
+    else:
+        for message, project in messages:
+            process_event(message, project)
 
+
+def _decode_simple_event_message(payload: KafkaPayload) -> IngestMessage:
+    message: IngestMessage = msgpack.unpackb(payload.value, use_list=False)
+
+    message_type = message["type"]
     if message_type != "event":
         raise ValueError(f"Unsupported message type: {message_type}")
 
+    return message
+
+
+def _prefetch_projects(project_ids: Collection[int]) -> Mapping[int, Project]:
+    with metrics.timer("ingest_consumer.prefetch_projects"):
+        projects = {
+            project.id: project for project in Project.objects.get_many_from_cache(project_ids)
+        }
+        # Options are stored in a thread local cache, which is what the
+        # processing of the batch will read from. Drop what earlier batches
+        # loaded so that changes are picked up.
+        ProjectOption.objects.clear_local_cache()
+        ProjectOption.objects.get_all_values_many(list(projects))
+    return projects
+
+
+def _get_project(project_id: int) -> Optional[Project]:
     try:
         with metrics.timer("ingest_consumer.fetch_project"):
-            project = Project.objects.get_from_cache(id=project_id)
+            return Project.objects.get_from_cache(id=project_id)
     except Project.DoesNotExist:
         logger.error("Project for ingested event does not exist: %s", project_id)
-        return
-
-    return process_event(message, project)
+        return None
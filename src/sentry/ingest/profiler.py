@@ -0,0 +1,422 @@
+"""
+A sampling, per-stage latency profiler for the event ingestion path.
+
+A sampled unit of work (processing a message in the ingest consumer, saving
+an event, post processing it) is wrapped in `profile`, and the interesting
+parts of it in `stage`::
+
+    with profiler.profile("save_event", project_id=project_id, event_type="error"):
+        with profiler.stage("grouping"):
+            ...
+
+Stages nest, and every finished stage records its wall and CPU time under its
+full path (``save_event;grouping``), together with the event type. The root
+stage is additionally recorded per project, which makes it possible to tell
+which projects are burning consumer CPU.
+
+Timings are aggregated in a bounded, process-local histogram that is
+periodically merged into Redis, from where ``sentry ingest profile`` reads and
+renders it as a table or as collapsed stacks for flamegraph tools.
+
+When a unit of work is not sampled, `stage` costs a single thread-local
+lookup.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from time import thread_time, time
+from typing import Iterator, MutableMapping, Sequence
+
+from django.conf import settings
+
+from sentry import options
+from sentry.utils import redis
+
+logger = logging.getLogger(__name__)
+
+#: Bucket ``i`` counts durations of less than ``2 ** i`` milliseconds, the
+#: last bucket everything above.
+NUM_BUCKETS = 20
+
+#: How many distinct (kind, event type, name) keys a process keeps before
+#: further projects are folded into `OTHER`.
+MAX_KEYS = 5000
+
+OTHER = "other"
+
+KIND_STAGE = "stage"
+KIND_PROJECT = "project"
+
+FLUSH_INTERVAL = 10
+
+KEY_TTL = 60 * 60 * 25
+
+_SEP = "\x1f"
+
+
+@dataclass
+class Entry:
+    count: int = 0
+    wall: float = 0.0
+    cpu: float = 0.0
+    buckets: list[int] = field(default_factory=lambda: [0] * NUM_BUCKETS)
+
+    def add(self, wall: float, cpu: float) -> None:
+        self.count += 1
+        self.wall += wall
+        self.cpu += cpu
+        self.buckets[get_bucket(wall)] += 1
+
+    def merge(self, other: Entry) -> None:
+        self.count += other.count
+        self.wall += other.wall
+        self.cpu += other.cpu
+        for i, value in enumerate(other.buckets):
+            self.buckets[i] += value
+
+    def percentile(self, q: float) -> float:
+        """
+        Returns the upper bound (in seconds) of the bucket containing the
+        ``q``-th percentile.
+        """
+        threshold = q * self.count
+        seen = 0
+        for i, value in enumerate(self.buckets):
+            seen += value
+            if value and seen >= threshold:
+                return (2**i) / 1000.0
+        return (2 ** (NUM_BUCKETS - 1)) / 1000.0
+
+
+def get_bucket(seconds: float) -> int:
+    return min(int(seconds * 1000).bit_length(), NUM_BUCKETS - 1)
+
+
+class StageHistogram:
+    """
+    Aggregated stage timings, keyed by ``(kind, event_type, name)``. ``name``
+    is the stage path for `KIND_STAGE` entries and ``<project_id>;<root>`` for
+    `KIND_PROJECT` entries.
+    """
+
+    def __init__(self, max_keys: int = MAX_KEYS) -> None:
+        self.max_keys = max_keys
+        self.entries: MutableMapping[tuple[str, str, str], Entry] = {}
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _get_entry(self, key: tuple[str, str, str]) -> Entry:
+        # Must be called with the lock held.
+        entry = self.entries.get(key)
+        if entry is None:
+            if len(self.entries) >= self.max_keys:
+                kind, event_type, name = key
+                if kind == KIND_PROJECT:
+                    key = (kind, event_type, f"{OTHER};{name.split(';', 1)[-1]}")
+                else:
+                    key = (kind, event_type, OTHER)
+                entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = Entry()
+        return entry
+
+    def add(self, kind: str, event_type: str, name: str, wall: float, cpu: float) -> None:
+        with self.lock:
+            self._get_entry((kind, event_type, name)).add(wall, cpu)
+
+    def merge(self, other: StageHistogram) -> None:
+        with self.lock:
+            for key, entry in other.entries.items():
+                self._get_entry(key).merge(entry)
+
+    def swap(self) -> StageHistogram:
+        """
+        Returns a histogram with the current entries and starts over with an
+        empty one.
+        """
+        rv = StageHistogram(self.max_keys)
+        with self.lock:
+            rv.entries, self.entries = self.entries, {}
+        return rv
+
+    def get_self_times(self) -> dict[tuple[str, str], float]:
+        """
+        Returns the wall time spent in each stage itself, excluding its
+        child stages, keyed by ``(event_type, path)``.
+        """
+        rv = {}
+        for (kind, event_type, name), entry in self.entries.items():
+            if kind == KIND_STAGE:
+                rv[(event_type, name)] = rv.get((event_type, name), 0.0) + entry.wall
+                if ";" in name:
+                    parent = (event_type, name.rsplit(";", 1)[0])
+                    rv[parent] = rv.get(parent, 0.0) - entry.wall
+        return {key: max(value, 0.0) for key, value in rv.items()}
+
+
+class Sample:
+    def __init__(self, root: str, project_id: int | None, event_type: str | None) -> None:
+        self.root = root
+        self.project_id = project_id
+        self.event_type = event_type
+        self.stack: list[str] = []
+        # (path, wall, cpu) of every finished stage
+        self.records: list[tuple[str, float, float]] = []
+
+
+class _State(threading.local):
+    sample: Sample | None = None
+    # Set while a unit of work runs that was not sampled, so that nested
+    # calls to `profile` don't start a sample of their own.
+    unsampled: bool = False
+
+
+_state = _State()
+_histogram = StageHistogram()
+_last_flush = time()
+_flush_lock = threading.Lock()
+
+
+def get_histogram() -> StageHistogram:
+    return _histogram
+
+
+@contextmanager
+def profile(
+    root: str, project_id: int | None = None, event_type: str | None = None
+) -> Iterator[None]:
+    """
+    Profiles a unit of work, if it is sampled. Nested in another unit of work
+    this acts like `stage`.
+    """
+    if _state.sample is not None:
+        with stage(root):
+            yield
+        return
+
+    if _state.unsampled or random.random() >= options.get("ingest.stage-profiler.sample-rate"):
+        previous, _state.unsampled = _state.unsampled, True
+        try:
+            yield
+        finally:
+            _state.unsampled = previous
+        return
+
+    sample = _state.sample = Sample(root, project_id, event_type)
+    try:
+        with stage(root):
+            yield
+    finally:
+        _state.sample = None
+        record_sample(sample)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Records the time spent in ``name`` if the current unit of work is sampled.
+    """
+    sample = _state.sample
+    if sample is None:
+        yield
+        return
+
+    sample.stack.append(name)
+    path = ";".join(sample.stack)
+    start_wall = time()
+    start_cpu = thread_time()
+    try:
+        yield
+    finally:
+        sample.records.append((path, time() - start_wall, thread_time() - start_cpu))
+        sample.stack.pop()
+
+
+def fork() -> Sample | None:
+    """
+    Returns a handle to continue the current sample in another thread with
+    `attach`, or ``None`` if the current unit of work is not sampled. Stages
+    recorded there are nested under the currently open stage.
+    """
+    sample = _state.sample
+    if sample is None:
+        return None
+    forked = Sample(sample.root, sample.project_id, sample.event_type)
+    forked.stack = list(sample.stack)
+    # Appending to a list is atomic, so all threads can record into the
+    # records of the original sample.
+    forked.records = sample.records
+    return forked
+
+
+@contextmanager
+def attach(sample: Sample | None) -> Iterator[None]:
+    """
+    Makes the sample returned by `fork` the current one of this thread.
+    """
+    if sample is None:
+        yield
+        return
+
+    previous, _state.sample = _state.sample, sample
+    try:
+        yield
+    finally:
+        _state.sample = previous
+
+
+def set_context(project_id: int | None = None, event_type: str | None = None) -> None:
+    """
+    Fills in the project and event type of the current sample once they are
+    known.
+    """
+    sample = _state.sample
+    if sample is None:
+        return
+    if project_id is not None:
+        sample.project_id = project_id
+    if event_type is not None:
+        sample.event_type = event_type
+
+
+def record_sample(sample: Sample, histogram: StageHistogram | None = None) -> None:
+    if histogram is None:
+        histogram = _histogram
+
+    event_type = sample.event_type or "unknown"
+    for path, wall, cpu in sample.records:
+        histogram.add(KIND_STAGE, event_type, path, wall, cpu)
+        if path == sample.root and sample.project_id is not None:
+            histogram.add(KIND_PROJECT, event_type, f"{sample.project_id};{path}", wall, cpu)
+
+    if histogram is _histogram:
+        maybe_flush()
+
+
+def _get_cluster():
+    return redis.redis_clusters.get(settings.SENTRY_INGEST_PROFILER_REDIS_CLUSTER)
+
+
+def _get_redis_key(timestamp: float) -> str:
+    return f"ingest-profile:{int(timestamp // 3600) * 3600}"
+
+
+def maybe_flush() -> None:
+    global _last_flush
+
+    now = time()
+    if now - _last_flush < FLUSH_INTERVAL or not _flush_lock.acquire(blocking=False):
+        return
+    try:
+        _last_flush = now
+        flush(_histogram.swap(), now)
+    except Exception:
+        logger.exception("ingest.stage_profiler.flush_failed")
+    finally:
+        _flush_lock.release()
+
+
+def flush(histogram: StageHistogram, timestamp: float) -> None:
+    """
+    Merges ``histogram`` into the Redis hash of the hour of ``timestamp``.
+    """
+    if not histogram.entries:
+        return
+
+    key = _get_redis_key(timestamp)
+    with _get_cluster().pipeline(transaction=False) as pipe:
+        for (kind, event_type, name), entry in histogram.entries.items():
+            prefix = _SEP.join((kind, event_type, name))
+            pipe.hincrby(key, f"{prefix}{_SEP}count", entry.count)
+            pipe.hincrbyfloat(key, f"{prefix}{_SEP}wall", entry.wall)
+            pipe.hincrbyfloat(key, f"{prefix}{_SEP}cpu", entry.cpu)
+            for i, value in enumerate(entry.buckets):
+                if value:
+                    pipe.hincrby(key, f"{prefix}{_SEP}b{i}", value)
+        pipe.expire(key, KEY_TTL)
+        pipe.execute()
+
+
+def load(hours: int = 1, now: float | None = None) -> StageHistogram:
+    """
+    Loads the histogram of the last ``hours`` hours from Redis.
+    """
+    if now is None:
+        now = time()
+
+    cluster = _get_cluster()
+    histogram = StageHistogram(max_keys=2**31)
+    for hour in range(hours):
+        values = cluster.hgetall(_get_redis_key(now - hour * 3600))
+        for raw_field, raw_value in values.items():
+            field_name = raw_field.decode() if isinstance(raw_field, bytes) else raw_field
+            kind, event_type, name, stat = field_name.split(_SEP)
+            entry = histogram._get_entry((kind, event_type, name))
+            if stat == "count":
+                entry.count += int(raw_value)
+            elif stat == "wall":
+                entry.wall += float(raw_value)
+            elif stat == "cpu":
+                entry.cpu += float(raw_value)
+            elif stat.startswith("b"):
+                entry.buckets[int(stat[1:])] += int(raw_value)
+    return histogram
+
+
+def format_table(
+    histogram: StageHistogram, kind: str = KIND_STAGE, limit: int | None = None
+) -> Sequence[str]:
+    """
+    Renders the entries of ``kind`` as a table, sorted by the total time
+    spent in them.
+    """
+    rows = sorted(
+        (
+            (entry.wall, event_type, name, entry)
+            for (entry_kind, event_type, name), entry in histogram.entries.items()
+            if entry_kind == kind and entry.count
+        ),
+        key=lambda row: row[0],
+        reverse=True,
+    )[:limit]
+
+    header = ("EVENT TYPE", "STAGE" if kind == KIND_STAGE else "PROJECT;ROOT")
+    header += ("COUNT", "TOTAL S", "CPU S", "MEAN MS", "P50 MS", "P95 MS", "P99 MS")
+    table = [header]
+    for _, event_type, name, entry in rows:
+        table.append(
+            (
+                event_type,
+                name,
+                str(entry.count),
+                f"{entry.wall:.2f}",
+                f"{entry.cpu:.2f}",
+                f"{entry.wall / entry.count * 1000:.1f}",
+                f"{entry.percentile(0.5) * 1000:.0f}",
+                f"{entry.percentile(0.95) * 1000:.0f}",
+                f"{entry.percentile(0.99) * 1000:.0f}",
+            )
+        )
+
+    widths = [max(len(row[i]) for row in table) for i in range(len(header))]
+    return [
+        "  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip() for row in table
+    ]
+
+
+def format_collapsed(histogram: StageHistogram) -> Sequence[str]:
+    """
+    Renders the stages in the collapsed stack format understood by
+    flamegraph.pl and speedscope, with the self time in microseconds.
+    """
+    return [
+        f"{event_type};{path} {int(self_time * 1_000_000)}"
+        for (event_type, path), self_time in sorted(histogram.get_self_times().items())
+    ]
@@ -1,8 +1,17 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Hashable, Mapping, NamedTuple
+
+from django.conf import settings
 from symbolic.sourcemap import SourceView
+from symbolic.sourcemapcache import SourceMapCache as SmCache
 
+from sentry.utils import metrics
+from sentry.utils.lru import LRUCache
 from sentry.utils.strings import codec_lookup
 
-__all__ = ["SourceCache", "SourceMapCache"]
+__all__ = ["SourceCache", "SourceMapCache", "SourceMapCacheStore", "get_sourcemap_cache_store"]
 
 
 def is_utf8(codec):
@@ -90,3 +99,70 @@ class SourceMapCache:
             sourcemap = self.get(sourcemap_url)
             return (sourcemap_url, sourcemap)
         return (None, None)
+
+
+class StoredSourceMapCache(NamedTuple):
+    sourcemap_cache: SmCache
+    # The url of the sourcemap the cache was built from, for lookups by debug id.
+    sourcemap_url: str | None
+    size: int
+
+
+class SourceMapCacheStore:
+    """
+    A process-wide store of parsed sourcemaps, shared by all events processed
+    in a process.
+
+    Parsing a sourcemap is the most expensive part of processing a JavaScript
+    event, and all events of a release need the same sourcemaps. Entries are
+    keyed by everything that determines the parsed sourcemap, see
+    `JavaScriptStacktraceProcessor`, and evicted by their size and age as
+    configured in ``SENTRY_SOURCEMAP_CACHE``.
+    """
+
+    def __init__(self, **options: Any) -> None:
+        self._cache: LRUCache[Hashable, StoredSourceMapCache] = LRUCache(
+            sizeof=lambda item: item.size, **options
+        )
+
+    def get(self, key: Hashable, kind: str) -> StoredSourceMapCache | None:
+        item = self._cache.get(key)
+        metrics.incr(
+            "sourcemaps.processor.cache_store",
+            tags={"kind": kind, "result": "hit" if item is not None else "miss"},
+            sample_rate=0.1,
+        )
+        return item
+
+    def set(
+        self, key: Hashable, sourcemap_cache: SmCache, sourcemap_url: str | None, size: int
+    ) -> None:
+        self._cache.set(key, StoredSourceMapCache(sourcemap_cache, sourcemap_url, size))
+        metrics.gauge("sourcemaps.processor.cache_store.bytes", self._cache.total_bytes)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+_store_lock = threading.Lock()
+_store: tuple[Mapping[str, Any], SourceMapCacheStore | None] | None = None
+
+
+def get_sourcemap_cache_store() -> SourceMapCacheStore | None:
+    """
+    Returns the process-wide store, or `None` if ``SENTRY_SOURCEMAP_CACHE``
+    doesn't configure one.
+    """
+    global _store
+
+    store_options = settings.SENTRY_SOURCEMAP_CACHE
+    store = _store
+    if store is None or store[0] is not store_options:
+        with _store_lock:
+            store = _store
+            if store is None or store[0] is not store_options:
+                store = _store = (
+                    store_options,
+                    SourceMapCacheStore(**store_options) if store_options else None,
+                )
+    return store[1]
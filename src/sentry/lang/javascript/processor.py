@@ -3,6 +3,7 @@ from __future__ import annotations
 import base64
 import binascii
 import errno
+import hashlib
 import logging
 import re
 import sys
@@ -25,6 +26,7 @@ from symbolic.sourcemapcache import SourceMapCache as SmCache
 
 from sentry import features, http, options
 from sentry.event_manager import set_tag
+from sentry.lang.javascript.cache import get_sourcemap_cache_store
 from sentry.models.artifactbundle import (
     NULL_STRING,
     ArtifactBundle,
@@ -1986,8 +1988,19 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
             return sourcemap_cache
 
     def _fetch_sourcemap_cache_by_debug_id(self, debug_id, minified_sourceview):
+        # The minified source and its sourcemap are both identified by the debug id, which is only
+        # valid within the project that has the artifact bundle.
+        store = get_sourcemap_cache_store()
+        store_key = ("debug_id", self.project.id, debug_id)
+        if store is not None:
+            stored = store.get(store_key, "debug_id")
+            if stored is not None:
+                self.sourcemap_debug_id_to_sourcemap_url[debug_id] = stored.sourcemap_url
+                return stored.sourcemap_cache
+
         result = self.fetcher.fetch_by_debug_id(debug_id, SourceFileType.SOURCE_MAP)
         if result is not None:
+            source = minified_sourceview.get_source().encode("utf-8")
             try:
                 with sentry_sdk.start_span(
                     op="JavaScriptStacktraceProcessor.fetch_sourcemap_view_by_debug_id.SmCache.from_bytes"
@@ -1995,16 +2008,42 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                     # We want to keep track of the sourcemap url of the sourcemap resolved with this specific debug id.
                     self.sourcemap_debug_id_to_sourcemap_url[debug_id] = result.url
                     # This is an expensive operation that should be executed as few times as possible.
-                    return SmCache.from_bytes(
-                        minified_sourceview.get_source().encode("utf-8"), result.body
-                    )
+                    sourcemap_cache = SmCache.from_bytes(source, result.body)
             except Exception as exc:
                 # This is in debug because the product shows an error already.
                 logger.debug(str(exc), exc_info=True)
                 raise UnparseableSourcemap({"debug_id": result.url})
 
+            if store is not None:
+                store.set(store_key, sourcemap_cache, result.url, len(source) + len(result.body))
+            return sourcemap_cache
+
         return None
 
+    def _get_sourcemap_cache_store_key(self, url, source, use_url_new):
+        """
+        Returns the key of the sourcemap cache built from the sourcemap at 'url' and the minified 'source' in the
+        process-wide store, or None if it must not be stored.
+        """
+        release = self.fetcher.release
+        if is_data_uri(url):
+            # The sourcemap is part of the key itself.
+            url = hashlib.sha1(force_bytes(url)).hexdigest()
+        elif release is None:
+            # Scraped sourcemaps may change at any time.
+            return None
+
+        dist = self.fetcher.dist
+        return (
+            "url",
+            self.project.id,
+            release.id if release is not None else None,
+            dist.id if dist is not None else None,
+            use_url_new,
+            url,
+            hashlib.sha1(source).hexdigest(),
+        )
+
     def _handle_url_sourcemap_lookup(self, url, use_url_new=False):
         # In case there are any fetching errors tied to the url of the minified file, we don't want to attempt the
         # construction of the sourcemap cache.
@@ -2057,6 +2096,17 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
             return sourcemap_cache
 
     def _fetch_sourcemap_cache_by_url(self, url, source=b"", use_url_new=False):
+        store = get_sourcemap_cache_store()
+        store_key = (
+            self._get_sourcemap_cache_store_key(url, source, use_url_new)
+            if store is not None
+            else None
+        )
+        if store_key is not None:
+            stored = store.get(store_key, "url")
+            if stored is not None:
+                return stored.sourcemap_cache
+
         if is_data_uri(url):
             try:
                 body = base64.b64decode(
@@ -2098,12 +2148,16 @@ class JavaScriptStacktraceProcessor(StacktraceProcessor):
                 op="JavaScriptStacktraceProcessor.fetch_sourcemap_view_by_url.SmCache.from_bytes"
             ):
                 # This is an expensive operation that should be executed as few times as possible.
-                return SmCache.from_bytes(source, body)
+                sourcemap_cache = SmCache.from_bytes(source, body)
         except Exception as exc:
             # This is in debug because the product shows an error already.
             logger.debug(str(exc), exc_info=True)
             raise UnparseableSourcemap({"url": http.expose_url(url)})
 
+        if store_key is not None:
+            store.set(store_key, sourcemap_cache, None, len(source) + len(body))
+        return sourcemap_cache
+
     def populate_source_cache(self, frames):
         """
         Fetch all sources that we know are required (being referenced directly
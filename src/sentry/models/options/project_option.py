@@ -121,6 +121,40 @@ class ProjectOptionManager(OptionManager["ProjectOption"]):
 
         return self._option_cache.get(cache_key, {})
 
+    def get_all_values_many(self, project_ids: Sequence[int]) -> Mapping[int, Mapping[str, Value]]:
+        """
+        Like `get_all_values`, but loads the options of many projects with a
+        single cache lookup and at most one query.
+        """
+        result = {}
+        missing = {}
+        for project_id in project_ids:
+            cache_key = self._make_key(project_id)
+            if cache_key in self._option_cache:
+                result[project_id] = self._option_cache[cache_key]
+            else:
+                missing[cache_key] = project_id
+
+        if missing:
+            cached = cache.get_many(list(missing))
+            for cache_key, values in cached.items():
+                if values is not None:
+                    self._option_cache[cache_key] = result[missing.pop(cache_key)] = values
+
+        if missing:
+            loaded: dict[int, dict[str, Value]] = {
+                project_id: {} for project_id in missing.values()
+            }
+            for option in self.filter(project__in=list(loaded)):
+                loaded[option.project_id][option.key] = option.value
+            cache.set_many(
+                {self._make_key(project_id): values for project_id, values in loaded.items()}
+            )
+            for project_id, values in loaded.items():
+                self._option_cache[self._make_key(project_id)] = result[project_id] = values
+
+        return result
+
     def reload_cache(self, project_id: int, update_reason: str) -> Mapping[str, Value]:
         from sentry.tasks.relay import schedule_invalidate_project_config
 
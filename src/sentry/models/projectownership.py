@@ -16,7 +16,8 @@ from sentry.models.activity import Activity
 from sentry.models.actor import ActorTuple
 from sentry.models.groupowner import OwnerRuleType
 from sentry.models.project import Project
-from sentry.ownership.grammar import Rule, load_schema, resolve_actors
+from sentry.ownership.grammar import Rule, resolve_actors
+from sentry.ownership.index import get_ownership_index
 from sentry.types.activity import ActivityType
 from sentry.utils import metrics
 from sentry.utils.cache import cache
@@ -357,14 +358,10 @@ class ProjectOwnership(Model):
         ownership: Union[ProjectOwnership, ProjectCodeOwners],
         data: Mapping[str, Any],
     ) -> Sequence[Rule]:
-        rules = []
+        if ownership.schema is None:
+            return []
 
-        if ownership.schema is not None:
-            for rule in load_schema(ownership.schema):
-                if rule.test(data):
-                    rules.append(rule)
-
-        return rules
+        return get_ownership_index(ownership.schema).matching_rules(data)
 
 
 def process_resource_change(instance, change, **kwargs):
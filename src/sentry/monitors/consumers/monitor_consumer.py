@@ -2,18 +2,24 @@ from __future__ import annotations
 
 import logging
 import uuid
+from collections import defaultdict
+from concurrent.futures import Executor, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Dict, Mapping, Optional
+from functools import partial
+from typing import Collection, Dict, List, Literal, Mapping, Optional, Set, Tuple
 
 import msgpack
 import sentry_sdk
 from arroyo.backends.kafka.consumer import KafkaPayload
 from arroyo.processing.strategies.abstract import ProcessingStrategy, ProcessingStrategyFactory
+from arroyo.processing.strategies.batching import BatchStep, ValuesBatch
 from arroyo.processing.strategies.commit import CommitOffsets
 from arroyo.processing.strategies.run_task import RunTask
 from arroyo.types import BrokerValue, Commit, Message, Partition
 from django.conf import settings
-from django.db import router, transaction
+from django.db import close_old_connections, router, transaction
+from django.db.models import Q
 from django.utils.text import slugify
 from sentry_sdk.tracing import Span, Transaction
 
@@ -65,19 +71,86 @@ INITIAL_LOCK_DELAY = 0.01
 LOCK_EXP_BASE = 2.0
 
 
+@dataclass
+class PrefetchedMonitors:
+    """
+    The monitors and monitor environments of a batch of check-ins, see
+    `prefetch_monitors`.
+    """
+
+    monitors: Dict[Tuple[int, str], Monitor]
+    monitor_environments: Dict[Tuple[int, str], MonitorEnvironment]
+
+    def get_monitor(self, project: Project, monitor_slug: str) -> Optional[Monitor]:
+        return self.monitors.get((project.id, monitor_slug))
+
+    def pop_monitor_environment(
+        self, project: Project, monitor: Monitor, environment_name: str | None
+    ) -> Optional[MonitorEnvironment]:
+        """
+        Monitor environments are only handed out once, since processing a
+        check-in updates its monitor environment in the database.
+        """
+        monitor_environment = self.monitor_environments.pop(
+            (monitor.id, environment_name or "production"), None
+        )
+        if monitor_environment is not None:
+            # Like `ensure_environment`, make sure the environment is linked
+            # to the project (this is cached).
+            monitor_environment.environment.add_project(project)
+            monitor_environment.monitor = monitor
+        return monitor_environment
+
+
+def prefetch_monitors(
+    monitor_keys: Collection[Tuple[Project, str]],
+    environment_names: Collection[str],
+) -> PrefetchedMonitors:
+    """
+    Fetches the monitors with the given project and slug, and their monitor
+    environments with the given names, with one query each.
+    """
+    slugs_by_project: Dict[Tuple[int, int], Set[str]] = defaultdict(set)
+    for project, monitor_slug in monitor_keys:
+        slugs_by_project[(project.organization_id, project.id)].add(monitor_slug)
+
+    query = Q()
+    for (organization_id, project_id), monitor_slugs in slugs_by_project.items():
+        query |= Q(organization_id=organization_id, project_id=project_id, slug__in=monitor_slugs)
+
+    if not query:
+        return PrefetchedMonitors(monitors={}, monitor_environments={})
+
+    monitors = {
+        (monitor.project_id, monitor.slug): monitor for monitor in Monitor.objects.filter(query)
+    }
+    monitor_environments: Dict[Tuple[int, str], MonitorEnvironment] = {}
+    if monitors:
+        for monitor_environment in MonitorEnvironment.objects.filter(
+            monitor_id__in=[monitor.id for monitor in monitors.values()],
+            environment__name__in=environment_names,
+        ).select_related("environment"):
+            key = (monitor_environment.monitor_id, monitor_environment.environment.name)
+            monitor_environments[key] = monitor_environment
+
+    return PrefetchedMonitors(monitors=monitors, monitor_environments=monitor_environments)
+
+
 def _ensure_monitor_with_config(
     project: Project,
     monitor_slug: str,
     config: Optional[Dict],
+    monitor: Optional[Monitor] = None,
 ):
-    try:
-        monitor = Monitor.objects.get(
-            slug=monitor_slug,
-            project_id=project.id,
-            organization_id=project.organization_id,
-        )
-    except Monitor.DoesNotExist:
-        monitor = None
+    if monitor is None:
+        try:
+            monitor = Monitor.objects.get(
+                slug=monitor_slug,
+                project_id=project.id,
+                organization_id=project.organization_id,
+            )
+        except Monitor.DoesNotExist:
+            pass
 
     if not config:
         return monitor
@@ -141,6 +214,30 @@ def check_killswitch(
     return is_blocked
 
 
+def _get_ratelimit_key(project: Project, monitor_slug: str, environment: str | None) -> str:
+    return f"monitor-checkins:{project.organization_id}:{monitor_slug}:{environment}"
+
+
+def _record_ratelimited(
+    metric_kwargs: Dict,
+    project: Project,
+    monitor_slug: str,
+    environment: str | None,
+):
+    metrics.incr(
+        "monitors.checkin.dropped.ratelimited",
+        tags={**metric_kwargs},
+    )
+    logger.info(
+        "monitors.consumer.rate_limited",
+        extra={
+            "organization_id": project.organization_id,
+            "slug": monitor_slug,
+            "environment": environment,
+        },
+    )
+
+
 def check_ratelimit(
     metric_kwargs: Dict,
     project: Project,
@@ -150,27 +247,14 @@ def check_ratelimit(
     """
     Enforce check-in rate limits. Returns True if rate limit is enforced.
     """
-    ratelimit_key = f"{project.organization_id}:{monitor_slug}:{environment}"
-
     is_blocked = ratelimits.is_limited(
-        f"monitor-checkins:{ratelimit_key}",
+        _get_ratelimit_key(project, monitor_slug, environment),
         limit=CHECKIN_QUOTA_LIMIT,
         window=CHECKIN_QUOTA_WINDOW,
     )
 
     if is_blocked:
-        metrics.incr(
-            "monitors.checkin.dropped.ratelimited",
-            tags={**metric_kwargs},
-        )
-        logger.info(
-            "monitors.consumer.rate_limited",
-            extra={
-                "organization_id": project.organization_id,
-                "slug": monitor_slug,
-                "environment": environment,
-            },
-        )
+        _record_ratelimited(metric_kwargs, project, monitor_slug, environment)
     return is_blocked
 
 
@@ -219,6 +303,20 @@ def transform_checkin_uuid(
     return check_in_guid, use_latest_checkin
 
 
+def _normalize_monitor_slug(monitor_slug: str) -> str:
+    return slugify(monitor_slug)[:MAX_SLUG_LENGTH].strip("-")
+
+
+def _get_metric_kwargs(source_sdk: str) -> Dict:
+    # Strip sdk version to reduce metric cardinality
+    sdk_platform = source_sdk.split("/")[0] if source_sdk else "none"
+
+    return {
+        "source": "consumer",
+        "sdk_platform": sdk_platform,
+    }
+
+
 def _process_checkin(
     params: CheckinPayload,
     start_time: datetime,
@@ -226,18 +324,12 @@ def _process_checkin(
     source_sdk: str,
     txn: Transaction | Span,
 ):
-    monitor_slug = slugify(params["monitor_slug"])[:MAX_SLUG_LENGTH].strip("-")
+    monitor_slug = _normalize_monitor_slug(params["monitor_slug"])
 
     environment = params.get("environment")
     project = Project.objects.get_from_cache(id=project_id)
 
-    # Strip sdk version to reduce metric cardinality
-    sdk_platform = source_sdk.split("/")[0] if source_sdk else "none"
-
-    metric_kwargs = {
-        "source": "consumer",
-        "sdk_platform": sdk_platform,
-    }
+    metric_kwargs = _get_metric_kwargs(source_sdk)
 
     if check_killswitch(metric_kwargs, project, monitor_slug):
         return
@@ -245,6 +337,26 @@ def _process_checkin(
     if check_ratelimit(metric_kwargs, project, monitor_slug, environment):
         return
 
+    _upsert_checkin(params, start_time, project, monitor_slug, metric_kwargs, txn)
+
+
+def _upsert_checkin(
+    params: CheckinPayload,
+    start_time: datetime,
+    project: Project,
+    monitor_slug: str,
+    metric_kwargs: Dict,
+    txn: Transaction | Span,
+    prefetched: Optional[PrefetchedMonitors] = None,
+):
+    """
+    Creates or updates the check-in of a check-in message which made it past
+    the killswitch and rate limits. The monitor and monitor environment are
+    taken from ``prefetched`` when they are part of it.
+    """
+    project_id = project.id
+    environment = params.get("environment")
+
     guid, use_latest_checkin = transform_checkin_uuid(
         txn,
         metric_kwargs,
@@ -374,6 +486,7 @@ def _process_checkin(
             project,
             monitor_slug,
             monitor_config,
+            monitor=prefetched.get_monitor(project, monitor_slug) if prefetched else None,
         )
     except MonitorLimitsExceeded:
         metrics.incr(
@@ -402,9 +515,13 @@ def _process_checkin(
     # 02
     # Retrieve or upsert monitor environment for this check-in
     try:
-        monitor_environment = MonitorEnvironment.objects.ensure_environment(
-            project, monitor, environment
-        )
+        monitor_environment = None
+        if prefetched is not None:
+            monitor_environment = prefetched.pop_monitor_environment(project, monitor, environment)
+        if monitor_environment is None:
+            monitor_environment = MonitorEnvironment.objects.ensure_environment(
+                project, monitor, environment
+            )
     except MonitorEnvironmentLimitsExceeded:
         metrics.incr(
             "monitors.checkin.result",
@@ -606,12 +723,204 @@ def _process_message(
         _process_checkin(params, start_time, project_id, source_sdk, txn)
 
 
+@dataclass
+class CheckinItem:
+    """
+    A decoded check-in message of a batch.
+    """
+
+    params: CheckinPayload
+    start_time: datetime
+    project_id: int
+    monitor_slug: str
+    metric_kwargs: Dict
+
+
+def _decode_checkin_item(wrapper: CheckinMessage) -> CheckinItem:
+    params: CheckinPayload = json.loads(wrapper["payload"])
+    return CheckinItem(
+        params=params,
+        start_time=to_datetime(float(wrapper["start_time"])),
+        project_id=int(wrapper["project_id"]),
+        monitor_slug=_normalize_monitor_slug(params["monitor_slug"]),
+        metric_kwargs=_get_metric_kwargs(wrapper["sdk"]),
+    )
+
+
+def _process_checkin_group(
+    checkins: List[Tuple[CheckinItem, Project]],
+    prefetched: PrefetchedMonitors,
+) -> None:
+    for item, project in checkins:
+        try:
+            with sentry_sdk.start_transaction(
+                op="_process_message",
+                name="monitors.monitor_consumer",
+            ) as txn:
+                _upsert_checkin(
+                    item.params,
+                    item.start_time,
+                    project,
+                    item.monitor_slug,
+                    item.metric_kwargs,
+                    txn,
+                    prefetched=prefetched,
+                )
+        except Exception:
+            logger.exception("Failed to process message payload")
+
+
+def _process_checkin_group_in_thread(
+    checkins: List[Tuple[CheckinItem, Project]],
+    prefetched: PrefetchedMonitors,
+) -> None:
+    # Pool threads keep their database connection between batches, make sure
+    # we don't hold on to one that has been closed or outlived its max age.
+    close_old_connections()
+    _process_checkin_group(checkins, prefetched)
+
+
+def process_batch(executor: Executor, message: Message[ValuesBatch[KafkaPayload]]) -> None:
+    """
+    Processes a batch of check-in messages.
+
+    Check-ins are grouped by monitor (project and monitor slug). The check-ins
+    of a monitor are processed one after the other in the order they were
+    consumed, while unrelated monitors are processed in parallel on
+    ``executor``. The projects, monitors and monitor environments of the batch
+    are fetched up front, and the rate limits of all check-ins are checked in
+    a single round trip.
+
+    The monitor tasks are triggered once all check-ins of the batch have been
+    processed.
+    """
+    latest_partition_ts: Dict[int, datetime] = {}
+    items: List[CheckinItem] = []
+
+    for value in message.payload:
+        assert isinstance(value, BrokerValue)
+        partition = value.partition.index
+        if partition not in latest_partition_ts or latest_partition_ts[partition] < value.timestamp:
+            latest_partition_ts[partition] = value.timestamp
+
+        try:
+            wrapper = msgpack.unpackb(value.payload.value)
+            # Relay does not attach a message type, see `_process_message`.
+            if wrapper.get("message_type", "check_in") == "clock_pulse":
+                continue
+            items.append(_decode_checkin_item(wrapper))
+        except Exception:
+            logger.exception("Failed to process message payload")
+
+    projects = {
+        project.id: project
+        for project in Project.objects.get_many_from_cache({item.project_id for item in items})
+    }
+
+    allowed: List[Tuple[CheckinItem, Project]] = []
+    for item in items:
+        project = projects.get(item.project_id)
+        if project is None:
+            logger.error(
+                "monitors.consumer.project_does_not_exist",
+                extra={"project_id": item.project_id, "slug": item.monitor_slug},
+            )
+            continue
+        if check_killswitch(item.metric_kwargs, project, item.monitor_slug):
+            continue
+        allowed.append((item, project))
+
+    is_limited = ratelimits.is_limited_many(
+        [
+            _get_ratelimit_key(project, item.monitor_slug, item.params.get("environment"))
+            for item, project in allowed
+        ],
+        limit=CHECKIN_QUOTA_LIMIT,
+        window=CHECKIN_QUOTA_WINDOW,
+    )
+
+    groups: Dict[Tuple[int, str], List[Tuple[CheckinItem, Project]]] = defaultdict(list)
+    for (item, project), limited in zip(allowed, is_limited):
+        if limited:
+            _record_ratelimited(
+                item.metric_kwargs, project, item.monitor_slug, item.params.get("environment")
+            )
+            continue
+        groups[(project.id, item.monitor_slug)].append((item, project))
+
+    metrics.timing("monitors.checkin.parallel_batch_groups", len(groups))
+
+    if groups:
+        monitor_keys = [
+            (checkins[0][1], monitor_slug) for (_, monitor_slug), checkins in groups.items()
+        ]
+        environment_names = {
+            item.params.get("environment") or "production"
+            for checkins in groups.values()
+            for item, _ in checkins
+        }
+        prefetched = prefetch_monitors(monitor_keys, environment_names)
+        futures = [
+            executor.submit(partial(_process_checkin_group_in_thread, checkins, prefetched))
+            for checkins in groups.values()
+        ]
+        wait(futures)
+
+    for partition, ts in latest_partition_ts.items():
+        try:
+            try_monitor_tasks_trigger(ts, partition)
+        except Exception:
+            logger.exception("Failed to trigger monitor tasks", exc_info=True)
+
+
 class StoreMonitorCheckInStrategyFactory(ProcessingStrategyFactory[KafkaPayload]):
+    """
+    Processes check-ins one by one in the consumer thread (``serial``), or in
+    batches where unrelated monitors are processed in parallel threads
+    (``parallel``, see `process_batch`).
+    """
+
+    def __init__(
+        self,
+        mode: Literal["serial", "parallel"] = "serial",
+        max_batch_size: int = 500,
+        max_batch_time: int = 1,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        self.mode = mode
+        self.max_batch_size = max_batch_size
+        self.max_batch_time = max_batch_time
+
+        self.executor: Optional[Executor] = None
+        if mode == "parallel":
+            self.executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="monitors-consumer"
+            )
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def create_parallel_worker(self, commit: Commit) -> ProcessingStrategy[KafkaPayload]:
+        assert self.executor is not None
+        batch_processor = RunTask(
+            function=partial(process_batch, self.executor),
+            next_step=CommitOffsets(commit),
+        )
+        return BatchStep(
+            max_batch_size=self.max_batch_size,
+            max_batch_time=self.max_batch_time,
+            next_step=batch_processor,
+        )
+
     def create_with_partitions(
         self,
         commit: Commit,
         partitions: Mapping[Partition, int],
     ) -> ProcessingStrategy[KafkaPayload]:
+        if self.mode == "parallel":
+            return self.create_parallel_worker(commit)
+
         def process_message(message: Message[KafkaPayload]) -> None:
             assert isinstance(message.value, BrokerValue)
             try:
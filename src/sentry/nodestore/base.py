@@ -1,12 +1,17 @@
 from __future__ import annotations
 
-from threading import local
+from threading import Lock, local
+from typing import Any
+from weakref import WeakKeyDictionary
 
 import sentry_sdk
+from django.conf import settings
 from django.core.cache import InvalidCacheBackendError, caches
 
-from sentry.utils import json
+from sentry.nodestore.dictionaries import get_registry
+from sentry.utils import json, metrics
 from sentry.utils.cache import memoize
+from sentry.utils.lru import LRUCache
 from sentry.utils.services import Service
 
 # Cache an instance of the encoder we want to use
@@ -24,6 +29,14 @@ json_dumps = json.JSONEncoder(
 
 json_loads = json.loads
 
+# Local caches per `NodeStorage` instance. They are kept outside of the
+# instances because those are thread-local, while a local cache is shared by
+# all threads of a process.
+_local_caches_lock = Lock()
+_local_caches: WeakKeyDictionary[NodeStorage, tuple[Any, LRUCache[str, bytes] | None]] = (
+    WeakKeyDictionary()
+)
+
 
 class NodeStorage(local, Service):
     """
@@ -69,6 +82,7 @@ class NodeStorage(local, Service):
         "set",
         "set_bytes",
         "set_subkeys",
+        "set_subkeys_multi",
         "cleanup",
         "validate",
         "bootstrap",
@@ -92,10 +106,25 @@ class NodeStorage(local, Service):
         for id in id_list:
             self.delete(id)
 
+    def _compress(self, value, platform):
+        """
+        Compresses an encoded payload with the trained dictionary for
+        ``platform``. This is a no-op unless dictionaries are configured
+        through ``SENTRY_NODESTORE_DICTIONARY_DIR``.
+        """
+        registry = get_registry()
+        if not registry:
+            return value
+        return registry.compress(value, platform)
+
+    def _decompress(self, value):
+        return get_registry().decompress(value)
+
     def _decode(self, value, subkey):
         if value is None:
             return None
 
+        value = self._decompress(value)
         lines_iter = iter(value.splitlines())
         try:
             if subkey is not None:
@@ -121,7 +150,7 @@ class NodeStorage(local, Service):
         >>> nodestore._get_bytes('key1')
         b'{"message": "hello world"}'
         """
-        return self._get_bytes(id)
+        return self._get_bytes_local_cached(id)
 
     def _get_bytes(self, id):
         raise NotImplementedError
@@ -133,21 +162,29 @@ class NodeStorage(local, Service):
         """
         with sentry_sdk.start_span(op="nodestore.get") as span:
             span.set_tag("node_id", id)
-            if subkey is None:
-                item_from_cache = self._get_cache_item(id)
-                if item_from_cache:
-                    span.set_tag("origin", "from_cache")
-                    span.set_tag("found", bool(item_from_cache))
-                    return item_from_cache
+            bytes_data = self._get_local_cache_items([id]).get(id)
+            if bytes_data is None:
+                if subkey is None:
+                    item_from_cache = self._get_cache_item(id)
+                    if item_from_cache:
+                        span.set_tag("origin", "from_cache")
+                        span.set_tag("found", bool(item_from_cache))
+                        return item_from_cache
+
+                bytes_data = self._get_bytes(id)
+                self._set_local_cache_items({id: bytes_data})
+                span.set_tag("result", "from_service")
+                from_service = True
+            else:
+                span.set_tag("result", "from_local_cache")
+                from_service = False
 
             span.set_tag("subkey", str(subkey))
-            bytes_data = self._get_bytes(id)
             rv = self._decode(bytes_data, subkey=subkey)
-            if subkey is None:
+            if subkey is None and from_service:
                 # set cache item only after we know decoding did not fail
                 self._set_cache_item(id, rv)
 
-            span.set_tag("result", "from_service")
             if bytes_data:
                 span.set_tag("bytes.size", len(bytes_data))
             span.set_tag("found", bool(rv))
@@ -176,25 +213,26 @@ class NodeStorage(local, Service):
             span.set_tag("subkey", str(subkey))
             span.set_tag("num_ids", len(id_list))
 
-            if subkey is None:
-                cache_items = self._get_cache_items(id_list)
-                if len(cache_items) == len(id_list):
-                    span.set_tag("result", "from_cache")
-                    return cache_items
+            bytes_items = self._get_local_cache_items(id_list)
+            missing_ids = [id for id in id_list if id not in bytes_items]
 
-                uncached_ids = [id for id in id_list if id not in cache_items]
-            else:
-                uncached_ids = id_list
+            cache_items = {}
+            if subkey is None and missing_ids:
+                cache_items = self._get_cache_items(missing_ids)
+                missing_ids = [id for id in missing_ids if id not in cache_items]
 
-            items = {
-                id: self._decode(value, subkey=subkey)
-                for id, value in self._get_bytes_multi(uncached_ids).items()
-            }
+            fetched = {}
+            if missing_ids:
+                fetched = self._get_bytes_multi(missing_ids)
+                self._set_local_cache_items(fetched)
+                bytes_items.update(fetched)
+
+            items = {id: self._decode(value, subkey=subkey) for id, value in bytes_items.items()}
             if subkey is None:
-                self._set_cache_items(items)
+                self._set_cache_items({id: items[id] for id in fetched})
                 items.update(cache_items)
 
-            span.set_tag("result", "from_service")
+            span.set_tag("result", "from_service" if missing_ids else "from_cache")
             span.set_tag("found", len(items))
 
             return items
@@ -219,7 +257,9 @@ class NodeStorage(local, Service):
         """
         >>> nodestore.set_bytes('key1', b"{'foo': 'bar'}")
         """
-        return self._set_bytes(id, data, ttl)
+        rv = self._set_bytes(id, data, ttl)
+        self._set_local_cache_item(id, data)
+        return rv
 
     def _set_bytes(self, id, data, ttl=None):
         raise NotImplementedError
@@ -252,10 +292,44 @@ class NodeStorage(local, Service):
             span.set_tag("node_id", id)
             span.set_data("subkeys_count", len(data))
             cache_item = data.get(None)
-            bytes_data = self._encode(data)
+            platform = cache_item.get("platform") if isinstance(cache_item, dict) else None
+            bytes_data = self._compress(self._encode(data), platform)
             self._set_bytes(id, bytes_data, ttl=ttl)
             # set cache only after encoding and write to nodestore has succeeded
             self._set_cache_item(id, cache_item)
+            self._set_local_cache_item(id, bytes_data)
+
+    def _set_bytes_multi(self, items, ttl=None):
+        """
+        >>> nodestore._set_bytes_multi({'key1': b"{'foo': 'bar'}"})
+        """
+        for id, data in items.items():
+            self._set_bytes(id, data, ttl)
+
+    def set_subkeys_multi(self, items, ttl=None):
+        """
+        Set values and subkeys for multiple ids at once, see `set_subkeys`.
+        Backends may write all of them in a single batch.
+
+        >>> nodestore.set_subkeys_multi({
+        ...    'key1': {None: {'foo': 'bar'}},
+        ...    'key2': {None: {'foo': 'baz'}, "reprocessing": {'foo': 'bam'}},
+        ... })
+        """
+        with sentry_sdk.start_span(op="nodestore", description="set_subkeys_multi") as span:
+            span.set_data("num_ids", len(items))
+            cache_items = {}
+            bytes_items = {}
+            for id, data in items.items():
+                cache_items[id] = cache_item = data.get(None)
+                platform = cache_item.get("platform") if isinstance(cache_item, dict) else None
+                bytes_items[id] = self._compress(self._encode(data), platform)
+
+            self._set_bytes_multi(bytes_items, ttl=ttl)
+            # set cache only after encoding and write to nodestore has succeeded
+            for id, bytes_data in bytes_items.items():
+                self._set_cache_item(id, cache_items[id])
+                self._set_local_cache_item(id, bytes_data)
 
     def cleanup(self, cutoff_timestamp):
         raise NotImplementedError
@@ -281,13 +355,70 @@ class NodeStorage(local, Service):
             self.cache.set_many(items)
 
     def _delete_cache_item(self, id):
+        local_cache = self._get_local_cache()
+        if local_cache is not None:
+            local_cache.delete(id)
         if self.cache:
             self.cache.delete(id)
 
     def _delete_cache_items(self, id_list):
+        local_cache = self._get_local_cache()
+        if local_cache is not None:
+            local_cache.delete_many(id_list)
         if self.cache:
             self.cache.delete_many([id for id in id_list])
 
+    def _get_local_cache(self) -> LRUCache[str, bytes] | None:
+        """
+        Returns the LRU of encoded node payloads of this backend configured
+        through ``SENTRY_NODESTORE_LOCAL_CACHE``, or ``None`` if it is disabled.
+
+        It is checked before ``self.cache``. Writes and deletes only update the
+        LRU of the current process, other processes keep serving what they
+        have cached until it expires or is evicted. Configure a short ``ttl``
+        unless nodes are never rewritten after they have been read.
+        """
+        options = settings.SENTRY_NODESTORE_LOCAL_CACHE
+        local_cache = _local_caches.get(self)
+        if local_cache is None or local_cache[0] is not options:
+            with _local_caches_lock:
+                local_cache = _local_caches.get(self)
+                if local_cache is None or local_cache[0] is not options:
+                    local_cache = (options, LRUCache(**options) if options else None)
+                    _local_caches[self] = local_cache
+        return local_cache[1]
+
+    def _set_local_cache_item(self, id, data):
+        local_cache = self._get_local_cache()
+        if local_cache is not None:
+            if data:
+                local_cache.set(id, data)
+            else:
+                local_cache.delete(id)
+
+    def _get_local_cache_items(self, id_list):
+        local_cache = self._get_local_cache()
+        if local_cache is None:
+            return {}
+
+        items = local_cache.get_many(id_list)
+        metrics.incr("nodestore.local_cache.hit", amount=len(items))
+        metrics.incr("nodestore.local_cache.miss", amount=len(id_list) - len(items))
+        return items
+
+    def _set_local_cache_items(self, items):
+        local_cache = self._get_local_cache()
+        if local_cache is not None:
+            local_cache.set_many({id: data for id, data in items.items() if data})
+            metrics.gauge("nodestore.local_cache.bytes", local_cache.total_bytes)
+
+    def _get_bytes_local_cached(self, id):
+        data = self._get_local_cache_items([id]).get(id)
+        if data is None:
+            data = self._get_bytes(id)
+            self._set_local_cache_items({id: data})
+        return data
+
     @memoize
     def cache(self):
         try:
@@ -0,0 +1,136 @@
+"""
+Trained zstd dictionaries for nodestore payloads.
+
+Events from the same platform share most of their structure (SDK info,
+contexts, module lists, ...), which a trained dictionary captures far better
+than generic compression of each payload can. Dictionaries are stored as files
+named ``<platform>-<version>.zdict`` in ``SENTRY_NODESTORE_DICTIONARY_DIR``.
+New payloads are compressed with the highest version available for their
+platform, while every dictionary in the directory stays available for
+decoding, so older payloads keep working after a new version is trained.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+import zlib
+from typing import Iterable
+
+import zstandard
+from django.conf import settings
+
+from sentry.utils.codecs import ZstdDictCodec
+
+DEFAULT_PLATFORM = "other"
+
+DICTIONARY_SUFFIX = ".zdict"
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+_filename_re = re.compile(r"^(?P<platform>[a-z0-9_.-]+)-(?P<version>\d+)\.zdict$")
+
+
+def get_dictionary_id(platform: str, version: int) -> int:
+    """
+    Returns a stable dictionary ID for ``platform`` and ``version``. IDs
+    below 32768 and above 2**31 are reserved by zstd.
+    """
+    return 32768 + zlib.crc32(f"{platform}:{version}".encode()) % (2**31 - 32768)
+
+
+def get_dictionary_filename(platform: str, version: int) -> str:
+    return f"{platform}-{version}{DICTIONARY_SUFFIX}"
+
+
+class DictionaryRegistry:
+    """
+    Holds the dictionaries found in ``path`` and hands out codecs for them.
+    """
+
+    def __init__(self, path: str | None, level: int = 3) -> None:
+        self.path = path
+        self.level = level
+        # platform -> (version, dictionary)
+        self.latest: dict[str, tuple[int, zstandard.ZstdCompressionDict]] = {}
+        self.dictionaries: list[zstandard.ZstdCompressionDict] = []
+
+        if path and os.path.isdir(path):
+            for filename in sorted(os.listdir(path)):
+                match = _filename_re.match(filename)
+                if match is None:
+                    continue
+                platform = match.group("platform")
+                version = int(match.group("version"))
+                with open(os.path.join(path, filename), "rb") as f:
+                    dictionary = zstandard.ZstdCompressionDict(f.read())
+                self.dictionaries.append(dictionary)
+                if platform not in self.latest or self.latest[platform][0] < version:
+                    self.latest[platform] = (version, dictionary)
+
+        self._codecs: dict[str | None, ZstdDictCodec] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.dictionaries)
+
+    def get_latest_version(self, platform: str) -> int | None:
+        latest = self.latest.get(platform)
+        return latest[0] if latest is not None else None
+
+    def get_codec(self, platform: str | None) -> ZstdDictCodec:
+        """
+        Returns the codec used to compress payloads of ``platform``, falling
+        back to the generic dictionary (if any) for unknown platforms.
+        """
+        codec = self._codecs.get(platform)
+        if codec is None:
+            latest = self.latest.get(platform or DEFAULT_PLATFORM) or self.latest.get(
+                DEFAULT_PLATFORM
+            )
+            codec = self._codecs[platform] = ZstdDictCodec(
+                dictionary=latest[1] if latest is not None else None,
+                dictionaries=self.dictionaries,
+                level=self.level,
+            )
+        return codec
+
+    def compress(self, value: bytes, platform: str | None) -> bytes:
+        return self.get_codec(platform).encode(value)
+
+    def decompress(self, value: bytes) -> bytes:
+        """
+        Decompresses ``value`` if it is a zstd frame and returns it unchanged
+        otherwise.
+        """
+        if not value.startswith(ZSTD_MAGIC):
+            return value
+        return self.get_codec(None).decode(value)
+
+
+_registry_lock = threading.Lock()
+_registry: DictionaryRegistry | None = None
+
+
+def get_registry() -> DictionaryRegistry:
+    global _registry
+
+    path = settings.SENTRY_NODESTORE_DICTIONARY_DIR
+    registry = _registry
+    if registry is None or registry.path != path:
+        with _registry_lock:
+            registry = _registry
+            if registry is None or registry.path != path:
+                registry = _registry = DictionaryRegistry(path)
+    return registry
+
+
+def train_dictionary(
+    samples: Iterable[bytes], platform: str, version: int, dict_size: int = 110 * 1024
+) -> zstandard.ZstdCompressionDict:
+    """
+    Trains a dictionary for ``platform`` from encoded nodestore payloads.
+    """
+    return zstandard.train_dictionary(
+        dict_size, list(samples), dict_id=get_dictionary_id(platform, version)
+    )
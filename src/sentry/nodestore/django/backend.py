@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import base64
 import logging
 import math
 import pickle
@@ -8,12 +9,39 @@ from django.utils import timezone
 
 from sentry.db.models import create_or_update
 from sentry.nodestore.base import NodeStorage
+from sentry.nodestore.dictionaries import ZSTD_MAGIC
 from sentry.utils.strings import compress, decompress
 
 from .models import Node
 
 logger = logging.getLogger("sentry")
 
+# Marks payloads that are stored base64 encoded but not zlib-compressed. The
+# prefix is not part of the base64 alphabet, so it cannot clash with the
+# output of ``compress``.
+RAW_PREFIX = "raw:"
+
+
+def _is_compressed(data: bytes) -> bool:
+    if data.startswith(ZSTD_MAGIC):
+        return True
+    # zlib header: deflate method in the low nibble and a checksum over the
+    # first two bytes. Neither JSON nor pickle payloads start like this.
+    return len(data) >= 2 and data[0] & 0x0F == 8 and (data[0] << 8 | data[1]) % 31 == 0
+
+
+def _encode_data(data: bytes) -> str:
+    # Compressing a payload that is compressed already only costs CPU.
+    if _is_compressed(data):
+        return RAW_PREFIX + base64.b64encode(data).decode("utf-8")
+    return compress(data)
+
+
+def _decode_data(data: str) -> bytes:
+    if data.startswith(RAW_PREFIX):
+        return base64.b64decode(data[len(RAW_PREFIX) :])
+    return decompress(data)
+
 
 class DjangoNodeStorage(NodeStorage):
     def delete(self, id):
@@ -25,6 +53,7 @@ class DjangoNodeStorage(NodeStorage):
             return None
 
         try:
+            value = self._decompress(value)
             if value.startswith(b"{"):
                 return NodeStorage._decode(self, value, subkey=subkey)
 
@@ -39,19 +68,21 @@ class DjangoNodeStorage(NodeStorage):
     def _get_bytes(self, id):
         try:
             data = Node.objects.get(id=id).data
-            return decompress(data)
+            return _decode_data(data)
         except Node.DoesNotExist:
             return None
 
     def _get_bytes_multi(self, id_list: list[str]) -> dict[str, bytes | None]:
-        return {n.id: decompress(n.data) for n in Node.objects.filter(id__in=id_list)}
+        return {n.id: _decode_data(n.data) for n in Node.objects.filter(id__in=id_list)}
 
     def delete_multi(self, id_list):
         Node.objects.filter(id__in=id_list).delete()
         self._delete_cache_items(id_list)
 
     def _set_bytes(self, id, data, ttl=None):
-        create_or_update(Node, id=id, values={"data": compress(data), "timestamp": timezone.now()})
+        create_or_update(
+            Node, id=id, values={"data": _encode_data(data), "timestamp": timezone.now()}
+        )
 
     def cleanup(self, cutoff_timestamp):
         from sentry.db.deletion import BulkDeleteQuery
@@ -62,6 +93,9 @@ class DjangoNodeStorage(NodeStorage):
         BulkDeleteQuery(model=Node, dtfield="timestamp", days=days).execute()
         if self.cache:
             self.cache.clear()
+        local_cache = self._get_local_cache()
+        if local_cache is not None:
+            local_cache.clear()
 
     def bootstrap(self):
         # Nothing for Django backend to do during bootstrap
@@ -501,6 +501,12 @@ register("snuba.search.max-chunk-size", default=2000, flags=FLAG_AUTOMATOR_MODIF
 register("snuba.search.max-total-chunk-time-seconds", default=30.0, flags=FLAG_AUTOMATOR_MODIFIABLE)
 register("snuba.search.hits-sample-size", default=100, flags=FLAG_AUTOMATOR_MODIFIABLE)
 register("snuba.track-outcomes-sample-rate", default=0.0, flags=FLAG_AUTOMATOR_MODIFIABLE)
+# Cache TTLs in seconds by referrer. Queries of the listed referrers are
+# cached even if the caller did not ask for it.
+register("snuba.query-cache.referrer-ttls", type=Dict, default={}, flags=FLAG_AUTOMATOR_MODIFIABLE)
+# For how many seconds cached results are served after they expired, while
+# they are refreshed in the background.
+register("snuba.query-cache.stale-ttl", default=0, flags=FLAG_AUTOMATOR_MODIFIABLE)
 
 # The percentage of tagkeys that we want to cache. Set to 1.0 in order to cache everything, <=0.0 to stop caching
 register(
@@ -617,6 +623,14 @@ register(
     "post-process.error-hook-sample-rate", default=0.0, flags=FLAG_AUTOMATOR_MODIFIABLE
 )  # unused
 
+# From 0.0 to 1.0: Sample rate of events whose per-stage latencies are recorded
+# by `sentry.ingest.profiler`
+register("ingest.stage-profiler.sample-rate", default=0.0, flags=FLAG_AUTOMATOR_MODIFIABLE)
+
+# From 0.0 to 1.0: Randomly run the read-only steps of the post process pipeline
+# concurrently
+register("post-process.concurrent-pipeline.rollout", default=0.0, flags=FLAG_AUTOMATOR_MODIFIABLE)
+
 # Transaction events
 # True => kill switch to disable ingestion of transaction events for internal project.
 register(
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+from typing import Any, Callable, Iterable, List, Mapping, MutableSet, Optional, Sequence, Tuple
+
+from sentry.ownership.grammar import CODEOWNERS, MODULE, PATH, Matcher, Rule, load_schema
+from sentry.utils import json
+from sentry.utils.codeowners import codeowners_match
+from sentry.utils.event_frames import find_stack_frames
+from sentry.utils.glob import glob_match
+from sentry.utils.hashlib import md5_text
+from sentry.utils.lru import LRUCache
+from sentry.utils.safe import PathSearchable
+
+__all__ = ("OwnershipIndex", "get_ownership_index")
+
+# Number of compiled schemas kept per process.
+INDEX_CACHE_SIZE = 1000
+
+_index_cache: LRUCache[str, OwnershipIndex] = LRUCache(max_size=INDEX_CACHE_SIZE)
+
+# Characters which make a pattern segment something else than a literal.
+_SPECIAL_CHARS_RE = re.compile(r"[\[\]{}!\\]")
+_SEGMENT_SEPARATOR_RE = re.compile(r"[*?/]")
+
+
+def _glob_match_frame_value(value: Optional[str], pattern: str) -> bool:
+    return bool(glob_match(value, pattern, ignorecase=True, path_normalize=True))
+
+
+def _codeowners_match_frame_value(value: Optional[str], pattern: str) -> bool:
+    return bool(codeowners_match(value, pattern))
+
+
+def _required_segment(pattern: str) -> Optional[str]:
+    """
+    Returns a lowercased literal which is part of every path the pattern can
+    match, or ``None`` if there is no such literal.
+
+    Only whole path segments (without wildcards) are considered, since path
+    normalization and ``**`` may add or remove slashes around them.
+    """
+    if not pattern.isascii() or _SPECIAL_CHARS_RE.search(pattern):
+        return None
+    segments = [
+        segment
+        for segment in _SEGMENT_SEPARATOR_RE.split(pattern.lower())
+        if segment not in ("", ".", "..")
+    ]
+    if not segments:
+        return None
+    return max(segments, key=len)
+
+
+class _FrameRuleGroup:
+    """
+    Rules of one matcher type which are tested against values of stack frames.
+
+    Rules are grouped by a literal that a value has to contain to match them,
+    so for every value only the rules of the literals it contains are tested
+    with the (expensive) matching function.
+    """
+
+    def __init__(self, match_frame_value_func: Callable[[Optional[str], str], bool]) -> None:
+        self.match_frame_value_func = match_frame_value_func
+        self.by_segment: Mapping[str, List[Tuple[int, str]]] = defaultdict(list)
+        self.unfiltered: List[Tuple[int, str]] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.by_segment or self.unfiltered)
+
+    def add(self, index: int, pattern: str) -> None:
+        segment = _required_segment(pattern)
+        if segment is None:
+            self.unfiltered.append((index, pattern))
+        else:
+            self.by_segment[segment].append((index, pattern))
+
+    def match(self, values: Iterable[Any], matched: MutableSet[int]) -> None:
+        for value in values:
+            if isinstance(value, str) and value.isascii():
+                normalized = value.lower().replace("\\", "/")
+                for segment, rules in self.by_segment.items():
+                    if segment in normalized:
+                        self._match_rules(value, rules, matched)
+            else:
+                for rules in self.by_segment.values():
+                    self._match_rules(value, rules, matched)
+            self._match_rules(value, self.unfiltered, matched)
+
+    def _match_rules(
+        self, value: Any, rules: Sequence[Tuple[int, str]], matched: MutableSet[int]
+    ) -> None:
+        for index, pattern in rules:
+            if index not in matched and self.match_frame_value_func(value, pattern):
+                matched.add(index)
+
+
+def _frame_values(frames: Sequence[Any], keys: Sequence[str]) -> List[Any]:
+    values = {}
+    for frame in frames:
+        if not isinstance(frame, Mapping):
+            continue
+        for key in keys:
+            value = frame.get(key)
+            if value:
+                # Frames often share file names, test every value only once.
+                values[value if isinstance(value, str) else id(value)] = value
+    return list(values.values())
+
+
+class OwnershipIndex:
+    """
+    The rules of an ownership or code owners schema, compiled to match an
+    event in a single pass over its stack frames.
+
+    ``matching_rules`` returns the same rules, in the same order, as testing
+    every rule with ``Rule.test``, so the last matching rule keeps taking
+    precedence.
+    """
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        self.rules = rules
+        self.path_rules = _FrameRuleGroup(_glob_match_frame_value)
+        self.module_rules = _FrameRuleGroup(_glob_match_frame_value)
+        self.codeowners_rules = _FrameRuleGroup(_codeowners_match_frame_value)
+        # URL and tag rules do not look at frames, and are tested one by one.
+        self.other_rules: List[Tuple[int, Rule]] = []
+
+        for index, rule in enumerate(rules):
+            type = rule.matcher.type
+            if type == PATH:
+                self.path_rules.add(index, rule.matcher.pattern)
+            elif type == MODULE:
+                self.module_rules.add(index, rule.matcher.pattern)
+            elif type == CODEOWNERS:
+                self.codeowners_rules.add(index, rule.matcher.pattern)
+            else:
+                self.other_rules.append((index, rule))
+
+    def matching_rules(self, data: PathSearchable) -> List[Rule]:
+        matched: MutableSet[int] = set()
+
+        if self.path_rules or self.codeowners_rules:
+            values = _frame_values(*Matcher.munge_if_needed(data))
+            self.path_rules.match(values, matched)
+            self.codeowners_rules.match(values, matched)
+
+        if self.module_rules:
+            self.module_rules.match(_frame_values(find_stack_frames(data), ["module"]), matched)
+
+        for index, rule in self.other_rules:
+            if rule.test(data):
+                matched.add(index)
+
+        return [self.rules[index] for index in sorted(matched)]
+
+
+def get_ownership_index(schema: Mapping[str, Any]) -> OwnershipIndex:
+    """
+    Returns the compiled ``OwnershipIndex`` of a schema, which is cached per
+    process for every distinct schema.
+    """
+    key = md5_text(json.dumps(schema, sort_keys=True)).hexdigest()
+    index: Optional[OwnershipIndex] = _index_cache.get(key)
+    if index is None:
+        index = OwnershipIndex(load_schema(schema))
+        _index_cache.set(key, index)
+    return index
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import logging
 from time import time
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Sequence
 
 from django.conf import settings
 from redis.exceptions import RedisError
@@ -115,3 +115,34 @@ class RedisRateLimiter(RateLimiter):
             return False, 0, reset_time
 
         return result > limit, result, reset_time
+
+    def is_limited_many(
+        self, keys: Sequence[str], limit: int, window: int | None = None
+    ) -> list[bool]:
+        """
+        Does a rate limit check for every key, in order, in a single pipelined
+        round trip to redis.
+        """
+        if not keys:
+            return []
+
+        request_time = time()
+        if window is None or window == 0:
+            window = self.window
+
+        expiration = window - int(request_time % window)
+        try:
+            with self.client.pipeline(transaction=False) as pipeline:
+                for key in keys:
+                    redis_key = self._construct_redis_key(
+                        key, window=window, request_time=request_time
+                    )
+                    pipeline.incr(redis_key)
+                    pipeline.expire(redis_key, expiration)
+                results = pipeline.execute()
+        except RedisError:
+            logger.exception("Failed to retrieve current value from redis")
+            return [False] * len(keys)
+
+        # Every key has the result of its `incr` followed by the one of `expire`.
+        return [result > limit for result in results[::2]]
@@ -13,7 +13,14 @@ from sentry.api.api_publish_status import ApiPublishStatus
 from sentry.api.base import region_silo_endpoint
 from sentry.api.bases.project import ProjectEndpoint
 from sentry.replays.lib.storage import RecordingSegmentStorageMeta, make_filename
-from sentry.replays.usecases.reader import download_segment, fetch_segment_metadata
+from sentry.replays.usecases.reader import (
+    decompress,
+    fetch_segment,
+    fetch_segment_metadata,
+    gzip_encoded_size,
+    is_gzip_encodable,
+    iter_gzip_encoded,
+)
 
 
 @region_silo_endpoint
@@ -34,7 +41,7 @@ class ProjectReplayRecordingSegmentDetailsEndpoint(ProjectEndpoint):
             return self.respond({"detail": "Replay recording segment not found."}, status=404)
 
         if request.GET.get("download") is not None:
-            return self.download(segment)
+            return self.download(request, segment)
         else:
             return self.respond(
                 {
@@ -49,23 +56,42 @@ class ProjectReplayRecordingSegmentDetailsEndpoint(ProjectEndpoint):
                 }
             )
 
-    def download(self, segment: RecordingSegmentStorageMeta) -> StreamingHttpResponse:
+    def download(
+        self, request: Request, segment: RecordingSegmentStorageMeta
+    ) -> StreamingHttpResponse:
         transaction = sentry_sdk.start_transaction(
             op="http.server",
             name="ProjectReplayRecordingSegmentDetailsEndpoint.download_segment",
         )
-        segment_bytes = download_segment(
+        segment_blob = fetch_segment(
             segment, transaction=transaction, current_hub=sentry_sdk.Hub.current
         )
-        if segment_bytes is None:
-            segment_bytes = b"[]"
+        if segment_blob is None:
+            segment_blob = b"[]"
 
-        segment_reader = BytesIO(segment_bytes)
+        # Compressed segments are passed through to clients accepting gzip rather than being
+        # inflated here.
+        if "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "") and is_gzip_encodable(
+            segment_blob
+        ):
+            response = StreamingHttpResponse(
+                iter_gzip_encoded(segment_blob),
+                content_type="application/json",
+            )
+            response["Content-Encoding"] = "gzip"
+            response["Content-Length"] = gzip_encoded_size(segment_blob)
+        else:
+            with sentry_sdk.start_span(op="download_segment", description="decompress"):
+                segment_bytes = decompress(segment_blob)
+
+            segment_reader = BytesIO(segment_bytes)
+
+            response = StreamingHttpResponse(
+                iter(lambda: segment_reader.read(4096), b""),
+                content_type="application/json",
+            )
+            response["Content-Length"] = len(segment_bytes)
 
-        response = StreamingHttpResponse(
-            iter(lambda: segment_reader.read(4096), b""),
-            content_type="application/json",
-        )
-        response["Content-Length"] = len(segment_bytes)
         response["Content-Disposition"] = f'attachment; filename="{make_filename(segment)}"'
+        response["Vary"] = "Accept-Encoding"
         return response
@@ -115,8 +115,12 @@ class StorageBlob(Blob):
     bucket.  Keys are prefixed by their TTL.  Those TTLs are 30, 60, 90.  Measured in days.
     """
 
+    def __init__(self) -> None:
+        self._storage = None
+        self._storage_options: Optional[dict] = None
+
     def initialize_client(self):
-        storage = get_storage(self._make_storage_options())
+        storage = self._get_storage()
         # acccess the storage client so it is initialized below.
         # this will prevent race condition parallel credential getting during segment download
         # when using many threads
@@ -125,13 +129,13 @@ class StorageBlob(Blob):
             storage.client
 
     def delete(self, segment: RecordingSegmentStorageMeta) -> None:
-        storage = get_storage(self._make_storage_options())
+        storage = self._get_storage()
         storage.delete(self.make_key(segment))
 
     @metrics.wraps("replays.lib.storage.StorageBlob.get")
     def get(self, segment: RecordingSegmentStorageMeta) -> Optional[bytes]:
         try:
-            storage = get_storage(self._make_storage_options())
+            storage = self._get_storage()
             blob = storage.open(self.make_key(segment))
             result = blob.read()
             blob.close()
@@ -143,7 +147,7 @@ class StorageBlob(Blob):
 
     @metrics.wraps("replays.lib.storage.StorageBlob.set")
     def set(self, segment: RecordingSegmentStorageMeta, value: bytes) -> None:
-        storage = get_storage(self._make_storage_options())
+        storage = self._get_storage()
         try:
             storage.save(self.make_key(segment), BytesIO(value))
         except TooManyRequests:
@@ -154,6 +158,18 @@ class StorageBlob(Blob):
     def make_key(self, segment: RecordingSegmentStorageMeta) -> str:
         return make_filename(segment)
 
+    def _get_storage(self):
+        # The storage instance is shared by all requests (and download threads) of the process so
+        # its client and connection pool are reused.  It is recreated when the options change.
+        storage_options = self._make_storage_options() or {
+            "backend": options.get("filestore.backend"),
+            "options": options.get("filestore.options"),
+        }
+        if self._storage is None or storage_options != self._storage_options:
+            self._storage = get_storage(storage_options)
+            self._storage_options = storage_options
+        return self._storage
+
     def _make_storage_options(self) -> Optional[dict]:
         backend = options.get("replay.storage.backend")
         if backend:
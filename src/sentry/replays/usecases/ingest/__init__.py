@@ -17,6 +17,7 @@ from sentry.models.project import Project
 from sentry.replays.feature import has_feature_access
 from sentry.replays.lib.storage import RecordingSegmentStorageMeta, make_storage_driver
 from sentry.replays.usecases.ingest.dom_index import parse_and_emit_replay_actions
+from sentry.replays.usecases.ingest.events import iter_custom_events
 from sentry.signals import first_replay_received
 from sentry.utils import json, metrics
 from sentry.utils.outcomes import Outcome, track_outcome
@@ -26,6 +27,9 @@ logger = logging.getLogger("sentry.replays")
 CACHE_TIMEOUT = 3600
 COMMIT_FREQUENCY_SEC = 1
 
+# Maximum number of custom events read from a recording segment.
+CUSTOM_EVENT_LIMIT = 1000
+
 
 class ReplayRecordingSegment(TypedDict):
     id: str  # a uuid that individualy identifies a recording segment
@@ -183,11 +187,14 @@ def replay_click_post_processor(
         return None
 
     try:
-        with metrics.timer("replays.usecases.ingest.decompress_and_parse"):
+        with metrics.timer("replays.usecases.ingest.decompress"):
             decompressed_segment = decompress(segment_bytes)
-            parsed_segment_data = json.loads(decompressed_segment, use_rapid_json=True)
             _report_size_metrics(len(segment_bytes), len(decompressed_segment))
 
+        # Only the custom events are read from the segment, they are decoded lazily as the
+        # replay actions are parsed.
+        parsed_segment_data = iter_custom_events(decompressed_segment, limit=CUSTOM_EVENT_LIMIT)
+
         # Emit DOM search metadata to Clickhouse.
         with transaction.start_child(
             op="replays.usecases.ingest.parse_and_emit_replay_actions",
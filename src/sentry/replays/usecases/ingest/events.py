@@ -1,4 +1,14 @@
-from typing import Any, Dict, TypedDict
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, Iterator, TypedDict, Union
+
+from sentry.utils import json
+
+# Matches the "type" key of an RRWeb custom event (`{"type":5,...}`), wherever it is within the
+# event.  Quotes within JSON strings are escaped so this can not match the contents of a string.
+_CUSTOM_EVENT_TYPE_RE = re.compile(r'"type"\s*:\s*5(?![0-9.eE])')
+_ARRAY_START_RE = re.compile(r"\s*\[")
 
 
 class SentryEventData(TypedDict):
@@ -10,3 +20,88 @@ class SentryEvent(TypedDict):
     data: SentryEventData
     timestamp: int
     type: int
+
+
+def iter_custom_events(segment: Union[bytes, str], limit: int) -> Iterator[SentryEvent]:
+    """Yield the custom (type 5) events of an RRWeb recording segment in order.
+
+    Most of a recording segment is made of DOM snapshots and mutations which are never looked at
+    during ingest.  Instead of decoding the whole segment, the raw JSON is searched for "type": 5
+    keys and only the innermost array element containing each of them is decoded.  That is the
+    event itself if the key belongs to an event, whatever the order of its keys.  DOM comment nodes
+    and incremental events with nested type 5 objects are decoded as well, and skipped once their
+    type or data shows they are not custom events.
+
+    If a key can not be traced back to an array element and no event was found, the segment is
+    decoded as a whole instead.  At most `limit` events are yielded.
+    """
+    text = segment.decode("utf-8") if isinstance(segment, bytes) else segment
+    if not _ARRAY_START_RE.match(text):
+        return
+
+    count = 0
+    end = 0
+    unresolved = False
+    for match in _CUSTOM_EVENT_TYPE_RE.finditer(text):
+        # Keys nested within the previous element were already looked at.
+        if match.start() < end:
+            continue
+
+        element = _decode_enclosing_element(text, end, match.start())
+        if element is None:
+            unresolved = True
+            continue
+
+        event, end = element
+        if not _is_custom_event(event):
+            continue
+
+        yield event  # type: ignore[misc]
+
+        count += 1
+        if count == limit:
+            return
+
+    if unresolved and not count:
+        for event in json.loads(text):
+            if _is_custom_event(event):
+                yield event  # type: ignore[misc]
+
+                count += 1
+                if count == limit:
+                    return
+
+
+def _decode_enclosing_element(text: str, start: int, index: int) -> tuple[Any, int] | None:
+    """Decode the innermost object which is an array element, starts at or after `start` and
+    contains `index`.  Returns the object and the index it ends at."""
+    position = index
+    while True:
+        position = text.rfind("{", start, position)
+        if position == -1:
+            return None
+        if not _is_array_element(text, position):
+            continue
+
+        try:
+            value, value_end = json.raw_decode(text, position)
+        except ValueError:
+            # A brace within a string.
+            continue
+        if value_end > index:
+            return value, value_end
+
+
+def _is_custom_event(value: Any) -> bool:
+    return (
+        isinstance(value, dict)
+        and value.get("type") == 5
+        and isinstance(value.get("data"), dict)
+    )
+
+
+def _is_array_element(text: str, index: int) -> bool:
+    index -= 1
+    while index >= 0 and text[index] in " \t\n\r":
+        index -= 1
+    return index >= 0 and text[index] in "[,"
@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+import atexit
 import functools
+import struct
+import threading
 import uuid
 import zlib
-from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Iterator, List, Optional
+from itertools import islice
+from typing import Deque, Iterator, List, Optional
 
 import sentry_sdk
+from django.db import close_old_connections
 from django.db.models import Prefetch
 from sentry_sdk.tracing import Span
 from snuba_sdk import (
@@ -241,9 +247,46 @@ def _fetch_segments_from_snuba(
 
 # BLOB DOWNLOAD BEHAVIOR.
 
+# Number of threads shared by all segment downloads of the process.  Matches the size of the
+# storage client's connection pool.
+SEGMENT_DOWNLOAD_WORKERS = 10
+
+# Number of segments downloaded ahead of the segment being streamed.  Bounds the memory a download
+# holds to this many compressed segments.
+SEGMENT_PREFETCH_WINDOW = 10
+
+# Maximum size of the chunks segments are decompressed to.
+DECOMPRESS_CHUNK_SIZE = 65536
+
+GZIP_MAGIC = b"\x1f\x8b"
+# Deflate compression, no flags, no modification time, no extra flags, unknown OS.
+GZIP_HEADER = GZIP_MAGIC + b"\x08\x00\x00\x00\x00\x00\x00\xff"
+
+_download_executor: Optional[ThreadPoolExecutor] = None
+_download_executor_lock = threading.Lock()
+
+
+def _get_download_executor() -> ThreadPoolExecutor:
+    global _download_executor
+
+    if _download_executor is None:
+        with _download_executor_lock:
+            if _download_executor is None:
+                _download_executor = ThreadPoolExecutor(
+                    max_workers=SEGMENT_DOWNLOAD_WORKERS,
+                    thread_name_prefix="replays-download-segment",
+                )
+                atexit.register(_download_executor.shutdown, False)
+    return _download_executor
+
 
 def download_segments(segments: List[RecordingSegmentStorageMeta]) -> Iterator[bytes]:
-    """Download segment data from remote storage."""
+    """Download segment data from remote storage.
+
+    Segments are streamed in order as a JSON array.  Downloads run ahead of the segment being
+    streamed by at most `SEGMENT_PREFETCH_WINDOW` segments and segments are decompressed in
+    chunks, so memory usage does not grow with the length of the replay.
+    """
 
     # start a sentry transaction to pass to the thread pool workers
     transaction = sentry_sdk.start_transaction(
@@ -252,33 +295,86 @@ def download_segments(segments: List[RecordingSegmentStorageMeta]) -> Iterator[b
         sampled=True,
     )
 
-    download_segment_with_fixed_args = functools.partial(
-        download_segment, transaction=transaction, current_hub=sentry_sdk.Hub.current
-    )
-
     yield b"["
-    # Map all of the segments to a worker process for download.
-    with ThreadPoolExecutor(max_workers=10) as exe:
-        results = exe.map(download_segment_with_fixed_args, segments)
-
-        for i, result in enumerate(results):
-            if result is None:
-                yield b"[]"
-            else:
-                yield result
-
-            if i < len(segments) - 1:
-                yield b","
+    for i, result in enumerate(
+        prefetch_segments(segments, transaction=transaction, current_hub=sentry_sdk.Hub.current)
+    ):
+        if i > 0:
+            yield b","
+
+        if result is None:
+            yield b"[]"
+        else:
+            yield from iter_decompressed(result)
     yield b"]"
     transaction.finish()
 
 
+def prefetch_segments(
+    segments: List[RecordingSegmentStorageMeta],
+    transaction: Span,
+    current_hub: sentry_sdk.Hub,
+) -> Iterator[Optional[bytes]]:
+    """Yield the (compressed) blob data of each segment in order.
+
+    Up to `SEGMENT_PREFETCH_WINDOW` segments are downloaded concurrently ahead of the consumer.
+    Downloads which have not started yet are cancelled when the consumer stops iterating.
+    """
+    executor = _get_download_executor()
+    fetch = functools.partial(
+        _fetch_segment_in_thread, transaction=transaction, current_hub=current_hub
+    )
+
+    remaining = iter(segments)
+    pending: Deque[Future[Optional[bytes]]] = deque(
+        executor.submit(fetch, segment) for segment in islice(remaining, SEGMENT_PREFETCH_WINDOW)
+    )
+    try:
+        while pending:
+            result = pending.popleft().result()
+            for segment in islice(remaining, 1):
+                pending.append(executor.submit(fetch, segment))
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _fetch_segment_in_thread(
+    segment: RecordingSegmentStorageMeta,
+    transaction: Span,
+    current_hub: sentry_sdk.Hub,
+) -> Optional[bytes]:
+    # Pool threads keep their database connection between downloads, make sure we don't hold on
+    # to one that has been closed or outlived its max age.
+    close_old_connections()
+    return fetch_segment(segment, transaction, current_hub)
+
+
 def download_segment(
     segment: RecordingSegmentStorageMeta,
     transaction: Span,
     current_hub: sentry_sdk.Hub,
 ) -> Optional[bytes]:
     """Return the segment blob data."""
+    result = fetch_segment(segment, transaction, current_hub)
+    if result is None:
+        return None
+
+    with sentry_sdk.Hub(current_hub):
+        with sentry_sdk.start_span(
+            op="download_segment",
+            description="decompress",
+        ):
+            return decompress(result)
+
+
+def fetch_segment(
+    segment: RecordingSegmentStorageMeta,
+    transaction: Span,
+    current_hub: sentry_sdk.Hub,
+) -> Optional[bytes]:
+    """Return the segment blob data as it was stored."""
     with sentry_sdk.Hub(current_hub):
         with transaction.start_child(
             op="download_segment",
@@ -289,15 +385,7 @@ def download_segment(
                 op="download_segment",
                 description="download",
             ):
-                result = driver.get(segment)
-            if result is None:
-                return None
-
-            with sentry_sdk.start_span(
-                op="download_segment",
-                description="decompress",
-            ):
-                return decompress(result)
+                return driver.get(segment)
 
 
 def decompress(buffer: bytes) -> bytes:
@@ -310,3 +398,77 @@ def decompress(buffer: bytes) -> bytes:
         return buffer
 
     return zlib.decompress(buffer, zlib.MAX_WBITS | 32)
+
+
+def iter_decompressed(buffer: bytes, chunk_size: int = DECOMPRESS_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield decompressed output in chunks of at most `chunk_size` bytes."""
+    if buffer.startswith(b"["):
+        yield buffer
+        return
+
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 32)
+    while buffer:
+        chunk = decompressor.decompress(buffer, chunk_size)
+        if chunk:
+            yield chunk
+        buffer = decompressor.unconsumed_tail
+
+    if not decompressor.eof:
+        raise zlib.error("Error -5 while decompressing data: incomplete or truncated stream")
+
+
+def is_gzip_encodable(buffer: bytes) -> bool:
+    """Return true if the buffer is compressed in a format `iter_gzip_encoded` can convert."""
+    if buffer[:2] == GZIP_MAGIC:
+        return True
+
+    # A zlib stream without a preset dictionary, see RFC 1950.
+    return (
+        len(buffer) >= 6
+        and buffer[0] & 0x0F == 8
+        and (buffer[0] << 8 | buffer[1]) % 31 == 0
+        and not buffer[1] & 0x20
+    )
+
+
+def gzip_encoded_size(buffer: bytes) -> int:
+    """Return the size of the output of `iter_gzip_encoded`."""
+    if buffer[:2] == GZIP_MAGIC:
+        return len(buffer)
+    # The zlib header and trailer are swapped for the gzip header and trailer.
+    return len(buffer) - 6 + len(GZIP_HEADER) + 8
+
+
+def iter_gzip_encoded(buffer: bytes, chunk_size: int = DECOMPRESS_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield a compressed buffer as a gzip stream without re-compressing it.
+
+    Gzip and zlib streams wrap the same deflate data.  A zlib stream is converted by replacing its
+    header and trailer.  The gzip trailer holds the checksum of the uncompressed data, so the
+    deflate data is still inflated (in chunks) but never deflated again.
+    """
+    if buffer[:2] == GZIP_MAGIC:
+        yield buffer
+        return
+
+    yield GZIP_HEADER
+
+    deflated = memoryview(buffer)[2:-4]
+    decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+    checksum = 0
+    size = 0
+    for offset in range(0, len(deflated), chunk_size):
+        chunk = deflated[offset : offset + chunk_size]
+        data = decompressor.decompress(chunk, chunk_size)
+        while True:
+            checksum = zlib.crc32(data, checksum)
+            size += len(data)
+            if not decompressor.unconsumed_tail:
+                break
+            data = decompressor.decompress(decompressor.unconsumed_tail, chunk_size)
+        yield bytes(chunk)
+
+    if not decompressor.eof:
+        raise zlib.error("Error -5 while decompressing data: incomplete or truncated stream")
+
+    yield struct.pack("<II", checksum, size & 0xFFFFFFFF)
+
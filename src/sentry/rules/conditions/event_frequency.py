@@ -5,7 +5,7 @@ import contextlib
 import logging
 import re
 from datetime import datetime, timedelta
-from typing import Any, Dict, Mapping, Tuple
+from typing import Any, Dict, Mapping, MutableMapping, Tuple
 
 from django import forms
 from django.core.cache import cache
@@ -88,12 +88,28 @@ class EventFrequencyForm(forms.Form):
         return cleaned_data
 
 
+class FrequencyQueryCache:
+    """
+    Shares the results of frequency queries between the conditions evaluated
+    for the same event.
+
+    All conditions using the cache query up to the same point in time, so the
+    identical conditions of different rules (and the comparison queries that
+    line up with the queries of other conditions) only hit tsdb once.
+    """
+
+    def __init__(self, now: datetime | None = None) -> None:
+        self.now = now if now is not None else timezone.now()
+        self.results: MutableMapping[Tuple[str, datetime, datetime, str], int] = {}
+
+
 class BaseEventFrequencyCondition(EventCondition, abc.ABC):
     intervals = standard_intervals
     form_cls = EventFrequencyForm
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         self.tsdb = kwargs.pop("tsdb", tsdb)
+        self.query_cache: FrequencyQueryCache | None = kwargs.pop("query_cache", None)
         self.form_fields = {
             "value": {"type": "number", "placeholder": 100},
             "interval": {
@@ -162,6 +178,21 @@ class BaseEventFrequencyCondition(EventCondition, abc.ABC):
         raise NotImplementedError
 
     def query(self, event: GroupEvent, start: datetime, end: datetime, environment_id: str) -> int:
+        if self.query_cache is not None:
+            # The interval is implied by the start and end of the query.
+            key = (self.id, start, end, environment_id)
+            query_result = self.query_cache.results.get(key)
+            if query_result is None:
+                query_result = self.query_cache.results[key] = self._query(
+                    event, start, end, environment_id
+                )
+            else:
+                metrics.incr("rules.conditions.query_cache.hit", skip_internal=True)
+            return query_result
+
+        return self._query(event, start, end, environment_id)
+
+    def _query(self, event: GroupEvent, start: datetime, end: datetime, environment_id: str) -> int:
         query_result = self.query_hook(event, start, end, environment_id)
         metrics.incr(
             "rules.conditions.queried_snuba",
@@ -180,7 +211,7 @@ class BaseEventFrequencyCondition(EventCondition, abc.ABC):
 
     def get_rate(self, event: GroupEvent, interval: str, environment_id: str) -> int:
         _, duration = self.intervals[interval]
-        end = timezone.now()
+        end = self.query_cache.now if self.query_cache is not None else timezone.now()
         # For conditions with interval >= 1 hour we don't need to worry about read your writes
         # consistency. Disable it so that we can scale to more nodes.
         option_override_cm = contextlib.nullcontext()
@@ -29,8 +29,10 @@ from sentry.models.rulesnooze import RuleSnooze
 from sentry.rules import EventState, history, rules
 from sentry.rules.actions.base import EventAction
 from sentry.rules.conditions.base import EventCondition
+from sentry.rules.conditions.event_frequency import BaseEventFrequencyCondition, FrequencyQueryCache
 from sentry.rules.filters.base import EventFilter
 from sentry.types.rules import RuleFuture
+from sentry.utils import json
 from sentry.utils.hashlib import hash_values
 from sentry.utils.safe import safe_execute
 
@@ -78,6 +80,11 @@ class RuleProcessor:
             str, Tuple[Callable[[GroupEvent, Sequence[RuleFuture]], None], List[RuleFuture]]
         ] = {}
 
+        # Many rules of a project share conditions, which only need to be
+        # evaluated once per event.
+        self.condition_results: MutableMapping[Tuple[str, int | None], bool | None] = {}
+        self.frequency_query_cache = FrequencyQueryCache()
+
     def get_rules(self) -> Sequence[Rule]:
         """Get all of the rules for this project from the DB (or cache)."""
         rules_: Sequence[Rule] = Rule.get_for_project(self.project.id)
@@ -146,13 +153,33 @@ class RuleProcessor:
 
     def condition_matches(
         self, condition: dict[str, Any], state: EventState, rule: Rule
+    ) -> bool | None:
+        # Conditions only depend on the event, their data and the environment
+        # of the rule.
+        key = (json.dumps(condition, sort_keys=True), rule.environment_id)
+        if key in self.condition_results:
+            return self.condition_results[key]
+
+        passes = self.condition_results[key] = self._condition_matches(condition, state, rule)
+        return passes
+
+    def _condition_matches(
+        self, condition: dict[str, Any], state: EventState, rule: Rule
     ) -> bool | None:
         condition_cls = rules.get(condition["id"])
         if condition_cls is None:
             self.logger.warning("Unregistered condition %r", condition["id"])
             return None
 
-        condition_inst = condition_cls(self.project, data=condition, rule=rule)
+        if issubclass(condition_cls, BaseEventFrequencyCondition):
+            condition_inst = condition_cls(
+                self.project,
+                data=condition,
+                rule=rule,
+                query_cache=self.frequency_query_cache,
+            )
+        else:
+            condition_inst = condition_cls(self.project, data=condition, rule=rule)
         if not isinstance(condition_inst, (EventCondition, EventFilter)):
             self.logger.warning("Unregistered condition %r", condition["id"])
             return None
@@ -314,6 +341,8 @@ class RuleProcessor:
             return {}.values()
 
         self.grouped_futures.clear()
+        self.condition_results.clear()
+        self.frequency_query_cache = FrequencyQueryCache()
         rules = self.get_rules()
         snoozed_rules = RuleSnooze.objects.filter(rule__in=rules, user_id=None).values_list(
             "rule", flat=True
@@ -60,9 +60,11 @@ for cmd in map(
         "sentry.runner.commands.execfile.execfile",
         "sentry.runner.commands.files.files",
         "sentry.runner.commands.help.help",
+        "sentry.runner.commands.ingest.ingest",
         "sentry.runner.commands.init.init",
         "sentry.runner.commands.killswitches.killswitches",
         "sentry.runner.commands.migrations.migrations",
+        "sentry.runner.commands.nodestore.nodestore",
         "sentry.runner.commands.plugins.plugins",
         "sentry.runner.commands.queues.queues",
         "sentry.runner.commands.repair.repair",
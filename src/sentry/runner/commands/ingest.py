@@ -0,0 +1,56 @@
+import click
+
+from sentry.runner.decorators import configuration
+
+
+@click.group()
+def ingest():
+    """Tools for inspecting event ingestion."""
+
+
+@ingest.command()
+@click.option("--hours", default=1, show_default=True, help="How many hours to aggregate.")
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["table", "collapsed"]),
+    default="table",
+    show_default=True,
+    help="Render a table, or collapsed stacks for flamegraph tools.",
+)
+@click.option(
+    "--by",
+    type=click.Choice(["stage", "project"]),
+    default="stage",
+    show_default=True,
+    help="Group the table by stage or by project.",
+)
+@click.option("--event-type", default=None, help="Only include events of this type.")
+@click.option("--limit", type=int, default=50, show_default=True, help="Maximum number of rows.")
+@configuration
+def profile(hours, output_format, by, event_type, limit):
+    """
+    Dump the per-stage latencies recorded by the ingest profiler.
+
+    Events are only profiled if the `ingest.stage-profiler.sample-rate`
+    option is set.
+    """
+    from sentry.ingest import profiler
+
+    histogram = profiler.load(hours)
+    if event_type is not None:
+        histogram.entries = {
+            key: entry for key, entry in histogram.entries.items() if key[1] == event_type
+        }
+
+    if not histogram.entries:
+        raise click.ClickException("No samples recorded.")
+
+    if output_format == "collapsed":
+        lines = profiler.format_collapsed(histogram)
+    else:
+        kind = profiler.KIND_PROJECT if by == "project" else profiler.KIND_STAGE
+        lines = profiler.format_table(histogram, kind=kind, limit=limit)
+
+    for line in lines:
+        click.echo(line)
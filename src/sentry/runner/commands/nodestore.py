@@ -0,0 +1,90 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import click
+
+from sentry.runner.decorators import configuration
+
+
+@click.group()
+def nodestore():
+    """Tools for interacting with nodestore."""
+
+
+@nodestore.command("train-dictionary")
+@click.argument("platform")
+@click.option(
+    "--project",
+    "project_ids",
+    type=int,
+    multiple=True,
+    required=True,
+    help="Project to sample events from. Can be passed multiple times.",
+)
+@click.option("--days", default=7, show_default=True, help="How far back to sample events.")
+@click.option("--samples", default=2000, show_default=True, help="Number of events to train from.")
+@click.option(
+    "--dict-size",
+    default=110 * 1024,
+    show_default=True,
+    help="Target size of the dictionary in bytes.",
+)
+@click.option(
+    "--output",
+    type=click.Path(file_okay=False),
+    default=None,
+    help="Directory to write the dictionary to, defaults to SENTRY_NODESTORE_DICTIONARY_DIR.",
+)
+@configuration
+def train_dictionary(platform, project_ids, days, samples, dict_size, output):
+    """
+    Train a zstd dictionary for PLATFORM from a sample of stored events.
+
+    The dictionary is written as the next version for the platform, so
+    payloads compressed with previous versions stay decodable.
+    """
+    from django.conf import settings
+
+    from sentry import eventstore, nodestore
+    from sentry.eventstore.models import Event
+    from sentry.nodestore.dictionaries import (
+        DictionaryRegistry,
+        get_dictionary_filename,
+        train_dictionary,
+    )
+
+    output = output or settings.SENTRY_NODESTORE_DICTIONARY_DIR
+    if not output:
+        raise click.ClickException("No --output given and SENTRY_NODESTORE_DICTIONARY_DIR unset.")
+
+    end = datetime.now(timezone.utc)
+    events = eventstore.backend.get_events(
+        filter=eventstore.Filter(
+            project_ids=list(project_ids),
+            start=end - timedelta(days=days),
+            end=end,
+            conditions=[["platform", "=", platform]],
+        ),
+        limit=samples,
+        referrer="nodestore.train_dictionary",
+    )
+    node_ids = [Event.generate_node_id(event.project_id, event.event_id) for event in events]
+    if not node_ids:
+        raise click.ClickException("No events found to train from.")
+
+    payloads = [
+        nodestore.backend._encode({None: data})
+        for data in nodestore.backend.get_multi(node_ids).values()
+        if data
+    ]
+    click.echo(f"Training from {len(payloads)} events ({sum(map(len, payloads))} bytes)")
+
+    version = (DictionaryRegistry(output).get_latest_version(platform) or 0) + 1
+    dictionary = train_dictionary(payloads, platform, version, dict_size=dict_size)
+
+    os.makedirs(output, exist_ok=True)
+    path = os.path.join(output, get_dictionary_filename(platform, version))
+    with open(path, "wb") as f:
+        f.write(dictionary.as_bytes())
+
+    click.echo(f"Wrote dictionary {dictionary.dict_id()} to {path}")
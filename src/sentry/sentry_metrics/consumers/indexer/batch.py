@@ -250,7 +250,9 @@ class IndexerBatch:
         self.filtered_msg_meta.update(keys_to_remove)
 
     @metrics.wraps("process_messages.extract_strings")
-    def extract_strings(self) -> Mapping[UseCaseID, Mapping[OrgId, Set[str]]]:
+    def extract_strings(
+        self, emit_metrics: bool = True
+    ) -> Mapping[UseCaseID, Mapping[OrgId, Set[str]]]:
         strings: Mapping[UseCaseID, Mapping[OrgId, Set[str]]] = defaultdict(
             lambda: defaultdict(set)
         )
@@ -274,6 +276,9 @@ class IndexerBatch:
 
             strings[use_case_id][org_id].update(strings_in_message)
 
+        if not emit_metrics:
+            return strings
+
         for use_case_id, org_mapping in strings.items():
             metrics.gauge(
                 "process_messages.lookups_per_batch",
@@ -114,6 +114,11 @@ class MessageProcessor:
 
         sdk.set_measurement("indexer_batch.payloads.len", len(batch.parsed_payloads_by_meta))
 
+        # Warm the indexer's local cache while the cardinality limits are
+        # checked. This includes strings of messages that end up being
+        # filtered, which only costs a few extra cache reads.
+        self._indexer.prefetch(batch.extract_strings(emit_metrics=False))
+
         with metrics.timer("metrics_consumer.check_cardinality_limits"), sentry_sdk.start_span(
             op="check_cardinality_limits"
         ):
@@ -1,4 +1,5 @@
 from collections import defaultdict
+from concurrent.futures import Future
 from dataclasses import dataclass
 from enum import Enum
 from functools import wraps
@@ -448,6 +449,7 @@ class StringIndexer(Service):
         "resolve_shared_org",
         "reverse_shared_org_resolve",
         "bulk_reverse_resolve",
+        "prefetch",
     )
 
     def bulk_record(
@@ -480,6 +482,19 @@ class StringIndexer(Service):
         """
         raise NotImplementedError()
 
+    def prefetch(
+        self, strings: Mapping[UseCaseID, Mapping[OrgId, Set[str]]]
+    ) -> Optional["Future[Any]"]:
+        """
+        Starts loading the IDs of ``strings`` in the background, so that a
+        following ``bulk_record`` call for them is faster. Takes the same
+        mapping as ``bulk_record``.
+
+        Returns ``None`` if there is nothing to prefetch, or if the indexer
+        does not support prefetching.
+        """
+        return None
+
     def record(self, use_case_id: UseCaseID, org_id: int, string: str) -> Optional[int]:
         """Store a string and return the integer ID generated for it
         With every call to this method, the lifetime of the entry will be
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import atexit
 import logging
 import random
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Collection, Iterable, Mapping, MutableMapping, Optional, Sequence, Set
+from typing import Any, Collection, Iterable, Mapping, MutableMapping, Optional, Sequence, Set
 
 from django.conf import settings
 from django.core.cache import caches
@@ -22,6 +25,7 @@ from sentry.sentry_metrics.indexer.base import (
 from sentry.sentry_metrics.use_case_id_registry import UseCaseID
 from sentry.utils import metrics
 from sentry.utils.hashlib import md5_text
+from sentry.utils.lru import LRUCache
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +36,7 @@ _INDEXER_CACHE_RESOLVE_CACHE_REPLENISHMENT_METRIC = (
 )
 # only used to compare to the older version of the PGIndexer
 _INDEXER_CACHE_FETCH_METRIC = "sentry_metrics.indexer.memcache.fetch"
+_INDEXER_LOCAL_CACHE_METRIC = "sentry_metrics.indexer.local_cache"
 
 
 NAMESPACED_WRITE_FEAT_FLAG = "sentry-metrics.indexer.write-new-cache-namespace"
@@ -40,12 +45,61 @@ NAMESPACED_READ_FEAT_FLAG = "sentry-metrics.indexer.read-new-cache-namespace"
 BULK_RECORD_CACHE_NAMESPACE = "br"
 RESOLVE_CACHE_NAMESPACE = "res"
 
+# Stored in the local cache for strings that are known not to be indexed.
+_MISSING = object()
+
+_prefetch_executor: Optional[ThreadPoolExecutor] = None
+_prefetch_executor_lock = threading.Lock()
+
+
+def _get_prefetch_executor() -> ThreadPoolExecutor:
+    global _prefetch_executor
+
+    if _prefetch_executor is None:
+        with _prefetch_executor_lock:
+            if _prefetch_executor is None:
+                _prefetch_executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="indexer-cache-prefetch"
+                )
+                atexit.register(_prefetch_executor.shutdown, False)
+    return _prefetch_executor
+
 
 class StringIndexerCache:
-    def __init__(self, cache_name: str, partition_key: str):
+    """
+    Caches string -> id mappings in a shared Django cache.
+
+    If ``local_cache`` options are given (see ``sentry.utils.lru.LRUCache``,
+    e.g. ``{"max_size": 100000}``), mappings are also kept in a process-wide
+    LRU in front of the shared cache. Local entries expire after the LRU's
+    ``ttl`` or ``SENTRY_METRICS_INDEXER_CACHE_TTL``, whichever is shorter,
+    counted from when they were written locally. Entries read from the shared
+    cache do not carry its remaining lifetime, so they can outlive the shared
+    entry by up to that long. With ``negative_ttl``, strings that are known
+    not to be indexed can be remembered in the local tier for that many
+    seconds (see ``set_missing``.)
+    """
+
+    def __init__(
+        self,
+        cache_name: str,
+        partition_key: str,
+        local_cache: Optional[Mapping[str, Any]] = None,
+        negative_ttl: Optional[int] = None,
+    ):
         self.version = 1
-        self.cache = caches[cache_name]
+        self.cache_name = cache_name
         self.partition_key = partition_key
+        self.local_cache: Optional[LRUCache[tuple[str, str], Any]] = (
+            LRUCache(**local_cache) if local_cache else None
+        )
+        self.negative_ttl = negative_ttl
+
+    @property
+    def cache(self) -> Any:
+        # Django cache connections are per thread, so look the connection up
+        # every time instead of sharing one with the prefetch thread.
+        return caches[self.cache_name]
 
     @property
     def randomized_ttl(self) -> int:
@@ -55,6 +109,52 @@ class StringIndexerCache:
         jitter = random.uniform(0, 0.25) * cache_ttl
         return int(cache_ttl + jitter)
 
+    def _local_ttl(self) -> int:
+        ttl = self.randomized_ttl
+        if self.local_cache is not None and self.local_cache.ttl is not None:
+            ttl = min(ttl, int(self.local_cache.ttl))
+        return ttl
+
+    def _get_local_many(
+        self, namespace: str, keys: Iterable[str]
+    ) -> MutableMapping[str, Optional[int]]:
+        """
+        Returns the mappings for the keys found in the local cache, where a
+        known missing string maps to ``None``.
+        """
+        if self.local_cache is None:
+            return {}
+
+        keys = list(keys)
+        results: MutableMapping[str, Optional[int]] = {}
+        for (_, key), value in self.local_cache.get_many((namespace, key) for key in keys).items():
+            results[key] = None if value is _MISSING else value
+
+        metrics.incr(
+            _INDEXER_LOCAL_CACHE_METRIC,
+            tags={"cache_hit": "true", "namespace": namespace},
+            amount=len(results),
+        )
+        metrics.incr(
+            _INDEXER_LOCAL_CACHE_METRIC,
+            tags={"cache_hit": "false", "namespace": namespace},
+            amount=len(keys) - len(results),
+        )
+        return results
+
+    def _set_local_many(self, namespace: str, key_values: Mapping[str, Optional[int]]) -> None:
+        if self.local_cache is None:
+            return
+
+        ttl = self._local_ttl()
+        for key, value in key_values.items():
+            if value is not None:
+                self.local_cache.set((namespace, key), value, ttl=ttl)
+
+    def _delete_local_many(self, namespace: str, keys: Iterable[str]) -> None:
+        if self.local_cache is not None:
+            self.local_cache.delete_many((namespace, key) for key in keys)
+
     def _make_cache_key(self, key: str) -> str:
         use_case_id, org_id, string = key.split(":", 2)
         org_string = org_id + ":" + string
@@ -119,14 +219,42 @@ class StringIndexerCache:
         return int(result)
 
     def get(self, namespace: str, key: str) -> Optional[int]:
+        local_results = self._get_local_many(namespace, [key])
+        if key in local_results:
+            return local_results[key]
+
         if options.get(NAMESPACED_READ_FEAT_FLAG):
             result = self.cache.get(
                 self._make_namespaced_cache_key(namespace, key), version=self.version
             )
-            return self._validate_result(result)
-        return self.cache.get(self._make_cache_key(key), version=self.version)
+            result = self._validate_result(result)
+        else:
+            result = self.cache.get(self._make_cache_key(key), version=self.version)
+
+        self._set_local_many(namespace, {key: result})
+        return result
+
+    def is_missing(self, namespace: str, key: str) -> bool:
+        """
+        Returns whether ``key`` was marked as not indexed with ``set_missing``
+        recently.
+        """
+        if self.local_cache is None or self.negative_ttl is None:
+            return False
+        return self.local_cache.get((namespace, key)) is _MISSING
+
+    def set_missing(self, namespace: str, key: str) -> None:
+        """
+        Remembers in the local cache that ``key`` is not indexed, for
+        ``negative_ttl`` seconds. Setting a value for the key replaces the
+        entry.
+        """
+        if self.local_cache is None or self.negative_ttl is None:
+            return
+        self.local_cache.set((namespace, key), _MISSING, ttl=self.negative_ttl)
 
     def set(self, namespace: str, key: str, value: int) -> None:
+        self._set_local_many(namespace, {key: value})
         self.cache.set(
             key=self._make_cache_key(key),
             value=value,
@@ -142,6 +270,24 @@ class StringIndexerCache:
             )
 
     def get_many(self, namespace: str, keys: Iterable[str]) -> MutableMapping[str, Optional[int]]:
+        keys = list(keys)
+        local_results = self._get_local_many(namespace, keys)
+        if not local_results:
+            results = self._get_many_shared(namespace, keys)
+            self._set_local_many(namespace, results)
+            return results
+
+        missed = [key for key in keys if key not in local_results]
+        shared_results = self._get_many_shared(namespace, missed) if missed else {}
+        self._set_local_many(namespace, shared_results)
+        return {
+            key: local_results[key] if key in local_results else shared_results[key]
+            for key in keys
+        }
+
+    def _get_many_shared(
+        self, namespace: str, keys: Sequence[str]
+    ) -> MutableMapping[str, Optional[int]]:
         if options.get(NAMESPACED_READ_FEAT_FLAG):
             cache_keys = {self._make_namespaced_cache_key(namespace, key): key for key in keys}
             namespaced_results: MutableMapping[str, Optional[int]] = {
@@ -160,7 +306,28 @@ class StringIndexerCache:
             )
             return self._format_results(keys, results)
 
+    def prefetch_many(self, namespace: str, keys: Iterable[str]) -> Optional[Future[Any]]:
+        """
+        Loads the mappings for ``keys`` from the shared cache into the local
+        cache in a background thread, so that they can be read without a
+        round trip later. Returns ``None`` if there is nothing to prefetch.
+        """
+        if self.local_cache is None:
+            return None
+
+        keys = list(keys)
+        local_results = self.local_cache.get_many((namespace, key) for key in keys)
+        missed = [key for key in keys if (namespace, key) not in local_results]
+        if not missed:
+            return None
+
+        def prefetch() -> None:
+            self._set_local_many(namespace, self._get_many_shared(namespace, missed))
+
+        return _get_prefetch_executor().submit(prefetch)
+
     def set_many(self, namespace: str, key_values: Mapping[str, int]) -> None:
+        self._set_local_many(namespace, key_values)
         cache_key_values = {self._make_cache_key(k): v for k, v in key_values.items()}
         self.cache.set_many(cache_key_values, timeout=self.randomized_ttl, version=self.version)
         if options.get(NAMESPACED_WRITE_FEAT_FLAG):
@@ -174,11 +341,13 @@ class StringIndexerCache:
             )
 
     def delete(self, namespace: str, key: str) -> None:
+        self._delete_local_many(namespace, [key])
         self.cache.delete(self._make_cache_key(key), version=self.version)
         if options.get(NAMESPACED_WRITE_FEAT_FLAG):
             self.cache.delete(self._make_namespaced_cache_key(namespace, key), version=self.version)
 
     def delete_many(self, namespace: str, keys: Sequence[str]) -> None:
+        self._delete_local_many(namespace, keys)
         self.cache.delete_many([self._make_cache_key(key) for key in keys], version=self.version)
         if options.get(NAMESPACED_WRITE_FEAT_FLAG):
             self.cache.delete_many(
@@ -191,10 +360,30 @@ class CachingIndexer(StringIndexer):
     def __init__(self, cache: StringIndexerCache, indexer: StringIndexer) -> None:
         self.cache = cache
         self.indexer = indexer
+        self._pending_prefetch: Optional[Future[Any]] = None
+
+    def prefetch(
+        self, strings: Mapping[UseCaseID, Mapping[OrgId, Set[str]]]
+    ) -> Optional[Future[Any]]:
+        self._pending_prefetch = self.cache.prefetch_many(
+            BULK_RECORD_CACHE_NAMESPACE, UseCaseKeyCollection(strings).as_strings()
+        )
+        return self._pending_prefetch
+
+    def _wait_for_prefetch(self) -> None:
+        pending, self._pending_prefetch = self._pending_prefetch, None
+        if pending is None:
+            return
+        try:
+            pending.result()
+        except Exception:
+            # The keys are fetched again from the shared cache.
+            logger.exception("sentry_metrics.indexer.prefetch_failed")
 
     def bulk_record(
         self, strings: Mapping[UseCaseID, Mapping[OrgId, Set[str]]]
     ) -> UseCaseKeyResults:
+        self._wait_for_prefetch()
 
         cache_keys = UseCaseKeyCollection(strings)
         metrics.gauge("sentry_metrics.indexer.lookups_per_batch", value=cache_keys.size)
@@ -252,6 +441,13 @@ class CachingIndexer(StringIndexer):
     @metric_path_key_compatible_resolve
     def resolve(self, use_case_id: UseCaseID, org_id: int, string: str) -> Optional[int]:
         key = f"{use_case_id.value}:{org_id}:{string}"
+        if self.cache.is_missing(RESOLVE_CACHE_NAMESPACE, key):
+            metrics.incr(
+                _INDEXER_CACHE_RESOLVE_METRIC,
+                tags={"cache_hit": "missing", "use_case": use_case_id.value},
+            )
+            return None
+
         result = self.cache.get(RESOLVE_CACHE_NAMESPACE, key)
 
         if result and isinstance(result, int):
@@ -275,6 +471,8 @@ class CachingIndexer(StringIndexer):
                     tags={"use_case": use_case_id.value},
                 )
                 self.cache.set(RESOLVE_CACHE_NAMESPACE, key, id)
+        else:
+            self.cache.set_missing(RESOLVE_CACHE_NAMESPACE, key)
 
         return id
 
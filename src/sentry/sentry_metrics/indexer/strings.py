@@ -1,4 +1,5 @@
-from typing import Collection, Dict, Mapping, Optional, Set
+from concurrent.futures import Future
+from typing import Any, Collection, Dict, Mapping, Optional, Set
 
 from django.conf import settings
 
@@ -252,6 +253,19 @@ class StaticStringIndexer(StringIndexer):
 
         return static_key_results.merge(indexer_results)
 
+    def prefetch(
+        self, strings: Mapping[UseCaseID, Mapping[OrgId, Set[str]]]
+    ) -> Optional["Future[Any]"]:
+        return self.indexer.prefetch(
+            {
+                use_case_id: {
+                    org_id: {string for string in org_strings if string not in SHARED_STRINGS}
+                    for org_id, org_strings in org_mapping.items()
+                }
+                for use_case_id, org_mapping in strings.items()
+            }
+        )
+
     def record(self, use_case_id: UseCaseID, org_id: int, string: str) -> Optional[int]:
         if string in SHARED_STRINGS:
             return SHARED_STRINGS[string]
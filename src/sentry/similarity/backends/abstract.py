@@ -6,6 +6,12 @@ class AbstractIndexBackend(metaclass=ABCMeta):
     def classify(self, scope, items, limit=None, timestamp=None):
         pass
 
+    def classify_many(self, requests, limit=None, timestamp=None):
+        return [
+            self.classify(scope, items, limit=limit, timestamp=timestamp)
+            for scope, items in requests
+        ]
+
     @abstractmethod
     def compare(self, scope, key, items, limit=None, timestamp=None):
         pass
@@ -14,6 +20,12 @@ class AbstractIndexBackend(metaclass=ABCMeta):
     def record(self, scope, key, items, timestamp=None):
         pass
 
+    def record_many(self, requests, timestamp=None):
+        return [
+            self.record(*request[:3], timestamp=request[3] if len(request) > 3 else timestamp)
+            for request in requests
+        ]
+
     @abstractmethod
     def merge(self, scope, destination, items, timestamp=None):
         pass
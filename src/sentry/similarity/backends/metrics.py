@@ -25,9 +25,17 @@ class MetricsWrapper(AbstractIndexBackend):
     def classify(self, *args, **kwargs):
         return self.__instrumented_method_call("classify", *args, **kwargs)
 
+    def classify_many(self, requests, *args, **kwargs):
+        with timer(self.template.format("classify_many")):
+            return self.backend.classify_many(requests, *args, **kwargs)
+
     def compare(self, *args, **kwargs):
         return self.__instrumented_method_call("compare", *args, **kwargs)
 
+    def record_many(self, requests, *args, **kwargs):
+        with timer(self.template.format("record_many")):
+            return self.backend.record_many(requests, *args, **kwargs)
+
     def merge(self, *args, **kwargs):
         return self.__instrumented_method_call("merge", *args, **kwargs)
 
@@ -2,6 +2,9 @@ import itertools
 import time
 
 from django.utils.encoding import force_str
+from redis import ConnectionPool, StrictRedis
+from redis.exceptions import ResponseError
+from rediscluster import RedisCluster
 
 from sentry.similarity.backends.abstract import AbstractIndexBackend
 from sentry.utils.iterators import chunked
@@ -30,15 +33,29 @@ class RedisScriptMinHashIndexBackend(AbstractIndexBackend):
         self.interval = interval
         self.retention = retention
         self.candidate_set_limit = candidate_set_limit
-
-    def _build_signature_arguments(self, features):
-        if not features:
-            return [0] * self.bands
-
-        arguments = []
-        for bucket in band(self.bands, self.signature_builder(features)):
-            arguments.extend([1, ",".join(str(b) for b in bucket), 1])
-        return arguments
+        self.__node_clients = {}
+
+    def _build_signature_arguments_many(self, feature_sets):
+        """
+        Builds the signature arguments of many feature sets, signing all of
+        them at once.
+        """
+        feature_sets = [list(features) for features in feature_sets]
+        signatures = iter(
+            self.signature_builder.build_many([features for features in feature_sets if features])
+        )
+
+        rv = []
+        for features in feature_sets:
+            if not features:
+                rv.append([0] * self.bands)
+                continue
+
+            arguments = []
+            for bucket in band(self.bands, next(signatures)):
+                arguments.extend([1, ",".join(str(b) for b in bucket), 1])
+            rv.append(arguments)
+        return rv
 
     def __index(self, scope, args):
         # scope must be passed into the script call as a key to allow the
@@ -47,6 +64,62 @@ class RedisScriptMinHashIndexBackend(AbstractIndexBackend):
         # all redis operations.
         return index(self.cluster, [scope], args)
 
+    def __get_node_client(self, scope):
+        """
+        Returns a client of the Redis Cluster node that owns ``scope``.
+        """
+        pool = self.cluster.connection_pool
+        node = pool.get_master_node_by_slot(pool.nodes.keyslot(scope))
+        client = self.__node_clients.get(node["name"])
+        if client is None:
+            client = self.__node_clients[node["name"]] = StrictRedis(
+                connection_pool=ConnectionPool(
+                    connection_class=pool.connection_class,
+                    host=node["host"],
+                    port=node["port"],
+                    **pool.connection_kwargs,
+                )
+            )
+        return client
+
+    def __index_many(self, requests):
+        """
+        Runs the script for many ``(scope, args)`` requests, returning the
+        result of every request.
+        """
+        if len(requests) < 2:
+            return [self.__index(scope, args) for scope, args in requests]
+
+        if not isinstance(self.cluster, RedisCluster):
+            with self.cluster.pipeline(transaction=False) as pipeline:
+                for scope, args in requests:
+                    index(pipeline, [scope], args)
+                return pipeline.execute()
+
+        # redis-py-cluster does not support scripts in pipelines, so send one
+        # plain pipeline to every node that owns some of the scopes instead.
+        positions_by_node = {}
+        for position, (scope, _) in enumerate(requests):
+            positions_by_node.setdefault(self.__get_node_client(scope), []).append(position)
+
+        results = [None] * len(requests)
+        for client, positions in positions_by_node.items():
+            with client.pipeline(transaction=False) as pipeline:
+                for position in positions:
+                    scope, args = requests[position]
+                    index(pipeline, [scope], args)
+                node_results = pipeline.execute(raise_on_error=False)
+            for position, result in zip(positions, node_results):
+                if isinstance(result, ResponseError) and str(result).startswith(("MOVED", "ASK")):
+                    # The slot moved to another node, so the script did not
+                    # run. Let the cluster client follow the redirection.
+                    scope, args = requests[position]
+                    result = self.__index(scope, args)
+                elif isinstance(result, Exception):
+                    raise result
+                results[position] = result
+        return results
+
     def _as_search_result(self, results):
         score_replacements = {
             -1.0: None,  # both items don't have the feature (no comparison)
@@ -74,26 +147,43 @@ class RedisScriptMinHashIndexBackend(AbstractIndexBackend):
         return sorted((decode_search_result(result) for result in results), key=get_comparison_key)
 
     def classify(self, scope, items, limit=None, timestamp=None):
+        return self.classify_many([(scope, items)], limit=limit, timestamp=timestamp)[0]
+
+    def classify_many(self, requests, limit=None, timestamp=None):
+        """
+        Classifies the items of many ``(scope, items)`` requests at once,
+        returning the search result of every request.
+        """
         if timestamp is None:
             timestamp = int(time.time())
 
-        arguments = [
-            "CLASSIFY",
-            timestamp,
-            self.namespace,
-            self.bands,
-            self.interval,
-            self.retention,
-            self.candidate_set_limit,
-            scope,
-            limit if limit is not None else -1,
-        ]
-
-        for idx, threshold, features in items:
-            arguments.extend([idx, threshold])
-            arguments.extend(self._build_signature_arguments(features))
-
-        return self._as_search_result(self.__index(scope, arguments))
+        signatures = iter(
+            self._build_signature_arguments_many(
+                [features for _, items in requests for _, _, features in items]
+            )
+        )
+
+        calls = []
+        for scope, items in requests:
+            arguments = [
+                "CLASSIFY",
+                timestamp,
+                self.namespace,
+                self.bands,
+                self.interval,
+                self.retention,
+                self.candidate_set_limit,
+                scope,
+                limit if limit is not None else -1,
+            ]
+
+            for idx, threshold, _ in items:
+                arguments.extend([idx, threshold])
+                arguments.extend(next(signatures))
+
+            calls.append((scope, arguments))
+
+        return [self._as_search_result(result) for result in self.__index_many(calls)]
 
     def compare(self, scope, key, items, limit=None, timestamp=None):
         if timestamp is None:
@@ -118,29 +208,54 @@ class RedisScriptMinHashIndexBackend(AbstractIndexBackend):
         return self._as_search_result(self.__index(scope, arguments))
 
     def record(self, scope, key, items, timestamp=None):
-        if not items:
-            return  # nothing to do
-
+        return self.record_many([(scope, key, items)], timestamp=timestamp)[0]
+
+    def record_many(self, requests, timestamp=None):
+        """
+        Records the items of many ``(scope, key, items)`` requests at once,
+        returning the result of every request (``None`` for requests without
+        items.) A request may carry its own timestamp as a fourth element,
+        which takes precedence over ``timestamp``.
+        """
         if timestamp is None:
             timestamp = int(time.time())
 
-        arguments = [
-            "RECORD",
-            timestamp,
-            self.namespace,
-            self.bands,
-            self.interval,
-            self.retention,
-            self.candidate_set_limit,
-            scope,
-            key,
-        ]
-
-        for idx, features in items:
-            arguments.append(idx)
-            arguments.extend(self._build_signature_arguments(features))
-
-        return self.__index(scope, arguments)
+        signatures = iter(
+            self._build_signature_arguments_many(
+                [features for request in requests for _, features in request[2]]
+            )
+        )
+
+        calls = []
+        positions = []
+        for position, request in enumerate(requests):
+            scope, key, items = request[:3]
+            if not items:
+                continue  # nothing to do
+
+            arguments = [
+                "RECORD",
+                request[3] if len(request) > 3 else timestamp,
+                self.namespace,
+                self.bands,
+                self.interval,
+                self.retention,
+                self.candidate_set_limit,
+                scope,
+                key,
+            ]
+
+            for idx, _ in items:
+                arguments.append(idx)
+                arguments.extend(next(signatures))
+
+            calls.append((scope, arguments))
+            positions.append(position)
+
+        rv = [None] * len(requests)
+        for position, result in zip(positions, self.__index_many(calls)):
+            rv[position] = result
+        return rv
 
     def merge(self, scope, destination, items, timestamp=None):
         if timestamp is None:
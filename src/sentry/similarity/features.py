@@ -94,10 +94,7 @@ class FeatureSet:
                 )
         return results
 
-    def record(self, events):
-        if not events:
-            return []
-
+    def __get_record_request(self, events):
         scope = None
         key = None
 
@@ -138,7 +135,31 @@ class FeatureSet:
                     if features:
                         items.append((self.aliases[label], features))
 
-        return self.index.record(scope, key, items, timestamp=int(to_timestamp(event.datetime)))
+        return scope, key, items
+
+    def record(self, events):
+        if not events:
+            return []
+
+        scope, key, items = self.__get_record_request(events)
+        return self.index.record(
+            scope, key, items, timestamp=int(to_timestamp(events[-1].datetime))
+        )
+
+    def record_many(self, events):
+        """
+        Records events of many groups at once, like calling ``record`` for
+        every event, returning the result of every event.
+        """
+        if not events:
+            return []
+
+        return self.index.record_many(
+            [
+                (*self.__get_record_request([event]), int(to_timestamp(event.datetime)))
+                for event in events
+            ]
+        )
 
     def classify(self, events, limit=None, thresholds=None):
         if not events:
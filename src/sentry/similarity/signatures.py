@@ -1,17 +1,71 @@
 from __future__ import annotations
 
-from typing import Iterable
+from typing import Iterable, Sequence
 
 import mmh3
 
+from sentry.utils.lru import LRUCache
+
 
 class MinHashSignatureBuilder:
-    def __init__(self, columns: int, rows: int) -> None:
+    """
+    Builds MinHash signatures of ``columns`` values in ``[0, rows)``.
+
+    Every feature is hashed once per column and the signature is the column
+    wise minimum of the hashes of all features. The hashes of a feature don't
+    depend on the feature set it is part of, so they are computed only once
+    per feature for all feature sets passed to `build_many`, and optionally
+    kept in a bounded in-process cache (``cache_size``) to be reused for
+    later events, which share most of their features with earlier events of
+    the same issue.
+    """
+
+    def __init__(self, columns: int, rows: int, cache_size: int | None = None) -> None:
         self.columns = columns
         self.rows = rows
+        self.cache: LRUCache[str | bytes, tuple[int, ...]] | None = (
+            LRUCache(max_size=cache_size) if cache_size else None
+        )
+
+    def __call__(self, features: Iterable[str | bytes]) -> list[int]:
+        if self.cache is not None:
+            return self.build_many([features])[0]
 
-    def __call__(self, features: Iterable[str]) -> list[int]:
+        # Duplicate features don't change the minimum.
+        features = set(features)
+        rows = self.rows
         return [
-            min(mmh3.hash(feature, column) % self.rows for feature in features)
+            min(mmh3.hash(feature, column) % rows for feature in features)
             for column in range(self.columns)
         ]
+
+    def _hash(self, feature: str | bytes) -> tuple[int, ...]:
+        rows = self.rows
+        return tuple([mmh3.hash(feature, column) % rows for column in range(self.columns)])
+
+    def get_hashes(self, features: Iterable[str | bytes]) -> dict[str | bytes, tuple[int, ...]]:
+        """
+        Returns the hashes of all columns of every distinct feature.
+        """
+        features = set(features)
+        rv = self.cache.get_many(features) if self.cache is not None else {}
+        missing = {feature: self._hash(feature) for feature in features if feature not in rv}
+        if missing:
+            rv.update(missing)
+            if self.cache is not None:
+                self.cache.set_many(missing)
+        return rv
+
+    def build_many(self, feature_sets: Sequence[Iterable[str | bytes]]) -> list[list[int]]:
+        """
+        Builds the signatures of many feature sets at once.
+        """
+        feature_sets = [list(features) for features in feature_sets]
+        hashes = self.get_hashes(feature for features in feature_sets for feature in features)
+
+        rv = []
+        for features in feature_sets:
+            if not features:
+                raise ValueError("Cannot build the signature of an empty feature set.")
+            rv.append(list(map(min, zip(*map(hashes.__getitem__, set(features))))))
+        return rv
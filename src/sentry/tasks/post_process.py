@@ -1,18 +1,34 @@
 from __future__ import annotations
 
 import logging
+import random
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
 from time import time
-from typing import TYPE_CHECKING, List, Mapping, Optional, Sequence, Tuple, TypedDict, Union
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Collection,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    TypedDict,
+    Union,
+)
 
 import sentry_sdk
 from django.conf import settings
+from django.db import close_old_connections
 from django.db.models.signals import post_save
 from django.utils import timezone
 from google.api_core.exceptions import ServiceUnavailable
 
 from sentry import features, options
 from sentry.exceptions import PluginError
+from sentry.ingest import profiler
 from sentry.issues.grouptype import GroupCategory
 from sentry.issues.issue_occurrence import IssueOccurrence
 from sentry.killswitches import killswitch_matches_context
@@ -53,6 +69,9 @@ class PostProcessJob(TypedDict, total=False):
     has_alert: bool
 
 
+PipelineStep = Callable[[PostProcessJob], None]
+
+
 def _get_service_hooks(project_id):
     from sentry.models.servicehook import ServiceHook
 
@@ -625,8 +644,13 @@ def post_process_group(
             for ge, gs in multi_groups
         ]
 
-        for job in group_jobs:
-            run_post_process_job(job)
+        with profiler.profile(
+            "post_process_group",
+            project_id=event.project_id,
+            event_type=event.get_event_type(),
+        ):
+            for job in group_jobs:
+                run_post_process_job(job)
 
         if not is_reprocessed and event.data.get("received"):
             metrics.timing(
@@ -651,30 +675,155 @@ def run_post_process_job(job: PostProcessJob):
         # specific pipelines for issue types
         pipeline = GROUP_CATEGORY_POST_PROCESS_PIPELINE[issue_category]
 
+    if random.random() < options.get("post-process.concurrent-pipeline.rollout"):
+        run_pipeline_concurrently(job, pipeline, issue_category_metric)
+    else:
+        for pipeline_step in pipeline:
+            _run_pipeline_step(job, pipeline_step, issue_category_metric)
+
+
+def _run_pipeline_step(
+    job: PostProcessJob, pipeline_step: PipelineStep, issue_category_metric: Optional[str]
+) -> None:
+    group_event = job["event"]
+    start = time()
+    try:
+        with sentry_sdk.start_span(
+            op=f"tasks.post_process_group.{pipeline_step.__name__}"
+        ), profiler.stage(pipeline_step.__name__):
+            pipeline_step(job)
+    except Exception:
+        metrics.incr(
+            "sentry.tasks.post_process.post_process_group.exception",
+            tags={
+                "issue_category": issue_category_metric,
+                "pipeline": pipeline_step.__name__,
+            },
+        )
+        logger.exception(
+            f"Failed to process pipeline step {pipeline_step.__name__}",
+            extra={"event": group_event, "group": group_event.group},
+        )
+    else:
+        metrics.incr(
+            "sentry.tasks.post_process.post_process_group.completed",
+            tags={
+                "issue_category": issue_category_metric,
+                "pipeline": pipeline_step.__name__,
+            },
+        )
+    finally:
+        metrics.timing(
+            "sentry.tasks.post_process.post_process_group.step_duration",
+            time() - start,
+            tags={
+                "issue_category": issue_category_metric,
+                "pipeline": pipeline_step.__name__,
+            },
+        )
+
+
+def _run_pipeline_step_in_thread(
+    hub: sentry_sdk.Hub,
+    sample: Optional[profiler.Sample],
+    job: PostProcessJob,
+    pipeline_step: PipelineStep,
+    issue_category_metric: Optional[str],
+) -> None:
+    try:
+        with sentry_sdk.Hub(hub), profiler.attach(sample):
+            _run_pipeline_step(job, pipeline_step, issue_category_metric)
+    finally:
+        # Don't leave the connection of this short-lived thread open.
+        close_old_connections()
+
+
+def run_pipeline_concurrently(
+    job: PostProcessJob,
+    pipeline: Sequence[PipelineStep],
+    issue_category_metric: Optional[str],
+    concurrent_steps: Optional[Collection[PipelineStep]] = None,
+    timeouts: Optional[Mapping[PipelineStep, float]] = None,
+) -> None:
+    """
+    Runs ``pipeline`` like the sequential pipeline, except for the steps in
+    ``concurrent_steps`` (see `CONCURRENT_POST_PROCESS_STEPS`). Those neither
+    modify the job nor the group, so they are run at the same time once all
+    other steps have finished, which lets slow steps that mostly wait for
+    network I/O overlap instead of adding up.
+
+    The concurrent steps run on a thread pool of their own, so that steps which
+    are stuck only hold on to threads of this job. Steps that take longer than
+    their timeout are counted as timed out and no longer waited for, steps that
+    have not started by then are cancelled. Python threads cannot be
+    interrupted, so a timed out step still runs to completion in the
+    background.
+    """
+    if concurrent_steps is None:
+        concurrent_steps = CONCURRENT_POST_PROCESS_STEPS
+    if timeouts is None:
+        timeouts = POST_PROCESS_STEP_TIMEOUTS
+
+    deferred = []
     for pipeline_step in pipeline:
-        try:
-            with sentry_sdk.start_span(op=f"tasks.post_process_group.{pipeline_step.__name__}"):
-                pipeline_step(job)
-        except Exception:
-            metrics.incr(
-                "sentry.tasks.post_process.post_process_group.exception",
-                tags={
-                    "issue_category": issue_category_metric,
-                    "pipeline": pipeline_step.__name__,
-                },
-            )
-            logger.exception(
-                f"Failed to process pipeline step {pipeline_step.__name__}",
-                extra={"event": group_event, "group": group_event.group},
-            )
+        if pipeline_step in concurrent_steps:
+            deferred.append(pipeline_step)
         else:
-            metrics.incr(
-                "sentry.tasks.post_process.post_process_group.completed",
-                tags={
-                    "issue_category": issue_category_metric,
-                    "pipeline": pipeline_step.__name__,
-                },
+            _run_pipeline_step(job, pipeline_step, issue_category_metric)
+
+    if not deferred:
+        return
+
+    executor = ThreadPoolExecutor(
+        max_workers=min(len(deferred), settings.SENTRY_POST_PROCESS_PIPELINE_WORKERS),
+        thread_name_prefix="post-process-pipeline",
+    )
+    hub = sentry_sdk.Hub.current
+    sample = profiler.fork()
+    try:
+        running: Dict[Future[None], Tuple[PipelineStep, float]] = {}
+        for pipeline_step in deferred:
+            future = executor.submit(
+                _run_pipeline_step_in_thread,
+                hub,
+                sample,
+                job,
+                pipeline_step,
+                issue_category_metric,
             )
+            deadline = time() + timeouts.get(pipeline_step, DEFAULT_POST_PROCESS_STEP_TIMEOUT)
+            running[future] = (pipeline_step, deadline)
+
+        while running:
+            done, _ = wait(
+                running,
+                timeout=max(min(deadline for _, deadline in running.values()) - time(), 0),
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                del running[future]
+
+            now = time()
+            for future, (pipeline_step, deadline) in list(running.items()):
+                if deadline <= now:
+                    del running[future]
+                    future.cancel()
+                    metrics.incr(
+                        "sentry.tasks.post_process.post_process_group.timeout",
+                        tags={
+                            "issue_category": issue_category_metric,
+                            "pipeline": pipeline_step.__name__,
+                        },
+                    )
+                    logger.warning(
+                        "post_process.pipeline_step.timeout",
+                        extra={
+                            "pipeline": pipeline_step.__name__,
+                            "group_id": job["event"].group_id,
+                        },
+                    )
+    finally:
+        executor.shutdown(wait=False)
 
 
 def process_event(data: dict, group_id: Optional[int]) -> Event:
@@ -1242,3 +1391,26 @@ GENERIC_POST_PROCESS_PIPELINE = [
     process_inbox_adds,
     process_rules,
 ]
+
+# Steps that only read the job and the group, and whose side effects (such as
+# scheduling tasks) no other step depends on. They are run at the same time
+# once all other steps are done when the pipeline runs concurrently.
+CONCURRENT_POST_PROCESS_STEPS: Collection[PipelineStep] = frozenset(
+    [
+        _capture_group_stats,
+        process_commits,
+        process_service_hooks,
+        process_resource_change_bounds,
+        process_code_mappings,
+        process_similarity,
+        update_existing_attachments,
+        sdk_crash_monitoring,
+        process_replay_link,
+    ]
+)
+
+# Seconds after which we stop waiting for a step in `CONCURRENT_POST_PROCESS_STEPS`
+DEFAULT_POST_PROCESS_STEP_TIMEOUT = 10.0
+POST_PROCESS_STEP_TIMEOUTS: Mapping[PipelineStep, float] = {
+    process_commits: 20.0,
+}
@@ -4,6 +4,7 @@ import sentry_sdk
 from django.apps import apps
 from django.conf import settings
 
+from sentry.ingest import profiler
 from sentry.tasks.base import instrumented_task
 from sentry.utils.locking import UnableToAcquireLock
 
@@ -46,6 +47,7 @@ def process_incr(**kwargs):
     buffer.process(**kwargs)
 
 
+@profiler.stage("buffer")
 def buffer_incr(model, *args, **kwargs):
     """
     Call `buffer.incr` task, resolving the model name first.
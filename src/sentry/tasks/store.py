@@ -14,6 +14,7 @@ from sentry.constants import DEFAULT_STORE_NORMALIZER_ARGS
 from sentry.datascrubbing import scrub_data
 from sentry.eventstore import processing
 from sentry.eventstore.processing.base import Event
+from sentry.ingest import profiler
 from sentry.killswitches import killswitch_matches_context
 from sentry.lang.native.symbolicator import SymbolicatorTaskKind
 from sentry.models.activity import Activity
@@ -732,7 +733,9 @@ def _do_save_event(
             ):
                 raise HashDiscarded("Load shedding save_event")
 
-            with metrics.timer("tasks.store.do_save_event.event_manager.save"):
+            with metrics.timer("tasks.store.do_save_event.event_manager.save"), profiler.profile(
+                "save_event", project_id=project_id, event_type=data.get("type")
+            ):
                 manager = EventManager(data)
                 # event.project.organization is populated after this statement.
                 manager.save(
@@ -864,6 +867,133 @@ def save_event_transaction(
     _do_save_event(cache_key, data, start_time, event_id, project_id, **kwargs)
 
 
+@instrumented_task(
+    name="sentry.tasks.store.save_event_transaction_batch",
+    queue="events.save_event_transaction",
+    time_limit=65,
+    soft_time_limit=60,
+    silo_mode=SiloMode.REGION,
+)
+def save_event_transaction_batch(
+    cache_keys: List[str],
+    start_times: List[Optional[int]],
+    event_ids: List[str],
+    project_id: int,
+    **kwargs: Any,
+) -> None:
+    _do_save_event_batch(cache_keys, start_times, event_ids, project_id)
+
+
+def _do_save_event_batch(
+    cache_keys: List[str],
+    start_times: List[Optional[int]],
+    event_ids: List[str],
+    project_id: int,
+) -> None:
+    """
+    Saves a batch of transactions of the same project with
+    `save_transactions_batch`. If saving the batch fails, every event which
+    was not persisted yet is retried on its own through `_do_save_event`.
+    """
+
+    set_current_event_project(project_id)
+
+    from sentry.event_manager import (
+        EventManager,
+        TransactionBatchSaveError,
+        save_transactions_batch,
+    )
+
+    batch = []
+    for cache_key, start_time, event_id in zip(cache_keys, start_times, event_ids):
+        with metrics.timer("tasks.store.do_save_event.get_cache"):
+            data = processing.event_processing_store.get(cache_key)
+
+        # Anything that is not a plain transaction (including events that went
+        # missing from the cache) takes the regular path, which also takes care
+        # of load shedding and cleanup.
+        if (
+            not data
+            or data.get("type") != "transaction"
+            or reprocessing.event_supports_reprocessing(data)
+            or killswitch_matches_context(
+                "store.load-shed-save-event-projects",
+                {
+                    "project_id": project_id,
+                    "event_type": "transaction",
+                    "platform": data.get("platform") or "none",
+                },
+            )
+        ):
+            _do_save_event(cache_key, data, start_time, event_id, project_id)
+            continue
+
+        batch.append((cache_key, start_time, EventManager(CanonicalKeyDict(data))))
+
+    if not batch:
+        return
+
+    metrics.timing("tasks.store.do_save_event_batch.size", len(batch))
+
+    try:
+        with metrics.timer("tasks.store.do_save_event_batch.event_manager.save"), profiler.profile(
+            "save_event_batch", project_id=project_id, event_type="transaction"
+        ):
+            save_transactions_batch(
+                project_id,
+                [manager for _, _, manager in batch],
+                [start_time for _, start_time, _ in batch],
+                assume_normalized=True,
+            )
+    except Exception as e:
+        metrics.incr("events.save_event_batch.fallback", skip_internal=False)
+        error_logger.exception("tasks.store.do_save_event_batch.failed")
+        persisted = set(e.persisted) if isinstance(e, TransactionBatchSaveError) else set()
+        for index, (cache_key, start_time, _) in enumerate(batch):
+            if index in persisted:
+                continue
+            try:
+                _do_save_event(cache_key, None, start_time, None, project_id)
+            except Exception:
+                # A failing retry must neither abort the remaining ones nor
+                # the cleanup of the persisted events.
+                metrics.incr("events.save_event_batch.fallback_failed", skip_internal=False)
+                error_logger.exception(
+                    "tasks.store.do_save_event_batch.fallback_failed",
+                    extra={"cache_key": cache_key},
+                )
+        # The events which made it into the eventstream are cleaned up below.
+        batch = [item for index, item in enumerate(batch) if index in persisted]
+
+    for cache_key, start_time, manager in batch:
+        try:
+            # Put the updated event back into the cache so that post_process
+            # has the most recent data.
+            data = manager.get_data()
+            if isinstance(data, CANONICAL_TYPES):
+                data = dict(data.items())
+            with metrics.timer("tasks.store.do_save_event.write_processing_cache"):
+                processing.event_processing_store.store(data)
+        finally:
+            reprocessing2.mark_event_reprocessed(data)
+            with metrics.timer("tasks.store.do_save_event.delete_attachment_cache"):
+                attachment_cache.delete(cache_key)
+
+            if start_time:
+                metrics.timing(
+                    "events.time-to-process",
+                    time() - start_time,
+                    instance=data["platform"],
+                    tags={
+                        "is_reprocessing2": "true"
+                        if reprocessing2.is_reprocessed_event(data)
+                        else "false",
+                    },
+                )
+
+            time_synthetic_monitoring_event(data, project_id, start_time)
+
+
 @instrumented_task(
     name="sentry.tasks.store.save_event_attachments",
     queue="events.save_event_attachments",
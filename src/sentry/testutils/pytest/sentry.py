@@ -347,6 +347,10 @@ def pytest_runtest_teardown(item: pytest.Item) -> None:
     for model in (OrganizationOption, ProjectOption, UserOption):
         model.objects.clear_local_cache()
 
+    from sentry.api.event_search import clear_parse_cache
+
+    clear_parse_cache()
+
     Hub.main.bind_client(None)
 
 
@@ -1,3 +1,4 @@
+from collections import defaultdict
 from collections.abc import Callable
 from datetime import timedelta
 from enum import Enum
@@ -144,6 +145,7 @@ class BaseTSDB(Service):
                 "models_with_environment_support",
                 "normalize_to_epoch",
                 "rollup",
+                "write_batch",
             ]
         )
         | __write_methods__
@@ -516,6 +518,30 @@ class BaseTSDB(Service):
         """
         raise NotImplementedError
 
+    def write_batch(self, batch):
+        """
+        Write all writes collected in a ``TSDBWriteBatch``.
+        """
+        incrs = defaultdict(list)
+        for (model, key, timestamp, environment_id), count in batch.incrs.items():
+            incrs[environment_id].append((model, key, {"timestamp": timestamp, "count": count}))
+        for environment_id, items in incrs.items():
+            self.incr_multi(items, environment_id=environment_id)
+
+        records = defaultdict(list)
+        for (model, key, timestamp, environment_id), values in batch.records.items():
+            records[(timestamp, environment_id)].append((model, key, values))
+        for (timestamp, environment_id), items in records.items():
+            self.record_multi(items, timestamp=timestamp, environment_id=environment_id)
+
+        frequencies = defaultdict(list)
+        for (model, key, timestamp, environment_id), scores in batch.frequencies.items():
+            frequencies[(timestamp, environment_id)].append((model, {key: scores}))
+        for (timestamp, environment_id), requests in frequencies.items():
+            self.record_frequency_multi(
+                requests, timestamp=timestamp, environment_id=environment_id
+            )
+
     def get_most_frequent(
         self,
         model,
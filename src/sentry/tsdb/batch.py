@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import itertools
+from collections import defaultdict
+from datetime import datetime
+from typing import (
+    Any,
+    Callable,
+    Hashable,
+    Iterable,
+    Iterator,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Tuple,
+)
+
+from django.utils import timezone
+
+from sentry.tsdb.base import TSDBModel
+
+# (model, key, timestamp, environment_id)
+WriteKey = Tuple[TSDBModel, Hashable, datetime, Optional[int]]
+
+
+class TSDBWriteBatch:
+    """
+    Collects the TSDB writes of a unit of work, e.g. saving a batch of events,
+    so that they can be written at once with `flush`.
+
+    The batch accepts the same arguments as the ``incr_multi``,
+    ``record_multi`` and ``record_frequency_multi`` methods of the TSDB.
+    Writes to the same key at the same time are merged, and backends that
+    support it (see `RedisTSDB.write_batch`) merge counters that fall into
+    the same rollup and send all writes with a single pipeline per host.
+    """
+
+    def __init__(self, backend: Any = None) -> None:
+        if backend is None:
+            from sentry import tsdb
+
+            backend = tsdb.backend
+        self.backend = backend
+        self.incrs: MutableMapping[WriteKey, int] = defaultdict(int)
+        self.records: MutableMapping[WriteKey, set[Any]] = defaultdict(set)
+        self.frequencies: MutableMapping[WriteKey, MutableMapping[Any, float]] = defaultdict(
+            lambda: defaultdict(float)
+        )
+
+    def __len__(self) -> int:
+        return len(self.incrs) + len(self.records) + len(self.frequencies)
+
+    def write_keys(self) -> Iterator[WriteKey]:
+        return itertools.chain(self.incrs, self.records, self.frequencies)
+
+    def incr_multi(
+        self,
+        items: Iterable[tuple[Any, ...]],
+        timestamp: datetime | None = None,
+        count: int = 1,
+        environment_id: int | None = None,
+    ) -> None:
+        if timestamp is None:
+            timestamp = timezone.now()
+
+        for item in items:
+            if len(item) == 2:
+                model, key = item
+                options: Mapping[str, Any] = {}
+            else:
+                model, key, options = item
+            write_key = (model, key, options.get("timestamp", timestamp), environment_id)
+            self.incrs[write_key] += options.get("count", count)
+
+    def record_multi(
+        self,
+        items: Iterable[tuple[TSDBModel, Hashable, Iterable[Any]]],
+        timestamp: datetime | None = None,
+        environment_id: int | None = None,
+    ) -> None:
+        if timestamp is None:
+            timestamp = timezone.now()
+
+        for model, key, values in items:
+            self.records[(model, key, timestamp, environment_id)].update(values)
+
+    def record_frequency_multi(
+        self,
+        requests: Iterable[tuple[TSDBModel, Mapping[Hashable, Mapping[Any, float]]]],
+        timestamp: datetime | None = None,
+        environment_id: int | None = None,
+    ) -> None:
+        if timestamp is None:
+            timestamp = timezone.now()
+
+        for model, request in requests:
+            for key, items in request.items():
+                scores = self.frequencies[(model, key, timestamp, environment_id)]
+                for member, score in items.items():
+                    scores[member] += score
+
+    def split(self, predicate: Callable[[TSDBModel], bool]) -> TSDBWriteBatch:
+        """
+        Moves the writes to models matching ``predicate`` into a new batch.
+        """
+        rv = TSDBWriteBatch(self.backend)
+        for writes, other in (
+            (self.incrs, rv.incrs),
+            (self.records, rv.records),
+            (self.frequencies, rv.frequencies),
+        ):
+            for write_key in [write_key for write_key in writes if predicate(write_key[0])]:
+                other[write_key] = writes.pop(write_key)
+        return rv
+
+    def clear(self) -> None:
+        self.incrs.clear()
+        self.records.clear()
+        self.frequencies.clear()
+
+    def flush(self) -> None:
+        if self:
+            try:
+                self.backend.write_batch(self)
+            finally:
+                self.clear()
@@ -12,6 +12,7 @@ from django.utils.encoding import force_bytes
 from pkg_resources import resource_string
 
 from sentry.tsdb.base import BaseTSDB
+from sentry.utils import metrics
 from sentry.utils.compat import crc32
 from sentry.utils.dates import to_datetime, to_timestamp
 from sentry.utils.redis import SentryScript, check_cluster_versions, get_cluster_from_options
@@ -724,6 +725,98 @@ class RedisTSDB(BaseTSDB):
                 if durable:
                     raise
 
+    def write_batch(self, batch):
+        """
+        Writes all counters, distinct counters and frequency tables of a
+        ``TSDBWriteBatch`` with a single pipeline per host. Counter increments
+        that end up in the same rollup interval are merged into one command.
+        """
+        self.validate_arguments(
+            [
+                model
+                for model, _, _, environment_id in batch.write_keys()
+                if environment_id is not None
+            ],
+            [environment_id for _, _, _, environment_id in batch.write_keys()],
+        )
+
+        # (cluster, durable) -> routing key -> commands
+        commands = defaultdict(lambda: defaultdict(list))
+        # (cluster, durable) -> hash key -> hash field -> count
+        counters = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+        # (cluster, durable) -> hash key -> "max expiration encountered"
+        counter_expiries = defaultdict(lambda: defaultdict(int))
+
+        for (model, key, timestamp, environment_id), count in batch.incrs.items():
+            for rollup, max_values in self.rollups.items():
+                expiry = self.calculate_expiry(rollup, max_values, timestamp)
+                for target_environment_id in {None, environment_id}:
+                    cluster = self.get_cluster(target_environment_id)
+                    hash_key, hash_field = self.make_counter_key(
+                        model, rollup, timestamp, key, target_environment_id
+                    )
+                    counters[cluster][hash_key][hash_field] += count
+                    if counter_expiries[cluster][hash_key] < expiry:
+                        counter_expiries[cluster][hash_key] = expiry
+
+        for cluster, hashes in counters.items():
+            for hash_key, fields in hashes.items():
+                cmds = commands[cluster][hash_key]
+                for hash_field, count in fields.items():
+                    cmds.append(("HINCRBY", hash_key, hash_field, count))
+                cmds.append(("EXPIREAT", hash_key, counter_expiries[cluster][hash_key]))
+
+        # Distinct counters and frequency tables are routed by their TSDB key
+        # rather than the Redis key, so that all rollups of a key end up on
+        # the same host.
+        for (model, key, timestamp, environment_id), values in batch.records.items():
+            ts = int(to_timestamp(timestamp))
+            for target_environment_id in {None, environment_id}:
+                cmds = commands[self.get_cluster(target_environment_id)][key]
+                for rollup, max_values in self.rollups.items():
+                    k = self.make_key(model, rollup, ts, key, target_environment_id)
+                    cmds.append(("PFADD", k, *values))
+                    cmds.append(
+                        ("EXPIREAT", k, self.calculate_expiry(rollup, max_values, timestamp))
+                    )
+
+        if self.enable_frequency_sketches:
+            for (model, key, timestamp, environment_id), scores in batch.frequencies.items():
+                ts = int(to_timestamp(timestamp))
+                arguments = ["INCR"] + list(self.DEFAULT_SKETCH_PARAMETERS)
+                for member, score in scores.items():
+                    arguments.extend((score, member))
+
+                for target_environment_id in {None, environment_id}:
+                    keys = []
+                    expirations = []
+                    for rollup, max_values in self.rollups.items():
+                        chunk = self.make_frequency_table_keys(
+                            model, rollup, ts, key, target_environment_id
+                        )
+                        keys.extend(chunk)
+                        expiry = self.calculate_expiry(rollup, max_values, timestamp)
+                        expirations.extend(("EXPIREAT", k, expiry) for k in chunk)
+
+                    cmds = commands[self.get_cluster(target_environment_id)][key]
+                    cmds.append((CountMinScript, keys, arguments))
+                    cmds.extend(expirations)
+
+        for (cluster, durable), cluster_commands in commands.items():
+            router = cluster.get_router()
+            pipeline_sizes = defaultdict(int)
+            for routing_key, cmds in cluster_commands.items():
+                pipeline_sizes[router.get_host_for_key(routing_key)] += len(cmds)
+            for size in pipeline_sizes.values():
+                metrics.timing("tsdb.write_batch.pipeline_size", size)
+
+            try:
+                with metrics.timer("tsdb.write_batch.execute", tags={"durable": durable}):
+                    cluster.execute_commands(cluster_commands)
+            except Exception:
+                if durable:
+                    raise
+
     def get_most_frequent(
         self, model, keys, start, end=None, rollup=None, limit=None, environment_id=None
     ):
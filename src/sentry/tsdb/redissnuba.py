@@ -121,3 +121,15 @@ class RedisSnubaTSDB(BaseTSDB, metaclass=RedisSnubaTSDBMeta):
             "snuba": SnubaTSDB(**options.pop("snuba", {})),
         }
         super().__init__(**options)
+
+    def write_batch(self, batch):
+        # Unlike the methods above, a batch may contain writes of models of
+        # different backends, which each get their share of it.
+        if self.switchover_timestamp is not None and time.time() < self.switchover_timestamp:
+            self.backends["redis"].write_batch(batch)
+            return
+
+        for backend in {write for read, write in model_backends.values()}:
+            sub_batch = batch.split(lambda model: model_backends[model][WRITE] == backend)
+            if sub_batch:
+                self.backends[backend].write_batch(sub_batch)
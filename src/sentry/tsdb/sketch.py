@@ -0,0 +1,611 @@
+import heapq
+import math
+import operator
+from array import array
+from collections import namedtuple
+
+import mmh3
+from django.utils import timezone
+
+from sentry.tsdb.base import BaseTSDB
+
+SketchParameters = namedtuple("SketchParameters", "depth width capacity")
+
+
+class HyperLogLog:
+    """
+    A HyperLogLog cardinality estimator with ``2 ** precision`` registers.
+
+    Registers are kept in a sparse mapping while few of them are set, and are
+    switched to a dense byte array once the mapping would use more memory
+    than the array.
+    """
+
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = {}
+
+    @classmethod
+    def precision_for_error(cls, error):
+        """
+        Return the smallest precision with a standard error of at most
+        ``error``.
+        """
+        return min(max(math.ceil(math.log2((1.04 / error) ** 2)), 4), 18)
+
+    def add(self, value):
+        x = mmh3.hash64(str(value), signed=False)[0]
+        bits = 64 - self.precision
+        index = x >> bits
+        rank = bits - (x & ((1 << bits) - 1)).bit_length() + 1
+        if self._get(index) < rank:
+            self.registers[index] = rank
+            self._maybe_densify()
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("cannot merge HyperLogLogs of different precision")
+        if isinstance(other.registers, bytearray):
+            items = enumerate(other.registers)
+        else:
+            items = other.registers.items()
+        for index, rank in items:
+            if rank and self._get(index) < rank:
+                self.registers[index] = rank
+        self._maybe_densify()
+
+    def cardinality(self):
+        m = 1 << self.precision
+        if isinstance(self.registers, bytearray):
+            ranks = [rank for rank in self.registers if rank]
+        else:
+            ranks = list(self.registers.values())
+        zeros = m - len(ranks)
+
+        if m >= 128:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        else:
+            alpha = {16: 0.673, 32: 0.697, 64: 0.709}[m]
+
+        estimate = alpha * m * m / (zeros + sum(2.0**-rank for rank in ranks))
+        if estimate <= 2.5 * m and zeros:
+            # Small range correction (linear counting.) No large range
+            # correction is needed with 64 bit hashes.
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def _get(self, index):
+        if isinstance(self.registers, bytearray):
+            return self.registers[index]
+        return self.registers.get(index, 0)
+
+    def _maybe_densify(self):
+        # A dict entry costs roughly 64 bytes, a dense register one byte.
+        registers = self.registers
+        if isinstance(registers, dict) and len(registers) > (1 << self.precision) // 64:
+            dense = bytearray(1 << self.precision)
+            for index, rank in registers.items():
+                dense[index] = rank
+            self.registers = dense
+
+
+class CountMinSketch:
+    """
+    A Count-Min sketch with an index of the most frequent items.
+
+    This follows the behavior of ``cmsketch.lua`` used by ``RedisTSDB``: the
+    index stores exact scores until it is filled, at which point the
+    estimation matrix is initialized from it and the index is maintained
+    from conservative-update estimates.
+    """
+
+    __slots__ = ("parameters", "index", "estimates")
+
+    def __init__(self, parameters):
+        self.parameters = parameters
+        self.index = {}
+        self.estimates = None
+
+    @classmethod
+    def parameters_for_error(cls, error, confidence, capacity):
+        """
+        Return sketch parameters that overestimate a score by at most
+        ``error`` times the total score with probability ``confidence``.
+        """
+        return SketchParameters(
+            depth=max(math.ceil(math.log(1.0 / (1.0 - confidence))), 1),
+            width=max(math.ceil(math.e / error), 1),
+            capacity=capacity,
+        )
+
+    def coordinates(self, value):
+        width = self.parameters.width
+        return [
+            depth * width + mmh3.hash(str(value), depth + 1, signed=False) % width
+            for depth in range(self.parameters.depth)
+        ]
+
+    def observations(self, coordinates):
+        return [self.estimates[c] for c in coordinates]
+
+    def estimate(self, value):
+        score = self.index.get(value)
+        if score is not None:
+            return score
+        if self.estimates is None:
+            return 0.0
+        return min(self.observations(self.coordinates(value)))
+
+    def increment(self, items):
+        capacity = self.parameters.capacity
+        if capacity > len(self.index):
+            for value, delta in items.items():
+                self.index[value] = self.index.get(value, 0.0) + delta
+            if len(self.index) >= capacity:
+                # The index is full, so the estimation matrix takes over as
+                # the source of truth for items that fall out of it.
+                self._initialize_estimates()
+                self._truncate_index()
+            return
+
+        if self.estimates is None:
+            self._initialize_estimates()
+
+        scores = {}
+        for value, delta in items.items():
+            coordinates = self.coordinates(value)
+            estimates = self.observations(coordinates)
+            score = self.index.get(value, min(estimates)) + delta
+            self._update(coordinates, estimates, score)
+            scores[value] = score
+
+        if capacity > 0:
+            minimum = min(self.index.values())
+            added = False
+            for value, score in scores.items():
+                if score > minimum:
+                    self.index[value] = score
+                    added = True
+            if added:
+                self._truncate_index()
+
+    def ranked(self, limit=None):
+        if limit is None:
+            limit = self.parameters.capacity
+        return sorted(self.index.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def merge(self, other):
+        if other.estimates is None:
+            self.increment(other.index)
+            return
+
+        if self.estimates is None:
+            self._initialize_estimates()
+        for i, value in enumerate(other.estimates):
+            self.estimates[i] += value
+
+        members = set(self.index) | set(other.index)
+        self.index = {
+            member: min(self.observations(self.coordinates(member))) for member in members
+        }
+        self._truncate_index()
+
+    def _initialize_estimates(self):
+        if self.estimates is None:
+            self.estimates = array("d", bytes(8 * self.parameters.depth * self.parameters.width))
+        for value, score in self.index.items():
+            coordinates = self.coordinates(value)
+            self._update(coordinates, self.observations(coordinates), score)
+
+    def _update(self, coordinates, estimates, score):
+        for c, estimate in zip(coordinates, estimates):
+            if score > estimate:
+                self.estimates[c] = score
+
+    def _truncate_index(self):
+        capacity = self.parameters.capacity
+        if len(self.index) > capacity:
+            self.index = dict(
+                heapq.nlargest(capacity, self.index.items(), key=lambda item: item[1])
+            )
+
+
+class SketchTSDB(BaseTSDB):
+    """
+    A bounded in-memory time-series storage.
+
+    Unlike ``InMemoryTSDB``, this backend only keeps the number of intervals
+    configured for each rollup: when a write creates a new interval, the
+    intervals that have fallen out of the retention window of that rollup
+    are evicted. Intervals are evicted relative to the most recent interval
+    written rather than the wall clock, so writes with historical timestamps
+    behave the same way as they would have at the time.
+
+    Distinct counters are stored using HyperLogLog and frequency tables
+    using a Count-Min sketch with a top-N index, so memory use per interval
+    does not grow with the number of distinct items recorded. The accuracy
+    of both can be configured with the ``distinct_counts_error``,
+    ``frequency_error``, ``frequency_confidence`` and ``frequency_capacity``
+    options.
+    """
+
+    def __init__(
+        self,
+        distinct_counts_error=0.01,
+        frequency_error=0.02,
+        frequency_confidence=0.95,
+        frequency_capacity=50,
+        **options,
+    ):
+        self.hll_precision = HyperLogLog.precision_for_error(distinct_counts_error)
+        self.sketch_parameters = CountMinSketch.parameters_for_error(
+            frequency_error, frequency_confidence, frequency_capacity
+        )
+        super().__init__(**options)
+        self.flush()
+
+    def flush(self):
+        # self.counters[rollup][interval][(model, key, environment_id)] = count
+        self.counters = {rollup: {} for rollup in self.rollups}
+
+        # self.distinct_counters[rollup][interval][(model, key, environment_id)] = HyperLogLog
+        self.distinct_counters = {rollup: {} for rollup in self.rollups}
+
+        # self.frequencies[rollup][interval][(model, key, environment_id)] = CountMinSketch
+        self.frequencies = {rollup: {} for rollup in self.rollups}
+
+    def _get_interval(self, storage, rollup, interval):
+        """
+        Return the mapping for a writable interval, creating it and evicting
+        expired intervals if needed, or ``None`` if the interval is already
+        outside the retention window.
+        """
+        intervals = storage[rollup]
+        data = intervals.get(interval)
+        if data is not None:
+            return data
+
+        samples = self.rollups[rollup]
+        latest = max(intervals, default=interval)
+        if interval <= latest - samples:
+            return None
+
+        if interval > latest:
+            for expired in [i for i in intervals if i <= interval - samples]:
+                del intervals[expired]
+
+        data = intervals[interval] = {}
+        return data
+
+    def _iter_values(self, storage, rollup, series, model, key, environment_id):
+        intervals = storage[rollup]
+        for timestamp in series:
+            data = intervals.get(self.normalize_ts_to_rollup(timestamp, rollup))
+            yield timestamp, (data.get((model, key, environment_id)) if data else None)
+
+    def _merge(self, storage, combine, model, destination, sources, environment_ids):
+        environment_ids = (set(environment_ids) if environment_ids is not None else set()).union(
+            [None]
+        )
+
+        self.validate_arguments([model], environment_ids)
+
+        for intervals in storage.values():
+            for data in intervals.values():
+                for environment_id in environment_ids:
+                    for source in sources:
+                        value = data.pop((model, source, environment_id), None)
+                        if value is None:
+                            continue
+                        dest = (model, destination, environment_id)
+                        if dest in data:
+                            data[dest] = combine(data[dest], value)
+                        else:
+                            data[dest] = value
+
+    def _delete(self, storage, models, keys, start, end, timestamp, environment_ids):
+        environment_ids = (set(environment_ids) if environment_ids is not None else set()).union(
+            [None]
+        )
+
+        self.validate_arguments(models, environment_ids)
+
+        for rollup, series in self.get_active_series(start, end, timestamp).items():
+            intervals = storage[rollup]
+            for timestamp in series:
+                data = intervals.get(self.normalize_to_rollup(timestamp, rollup))
+                if not data:
+                    continue
+                for model in models:
+                    for key in keys:
+                        for environment_id in environment_ids:
+                            data.pop((model, key, environment_id), None)
+
+    def incr(self, model, key, timestamp=None, count=1, environment_id=None):
+        self.validate_arguments([model], [environment_id])
+
+        environment_ids = {environment_id, None}
+
+        if timestamp is None:
+            timestamp = timezone.now()
+
+        for rollup in self.rollups:
+            data = self._get_interval(
+                self.counters, rollup, self.normalize_to_rollup(timestamp, rollup)
+            )
+            if data is None:
+                continue
+            for environment_id in environment_ids:
+                k = (model, key, environment_id)
+                data[k] = data.get(k, 0) + count
+
+    def merge(self, model, destination, sources, timestamp=None, environment_ids=None):
+        self._merge(self.counters, operator.add, model, destination, sources, environment_ids)
+
+    def delete(self, models, keys, start=None, end=None, timestamp=None, environment_ids=None):
+        self._delete(self.counters, models, keys, start, end, timestamp, environment_ids)
+
+    def get_range(
+        self,
+        model,
+        keys,
+        start,
+        end,
+        rollup=None,
+        environment_ids=None,
+        use_cache=False,
+        jitter_value=None,
+        tenant_ids=None,
+        referrer_suffix=None,
+    ):
+        self.validate_arguments([model], environment_ids if environment_ids is not None else [None])
+
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+
+        intervals = self.counters[rollup]
+        results = {}
+        for key in keys:
+            points = results[key] = []
+            for timestamp in series:
+                data = intervals.get(self.normalize_ts_to_rollup(timestamp, rollup)) or {}
+                if not environment_ids:
+                    value = data.get((model, key, None), 0)
+                else:
+                    value = sum(
+                        data.get((model, key, environment_id), 0)
+                        for environment_id in environment_ids
+                    )
+                points.append((timestamp, int(value)))
+
+        return results
+
+    def record(self, model, key, values, timestamp=None, environment_id=None):
+        self.validate_arguments([model], [environment_id])
+
+        environment_ids = {environment_id, None}
+
+        if timestamp is None:
+            timestamp = timezone.now()
+
+        values = list(values)
+        for rollup in self.rollups:
+            data = self._get_interval(
+                self.distinct_counters, rollup, self.normalize_to_rollup(timestamp, rollup)
+            )
+            if data is None:
+                continue
+            for environment_id in environment_ids:
+                k = (model, key, environment_id)
+                hll = data.get(k)
+                if hll is None:
+                    hll = data[k] = HyperLogLog(self.hll_precision)
+                hll.update(values)
+
+    def get_distinct_counts_series(
+        self, model, keys, start, end=None, rollup=None, environment_id=None
+    ):
+        self.validate_arguments([model], [environment_id])
+
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+
+        results = {}
+        for key in keys:
+            results[key] = [
+                (timestamp, hll.cardinality() if hll is not None else 0)
+                for timestamp, hll in self._iter_values(
+                    self.distinct_counters, rollup, series, model, key, environment_id
+                )
+            ]
+
+        return results
+
+    def _union(self, model, keys, rollup, series, environment_id):
+        result = HyperLogLog(self.hll_precision)
+        for key in keys:
+            for _, hll in self._iter_values(
+                self.distinct_counters, rollup, series, model, key, environment_id
+            ):
+                if hll is not None:
+                    result.merge(hll)
+        return result
+
+    def get_distinct_counts_totals(
+        self,
+        model,
+        keys,
+        start,
+        end=None,
+        rollup=None,
+        environment_id=None,
+        use_cache=False,
+        jitter_value=None,
+        tenant_ids=None,
+        referrer_suffix=None,
+    ):
+        self.validate_arguments([model], [environment_id])
+
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+
+        return {
+            key: self._union(model, [key], rollup, series, environment_id).cardinality()
+            for key in keys
+        }
+
+    def get_distinct_counts_union(
+        self, model, keys, start, end=None, rollup=None, environment_id=None
+    ):
+        self.validate_arguments([model], [environment_id])
+
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+
+        return self._union(model, keys, rollup, series, environment_id).cardinality()
+
+    def merge_distinct_counts(
+        self, model, destination, sources, timestamp=None, environment_ids=None
+    ):
+        def combine(dest, source):
+            dest.merge(source)
+            return dest
+
+        self._merge(self.distinct_counters, combine, model, destination, sources, environment_ids)
+
+    def delete_distinct_counts(
+        self, models, keys, start=None, end=None, timestamp=None, environment_ids=None
+    ):
+        self._delete(self.distinct_counters, models, keys, start, end, timestamp, environment_ids)
+
+    def record_frequency_multi(self, requests, timestamp=None, environment_id=None):
+        environment_ids = {environment_id, None}
+
+        self.validate_arguments([model for model, request in requests], [environment_id])
+
+        if timestamp is None:
+            timestamp = timezone.now()
+
+        for rollup in self.rollups:
+            data = self._get_interval(
+                self.frequencies, rollup, self.normalize_to_rollup(timestamp, rollup)
+            )
+            if data is None:
+                continue
+            for model, request in requests:
+                for key, items in request.items():
+                    items = {k: float(v) for k, v in items.items()}
+                    for environment_id in environment_ids:
+                        k = (model, key, environment_id)
+                        sketch = data.get(k)
+                        if sketch is None:
+                            sketch = data[k] = CountMinSketch(self.sketch_parameters)
+                        sketch.increment(items)
+
+    def get_most_frequent(
+        self, model, keys, start, end=None, rollup=None, limit=None, environment_id=None
+    ):
+        self.validate_arguments([model], [environment_id])
+
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+
+        if limit is None:
+            limit = self.sketch_parameters.capacity
+
+        results = {}
+        for key in keys:
+            sketches = [
+                sketch
+                for _, sketch in self._iter_values(
+                    self.frequencies, rollup, series, model, key, environment_id
+                )
+                if sketch is not None
+            ]
+            if len(sketches) == 1:
+                results[key] = sketches[0].ranked(limit)
+                continue
+
+            # Like the ``RANKED`` command in ``cmsketch.lua``, candidates are
+            # the indexed items of every interval, scored by the sum of their
+            # estimates across all intervals.
+            members = set()
+            for sketch in sketches:
+                members.update(sketch.index)
+            scores = [
+                (member, sum(sketch.estimate(member) for sketch in sketches))
+                for member in members
+            ]
+            results[key] = sorted(scores, key=lambda item: item[1], reverse=True)[:limit]
+
+        return results
+
+    def get_most_frequent_series(
+        self, model, keys, start, end=None, rollup=None, limit=None, environment_id=None
+    ):
+        self.validate_arguments([model], [environment_id])
+
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+
+        results = {}
+        for key in keys:
+            results[key] = [
+                (timestamp, dict(sketch.ranked(limit)) if sketch is not None else {})
+                for timestamp, sketch in self._iter_values(
+                    self.frequencies, rollup, series, model, key, environment_id
+                )
+            ]
+
+        return results
+
+    def get_frequency_series(self, model, items, start, end=None, rollup=None, environment_id=None):
+        self.validate_arguments([model], [environment_id])
+
+        rollup, series = self.get_optimal_rollup_series(start, end, rollup)
+
+        results = {}
+        for key, members in items.items():
+            results[key] = [
+                (
+                    timestamp,
+                    {
+                        member: sketch.estimate(member) if sketch is not None else 0.0
+                        for member in members
+                    },
+                )
+                for timestamp, sketch in self._iter_values(
+                    self.frequencies, rollup, series, model, key, environment_id
+                )
+            ]
+
+        return results
+
+    def get_frequency_totals(self, model, items, start, end=None, rollup=None, environment_id=None):
+        self.validate_arguments([model], [environment_id])
+
+        results = {}
+
+        for key, series in self.get_frequency_series(
+            model, items, start, end, rollup, environment_id
+        ).items():
+            result = results[key] = {}
+            for timestamp, scores in series:
+                for member, score in scores.items():
+                    result[member] = result.get(member, 0.0) + score
+
+        return results
+
+    def merge_frequencies(self, model, destination, sources, timestamp=None, environment_ids=None):
+        def combine(dest, source):
+            dest.merge(source)
+            return dest
+
+        self._merge(self.frequencies, combine, model, destination, sources, environment_ids)
+
+    def delete_frequencies(
+        self, models, keys, start=None, end=None, timestamp=None, environment_ids=None
+    ):
+        self._delete(self.frequencies, models, keys, start, end, timestamp, environment_ids)
@@ -1,6 +1,9 @@
+from __future__ import annotations
+
+import threading
 import zlib
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar
+from typing import Generic, Iterable, TypeVar
 
 import zstandard
 
@@ -92,3 +95,61 @@ class ZstdCodec(Codec[bytes, bytes]):
 
     def decode(self, value: bytes) -> bytes:
         return zstandard.ZstdDecompressor().decompress(value)
+
+
+class ZstdDictCodec(Codec[bytes, bytes]):
+    """
+    zstd compression using a pre-trained dictionary.
+
+    The ID of the dictionary used for compression is written to the frame
+    header, so values remain decodable for as long as their dictionary is part
+    of ``dictionaries``. Frames written without a dictionary decode as well.
+    """
+
+    def __init__(
+        self,
+        dictionary: zstandard.ZstdCompressionDict | None = None,
+        dictionaries: Iterable[zstandard.ZstdCompressionDict] = (),
+        level: int = 3,
+    ) -> None:
+        self.dictionary = dictionary
+        self.dictionaries = {d.dict_id(): d for d in dictionaries}
+        if dictionary is not None:
+            self.dictionaries[dictionary.dict_id()] = dictionary
+        self.level = level
+        # Preparing a dictionary is expensive, so compressors and
+        # decompressors are created once and reused. They are not thread
+        # safe, hence one set of them per thread.
+        self._local = threading.local()
+
+    def _get_compressor(self) -> zstandard.ZstdCompressor:
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = zstandard.ZstdCompressor(level=self.level, dict_data=self.dictionary)
+            self._local.compressor = compressor
+        return compressor
+
+    def _get_decompressor(self, dict_id: int) -> zstandard.ZstdDecompressor:
+        decompressors = getattr(self._local, "decompressors", None)
+        if decompressors is None:
+            decompressors = self._local.decompressors = {}
+
+        decompressor = decompressors.get(dict_id)
+        if decompressor is None:
+            dictionary = None
+            if dict_id:
+                try:
+                    dictionary = self.dictionaries[dict_id]
+                except KeyError:
+                    raise ValueError(f"unknown zstd dictionary: {dict_id}")
+            decompressor = decompressors[dict_id] = zstandard.ZstdDecompressor(
+                dict_data=dictionary
+            )
+        return decompressor
+
+    def encode(self, value: bytes) -> bytes:
+        return self._get_compressor().compress(value)
+
+    def decode(self, value: bytes) -> bytes:
+        dict_id = zstandard.get_frame_parameters(value).dict_id
+        return self._get_decompressor(dict_id).decompress(value)
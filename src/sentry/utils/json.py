@@ -141,6 +141,14 @@ def loads(
             return _default_decoder.decode(value)
 
 
+def raw_decode(value: str, idx: int = 0) -> tuple[JSONData, int]:
+    """
+    Decode the JSON document starting at ``idx`` of ``value`` and return it
+    along with the index it ends at. Anything after the document is ignored.
+    """
+    return _default_decoder.raw_decode(value, idx)
+
+
 def dumps_htmlsafe(value: object) -> SafeString:
     return mark_safe(_default_escaped_encoder.encode(value))
 
@@ -182,4 +190,5 @@ __all__ = (
     "load",
     "loads",
     "prune_empty_keys",
+    "raw_decode",
 )
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Iterable, Mapping, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+__all__ = ["LRUCache"]
+
+_missing = object()
+
+
+class LRUCache(Generic[K, V]):
+    """
+    A thread-safe, in-process least-recently-used cache.
+
+    The cache can be bounded by the number of items (``max_size``), by the
+    accumulated size of the values (``max_bytes``, measured with ``sizeof``)
+    or both. Items older than ``ttl`` seconds are treated as missing.
+
+    >>> cache = LRUCache(max_size=2)
+    >>> cache.set("a", 1)
+    >>> cache.get("a")
+    1
+    """
+
+    def __init__(
+        self,
+        max_size: int | None = None,
+        max_bytes: int | None = None,
+        ttl: float | None = None,
+        sizeof: Callable[[V], int] = len,  # type: ignore[assignment]
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        assert max_size is None or max_size > 0
+        assert max_bytes is None or max_bytes > 0
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.timer = timer
+        self.total_bytes = 0
+        self.evictions = 0
+        # key -> (value, size, expires_at)
+        self._items: OrderedDict[K, tuple[V, int, float | None]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: K) -> bool:
+        return self.get(key, _missing) is not _missing
+
+    def _get(self, key: K, now: float) -> Any:
+        # Must be called with the lock held.
+        item = self._items.get(key)
+        if item is None:
+            return _missing
+        value, size, expires_at = item
+        if expires_at is not None and expires_at <= now:
+            self._pop(key)
+            return _missing
+        self._items.move_to_end(key)
+        return value
+
+    def _pop(self, key: K) -> None:
+        # Must be called with the lock held.
+        item = self._items.pop(key, None)
+        if item is not None:
+            self.total_bytes -= item[1]
+
+    def get(self, key: K, default: Any = None) -> Any:
+        with self._lock:
+            value = self._get(key, self.timer())
+        return default if value is _missing else value
+
+    def get_many(self, keys: Iterable[K]) -> dict[K, V]:
+        """
+        Returns a mapping of the keys which were found in the cache.
+        """
+        rv = {}
+        with self._lock:
+            now = self.timer()
+            for key in keys:
+                value = self._get(key, now)
+                if value is not _missing:
+                    rv[key] = value
+        return rv
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            # Never let a single value flush out the whole cache.
+            self.delete(key)
+            return
+
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            now = self.timer()
+            self._pop(key)
+            self._items[key] = (value, size, now + ttl if ttl is not None else None)
+            self.total_bytes += size
+            self._evict()
+
+    def set_many(self, items: Mapping[K, V], ttl: float | None = None) -> None:
+        for key, value in items.items():
+            self.set(key, value, ttl=ttl)
+
+    def _evict(self) -> None:
+        # Must be called with the lock held.
+        while self._items and (
+            (self.max_size is not None and len(self._items) > self.max_size)
+            or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            _, (_, size, _) = self._items.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+
+    def delete(self, key: K) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def delete_many(self, keys: Iterable[K]) -> None:
+        with self._lock:
+            for key in keys:
+                self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.total_bytes = 0
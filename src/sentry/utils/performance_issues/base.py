@@ -6,7 +6,7 @@ import re
 from abc import ABC, abstractmethod
 from datetime import timedelta
 from enum import Enum
-from typing import Any, ClassVar, Dict, List, Optional, Union, cast
+from typing import Any, ClassVar, Dict, List, Optional, Sequence, Union, cast
 from urllib.parse import parse_qs, urlparse
 
 from sentry import options
@@ -120,6 +120,14 @@ class PerformanceDetector(ABC):
     def event(self) -> dict[str, Any]:
         return self._event
 
+    def span_op_prefixes(self) -> Optional[Sequence[str]]:
+        """
+        Lowercase prefixes of the ops of the spans this detector looks at. Only
+        spans whose op starts with one of them are passed to ``visit_span``,
+        ``None`` (the default) passes every span.
+        """
+        return None
+
     @property
     @abstractmethod
     def settings_key(self) -> DetectorType:
@@ -161,6 +169,17 @@ class PerformanceDetector(ABC):
     def is_event_eligible(cls, event, project: Optional[Project] = None) -> bool:
         return True
 
+    @classmethod
+    def is_detection_enabled(cls, settings: Dict[DetectorType, Any]) -> bool:
+        """
+        Whether detection is turned on in the project settings. Detectors which
+        are turned off are not run at all.
+        """
+        detector_settings = settings[cls.settings_key]  # type: ignore[index]
+        if isinstance(detector_settings, list):
+            detector_settings = detector_settings[0]
+        return detector_settings.get("detection_enabled", True)
+
 
 def does_overlap_previous_span(previous_span: Span, current_span: Span):
     previous_span_ends = timedelta(seconds=previous_span.get("timestamp", 0))
@@ -3,7 +3,7 @@ from __future__ import annotations
 import urllib.parse
 from collections import defaultdict
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Sequence
 
 from sentry import features
 from sentry.issues.grouptype import PerformanceHTTPOverheadGroupType
@@ -57,6 +57,9 @@ class HTTPOverheadDetector(PerformanceDetector):
         self.stored_problems: dict[str, PerformanceProblem] = {}
         self.location_to_indicators = defaultdict(list)
 
+    def span_op_prefixes(self) -> Optional[Sequence[str]]:
+        return ("http.client",)
+
     def visit_span(self, span: Span) -> None:
         span_data = span.get("data", {})
         if not self._is_span_eligible(span) or not span_data:
@@ -3,6 +3,7 @@ from __future__ import annotations
 import hashlib
 import os
 from collections import defaultdict
+from typing import Optional, Sequence
 
 import sentry_sdk
 from symbolic.proguard import ProguardMapper
@@ -39,6 +40,9 @@ class BaseIOMainThreadDetector(PerformanceDetector):
         self.mapper = None
         self.parent_to_blocked_span = defaultdict(list)
 
+    def span_op_prefixes(self) -> Optional[Sequence[str]]:
+        return (self.SPAN_PREFIX,)
+
     def visit_span(self, span: Span):
         if self._is_io_on_main_thread(span) and span.get("op", "").lower().startswith(
             self.SPAN_PREFIX
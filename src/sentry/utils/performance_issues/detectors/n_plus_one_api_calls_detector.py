@@ -54,6 +54,9 @@ class NPlusOneAPICallsDetector(PerformanceDetector):
         self.spans: list[Span] = []
         self.span_hashes = {}
 
+    def span_op_prefixes(self) -> Optional[Sequence[str]]:
+        return self.settings.get("allowed_span_ops", [])
+
     def visit_span(self, span: Span) -> None:
         if not NPlusOneAPICallsDetector.is_span_eligible(span):
             return
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import hashlib
 from datetime import timedelta
-from typing import Optional
+from typing import Optional, Sequence
 
 from sentry import features
 from sentry.issues.grouptype import PerformanceSlowDBQueryGroupType
@@ -35,6 +35,15 @@ class SlowDBQueryDetector(PerformanceDetector):
     def init(self):
         self.stored_problems = {}
 
+    def span_op_prefixes(self) -> Optional[Sequence[str]]:
+        prefixes: list[str] = []
+        for setting in self.settings:
+            allowed_span_ops = setting.get("allowed_span_ops", [])
+            if not allowed_span_ops:
+                return None
+            prefixes.extend(allowed_span_ops)
+        return prefixes
+
     def visit_span(self, span: Span):
         settings_for_span = self.settings_for_span(span)
         if not settings_for_span:
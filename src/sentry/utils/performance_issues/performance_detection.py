@@ -3,7 +3,8 @@ from __future__ import annotations
 import hashlib
 import logging
 import random
-from typing import Any, Dict, List, Optional, Sequence, Tuple
+from time import thread_time
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
 
 import sentry_sdk
 
@@ -36,6 +37,8 @@ from .detectors.uncompressed_asset_detector import UncompressedAssetSpanDetector
 from .performance_problem import PerformanceProblem
 
 PERFORMANCE_GROUP_COUNT_LIMIT = 10
+# Share of events for which the CPU time spent in every detector is recorded.
+DETECTOR_CPU_TIME_SAMPLE_RATE = 0.01
 INTEGRATIONS_OF_INTEREST = [
     "django",
     "flask",
@@ -306,6 +309,23 @@ def get_detection_settings(project_id: Optional[int] = None) -> Dict[DetectorTyp
     }
 
 
+DETECTOR_CLASSES: Sequence[Type[PerformanceDetector]] = (
+    ConsecutiveDBSpanDetector,
+    ConsecutiveHTTPSpanDetector,
+    DBMainThreadDetector,
+    SlowDBQueryDetector,
+    RenderBlockingAssetSpanDetector,
+    NPlusOneDBSpanDetector,
+    NPlusOneDBSpanDetectorExtended,
+    FileIOMainThreadDetector,
+    NPlusOneAPICallsDetector,
+    MNPlusOneDBSpanDetector,
+    UncompressedAssetSpanDetector,
+    LargeHTTPPayloadDetector,
+    HTTPOverheadDetector,
+)
+
+
 def _detect_performance_problems(
     data: dict[str, Any], sdk_span: Any, project: Project
 ) -> List[PerformanceProblem]:
@@ -313,23 +333,14 @@ def _detect_performance_problems(
 
     detection_settings = get_detection_settings(project.id)
     detectors: List[PerformanceDetector] = [
-        ConsecutiveDBSpanDetector(detection_settings, data),
-        ConsecutiveHTTPSpanDetector(detection_settings, data),
-        DBMainThreadDetector(detection_settings, data),
-        SlowDBQueryDetector(detection_settings, data),
-        RenderBlockingAssetSpanDetector(detection_settings, data),
-        NPlusOneDBSpanDetector(detection_settings, data),
-        NPlusOneDBSpanDetectorExtended(detection_settings, data),
-        FileIOMainThreadDetector(detection_settings, data),
-        NPlusOneAPICallsDetector(detection_settings, data),
-        MNPlusOneDBSpanDetector(detection_settings, data),
-        UncompressedAssetSpanDetector(detection_settings, data),
-        LargeHTTPPayloadDetector(detection_settings, data),
-        HTTPOverheadDetector(detection_settings, data),
+        detector_class(detection_settings, data)
+        for detector_class in DETECTOR_CLASSES
+        if detector_class.is_detection_enabled(detection_settings)
     ]
 
-    for detector in detectors:
-        run_detector_on_data(detector, data)
+    run_detectors_on_data(
+        detectors, data, record_cpu_time=DETECTOR_CPU_TIME_SAMPLE_RATE > random.random()
+    )
 
     # Metrics reporting only for detection, not created issues.
     report_metrics_for_detectors(data, event_id, detectors, sdk_span, project.organization)
@@ -381,6 +392,81 @@ def run_detector_on_data(detector, data):
     detector.on_complete()
 
 
+def run_detectors_on_data(
+    detectors: Sequence[PerformanceDetector], data: dict[str, Any], record_cpu_time: bool = False
+) -> None:
+    """
+    Runs detectors on the spans of an event in a single pass. Every span is
+    only visited by the detectors interested in its op, see
+    ``PerformanceDetector.span_op_prefixes``.
+
+    With ``record_cpu_time`` the CPU time spent in every detector is reported
+    as a metric.
+    """
+    detectors = [detector for detector in detectors if detector.is_event_eligible(data)]
+    if not detectors:
+        return
+
+    all_indexes = list(range(len(detectors)))
+    unfiltered_indexes: List[int] = []
+    filtered_indexes: List[Tuple[int, Tuple[str, ...]]] = []
+    for index, detector in enumerate(detectors):
+        prefixes = detector.span_op_prefixes()
+        if prefixes is None:
+            unfiltered_indexes.append(index)
+        else:
+            filtered_indexes.append((index, tuple(prefix.lower() for prefix in prefixes)))
+
+    # Events have few distinct span ops, the detectors of every op are only
+    # looked up once.
+    indexes_by_op: Dict[str, List[int]] = {}
+    cpu_times = [0.0] * len(detectors)
+
+    for span in data.get("spans", []):
+        op = span.get("op") or ""
+        if not isinstance(op, str):
+            indexes = all_indexes
+        else:
+            indexes = indexes_by_op.get(op)
+            if indexes is None:
+                lower_op = op.lower()
+                indexes = indexes_by_op[op] = sorted(
+                    unfiltered_indexes
+                    + [
+                        index
+                        for index, prefixes in filtered_indexes
+                        if lower_op.startswith(prefixes)
+                    ]
+                )
+
+        if record_cpu_time:
+            for index in indexes:
+                start = thread_time()
+                detectors[index].visit_span(span)
+                cpu_times[index] += thread_time() - start
+        else:
+            for index in indexes:
+                detectors[index].visit_span(span)
+
+    if not record_cpu_time:
+        for detector in detectors:
+            detector.on_complete()
+        return
+
+    for index, detector in enumerate(detectors):
+        start = thread_time()
+        detector.on_complete()
+        cpu_times[index] += thread_time() - start
+
+    for detector, cpu_time in zip(detectors, cpu_times):
+        metrics.timing(
+            "performance.performance_issue.detector_cpu_time",
+            cpu_time * 1000,
+            tags={"detector": detector.type.value},
+            sample_rate=1.0,
+        )
+
+
 # Reports metrics and creates spans for detection
 def report_metrics_for_detectors(
     event: Event,
@@ -6,7 +6,7 @@ import os
 import re
 import time
 from collections import namedtuple
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import contextmanager
 from copy import deepcopy
 from datetime import datetime, timedelta, timezone
@@ -29,7 +29,6 @@ import sentry_sdk
 import urllib3
 from dateutil.parser import parse as parse_datetime
 from django.conf import settings
-from django.core.cache import cache
 from sentry_sdk import Hub
 from snuba_sdk import Request
 from snuba_sdk.legacy import json_to_snql
@@ -47,6 +46,12 @@ from sentry.snuba.events import Columns
 from sentry.snuba.referrer import validate_referrer
 from sentry.utils import json, metrics
 from sentry.utils.dates import outside_retention_with_modified_start, to_timestamp
+from sentry.utils.snuba_query_cache import (
+    CachedResult,
+    get_query_cache,
+    get_ttls,
+    is_cached_referrer,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -833,8 +838,9 @@ def get_cache_key(query: SnubaQuery) -> str:
     else:
         hashable = json.dumps(query)
 
-    # sqc - Snuba Query Cache
-    return f"sqc:{sha1(hashable.encode('utf-8')).hexdigest()}"
+    # sqc - Snuba Query Cache. Version 2 stores results together with their
+    # TTLs, see `CachedResult`, which processes using version 1 can't read.
+    return f"sqc2:{sha1(hashable.encode('utf-8')).hexdigest()}"
 
 
 def bulk_raw_query(
@@ -859,29 +865,68 @@ def _apply_cache_and_build_results(
     query_param_list = list(enumerate(snuba_param_list))
 
     results = []
+    # Queries waiting for an identical query of another thread
+    waiting: List[Tuple[int, Future[CachedResult]]] = []
+    # Queries this thread has registered as in flight, and has to resolve
+    pending: Dict[str, Future[CachedResult]] = {}
 
-    if use_cache:
-        cache_keys = [get_cache_key(query_params[0]) for _, query_params in query_param_list]
-        cache_data = cache.get_many(cache_keys)
-        to_query: List[Tuple[int, SnubaQueryBody, Optional[str]]] = []
-        for (query_pos, query_params), cache_key in zip(query_param_list, cache_keys):
-            cached_result = cache_data.get(cache_key)
-            metric_tags = {"referrer": referrer} if referrer else None
-            if cached_result is None:
-                metrics.incr("snuba.query_cache.miss", tags=metric_tags)
-                to_query.append((query_pos, query_params, cache_key))
-            else:
-                metrics.incr("snuba.query_cache.hit", tags=metric_tags)
-                results.append((query_pos, json.loads(cached_result)))
-    else:
-        to_query = [(query_pos, query_params, None) for query_pos, query_params in query_param_list]
-
-    if to_query:
-        query_results = _bulk_snuba_query([item[1] for item in to_query], headers)
-        for result, (query_pos, _, cache_key) in zip(query_results, to_query):
-            if cache_key:
-                cache.set(cache_key, json.dumps(result), settings.SENTRY_SNUBA_CACHE_TTL_SECONDS)
-            results.append((query_pos, result))
+    try:
+        if use_cache or is_cached_referrer(referrer):
+            query_cache = get_query_cache()
+            ttl, stale_ttl = get_ttls(referrer)
+            cache_keys = [get_cache_key(query_params[0]) for _, query_params in query_param_list]
+            cache_data = query_cache.get_many(cache_keys)
+            now = query_cache.timer()
+            to_query: List[Tuple[int, SnubaQueryBody, Optional[str]]] = []
+            to_refresh: List[Tuple[SnubaQueryBody, str]] = []
+            for (query_pos, query_params), cache_key in zip(query_param_list, cache_keys):
+                cached_result = cache_data.get(cache_key)
+                metric_tags = {"referrer": referrer} if referrer else None
+                if cached_result is not None and now < cached_result.fresh_until:
+                    metrics.incr("snuba.query_cache.hit", tags=metric_tags)
+                    results.append((query_pos, cached_result.result))
+                elif cached_result is not None and now < cached_result.stale_until:
+                    metrics.incr("snuba.query_cache.stale", tags=metric_tags)
+                    results.append((query_pos, cached_result.result))
+                    to_refresh.append((query_params, cache_key))
+                else:
+                    metrics.incr("snuba.query_cache.miss", tags=metric_tags)
+                    is_leader, future = query_cache.begin(cache_key)
+                    if is_leader:
+                        pending[cache_key] = future
+                        to_query.append((query_pos, query_params, cache_key))
+                    else:
+                        metrics.incr("snuba.query_cache.coalesced", tags=metric_tags)
+                        waiting.append((query_pos, future))
+
+            if to_refresh:
+                query_cache.refresh(
+                    to_refresh,
+                    lambda queries: _bulk_snuba_query(queries, headers),
+                    ttl,
+                    stale_ttl,
+                )
+        else:
+            to_query = [
+                (query_pos, query_params, None) for query_pos, query_params in query_param_list
+            ]
+
+        if to_query:
+            query_results = _bulk_snuba_query([item[1] for item in to_query], headers)
+            for result, (query_pos, _, cache_key) in zip(query_results, to_query):
+                if cache_key:
+                    item = query_cache.set(cache_key, result, ttl, stale_ttl)
+                    query_cache.finish(cache_key, pending.pop(cache_key), item)
+                results.append((query_pos, result))
+    except BaseException as e:
+        # Never leave a query registered as in flight, identical queries would
+        # wait for it until they time out.
+        for cache_key, future in pending.items():
+            query_cache.finish(cache_key, future, exception=e)
+        raise
+
+    for query_pos, future in waiting:
+        results.append((query_pos, future.result(timeout=settings.SENTRY_SNUBA_TIMEOUT).result))
 
     # Sort so that we get the results back in the original param list order
     results.sort()
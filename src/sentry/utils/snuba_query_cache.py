@@ -0,0 +1,212 @@
+"""
+A two-tier cache for Snuba query results.
+
+Results are cached in the Django cache, which is shared by all processes,
+and optionally in a small per-process LRU in front of it (configured through
+``SENTRY_SNUBA_LOCAL_CACHE``). On top of that:
+
+- identical queries running at the same time in the same process are
+  coalesced into one Snuba query (only within a process: identical misses of
+  different processes each still query Snuba, until one of them has stored
+  the result),
+- the TTL can be configured per referrer (``snuba.query-cache.referrer-ttls``,
+  which also enables caching for all queries of the listed referrers), and
+- results can be served for ``snuba.query-cache.stale-ttl`` seconds after
+  they expired, while a single process refreshes them in the background.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Mapping, MutableMapping, NamedTuple, Sequence
+
+from django.conf import settings
+from django.core.cache import cache
+
+from sentry import options
+from sentry.utils import json, metrics
+from sentry.utils.lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+#: How long a process may take to refresh a stale result before another one
+#: is allowed to try.
+REFRESH_LOCK_TTL = 30
+
+
+_refresh_executor: ThreadPoolExecutor | None = None
+_refresh_executor_lock = threading.Lock()
+
+
+def _get_refresh_executor() -> ThreadPoolExecutor:
+    """
+    Returns the thread pool shared by all query caches to refresh stale
+    results in the background.
+    """
+    global _refresh_executor
+
+    if _refresh_executor is None:
+        with _refresh_executor_lock:
+            if _refresh_executor is None:
+                _refresh_executor = ThreadPoolExecutor(
+                    max_workers=2, thread_name_prefix="snuba-query-cache-refresh"
+                )
+                atexit.register(_refresh_executor.shutdown, False)
+    return _refresh_executor
+
+
+class CachedResult(NamedTuple):
+    fresh_until: float
+    stale_until: float
+    # The serialized result, so that every reader gets its own copy.
+    payload: str
+
+    @property
+    def result(self) -> Any:
+        return json.loads(self.payload)
+
+
+def get_ttls(referrer: str | None) -> tuple[int, int]:
+    """
+    Returns how long results of ``referrer`` are fresh, and how long they may
+    be served stale after that.
+    """
+    ttl = options.get("snuba.query-cache.referrer-ttls").get(
+        referrer or "", settings.SENTRY_SNUBA_CACHE_TTL_SECONDS
+    )
+    return int(ttl), int(options.get("snuba.query-cache.stale-ttl"))
+
+
+def is_cached_referrer(referrer: str | None) -> bool:
+    return bool(referrer) and referrer in options.get("snuba.query-cache.referrer-ttls")
+
+
+class SnubaQueryCache:
+    def __init__(
+        self,
+        local_cache: LRUCache[str, CachedResult] | None = None,
+        timer: Callable[[], float] = time.time,
+    ) -> None:
+        self.local_cache = local_cache
+        self.timer = timer
+        self._inflight: MutableMapping[str, Future[CachedResult]] = {}
+        self._inflight_lock = threading.Lock()
+
+    def get_many(self, keys: Sequence[str]) -> dict[str, CachedResult]:
+        now = self.timer()
+        rv = self.local_cache.get_many(keys) if self.local_cache is not None else {}
+        # Another process may have refreshed what is stale locally.
+        missing = [key for key in keys if key not in rv or rv[key].fresh_until <= now]
+        if not missing:
+            return rv
+
+        for key, value in cache.get_many(missing).items():
+            item = CachedResult(*value)
+            if key not in rv or item.fresh_until > rv[key].fresh_until:
+                rv[key] = item
+                if self.local_cache is not None and item.stale_until > now:
+                    self.local_cache.set(key, item, ttl=item.stale_until - now)
+        return rv
+
+    def set(self, key: str, result: Any, ttl: int, stale_ttl: int) -> CachedResult:
+        now = self.timer()
+        item = CachedResult(now + ttl, now + ttl + stale_ttl, json.dumps(result))
+        cache.set(key, tuple(item), ttl + stale_ttl)
+        if self.local_cache is not None:
+            self.local_cache.set(key, item, ttl=ttl + stale_ttl)
+        return item
+
+    def begin(self, key: str) -> tuple[bool, Future[CachedResult]]:
+        """
+        Registers a query for ``key``. Returns whether the caller is the first
+        to query it and has to resolve the returned future with `finish`, or
+        whether it should wait for the query already in flight.
+        """
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return False, future
+            future = self._inflight[key] = Future()
+            return True, future
+
+    def finish(
+        self,
+        key: str,
+        future: Future[CachedResult],
+        item: CachedResult | None = None,
+        exception: BaseException | None = None,
+    ) -> None:
+        with self._inflight_lock:
+            self._inflight.pop(key, None)
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(item)  # type: ignore[arg-type]
+
+    def refresh(
+        self,
+        queries: Iterable[tuple[Any, str]],
+        query_fn: Callable[[Sequence[Any]], Sequence[Any]],
+        ttl: int,
+        stale_ttl: int,
+    ) -> Future[None] | None:
+        """
+        Refreshes the results of the ``(query, key)`` pairs in the background,
+        unless another process is refreshing them already. Returns the future
+        of the refresh, if one was started.
+        """
+        queries = [
+            (query, key)
+            for query, key in queries
+            if cache.add(f"{key}:refresh", 1, REFRESH_LOCK_TTL)
+        ]
+        if not queries:
+            return None
+        return _get_refresh_executor().submit(self._refresh, queries, query_fn, ttl, stale_ttl)
+
+    def _refresh(
+        self,
+        queries: Sequence[tuple[Any, str]],
+        query_fn: Callable[[Sequence[Any]], Sequence[Any]],
+        ttl: int,
+        stale_ttl: int,
+    ) -> None:
+        try:
+            results = query_fn([query for query, _ in queries])
+            for result, (_, key) in zip(results, queries):
+                self.set(key, result, ttl, stale_ttl)
+            metrics.incr("snuba.query_cache.refresh", amount=len(queries))
+        except Exception:
+            logger.exception("snuba.query_cache.refresh_failed")
+        finally:
+            cache.delete_many([f"{key}:refresh" for _, key in queries])
+
+
+_query_cache_lock = threading.Lock()
+_query_cache: tuple[Mapping[str, Any], SnubaQueryCache] | None = None
+
+
+def get_query_cache() -> SnubaQueryCache:
+    """
+    Returns the process-wide query cache, with a local LRU if
+    ``SENTRY_SNUBA_LOCAL_CACHE`` configures one.
+    """
+    global _query_cache
+
+    local_options = settings.SENTRY_SNUBA_LOCAL_CACHE
+    query_cache = _query_cache
+    if query_cache is None or query_cache[0] is not local_options:
+        with _query_cache_lock:
+            query_cache = _query_cache
+            if query_cache is None or query_cache[0] is not local_options:
+                local_cache: LRUCache[str, CachedResult] | None = (
+                    LRUCache(sizeof=lambda item: len(item.payload), **local_options)
+                    if local_options
+                    else None
+                )
+                query_cache = _query_cache = (local_options, SnubaQueryCache(local_cache))
+    return query_cache[1]
@@ -1,7 +1,7 @@
 import datetime
 import os
 from datetime import timedelta
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import pytest
 from django.test import SimpleTestCase
@@ -14,6 +14,8 @@ from sentry.api.event_search import (
     SearchFilter,
     SearchKey,
     SearchValue,
+    _result_cache,
+    _tree_cache,
     parse_search_query,
 )
 from sentry.constants import MODULE_ROOT
@@ -705,3 +707,71 @@ def test_search_value_to_query_string(value, expected_query_string):
     actual = search_value.to_query_string()
 
     assert actual == expected_query_string
+
+
+def benchmark_available() -> bool:
+    try:
+        __import__("pytest_benchmark")
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+# Queries as sent by the issue stream, discover, alerts and performance.
+BENCHMARK_QUERIES = [
+    "is:unresolved",
+    "is:unresolved is:for_review assigned_or_suggested:[me, none]",
+    "is:unresolved firstRelease:latest",
+    "event.type:transaction transaction.duration:>5s",
+    "event.type:error !message:*timeout* environment:production",
+    "transaction:/api/0/organizations/{organization_slug}/events/ http.method:GET",
+    "(browser.name:Chrome OR browser.name:Firefox) AND os.name:Windows",
+    "event.type:transaction transaction.op:pageload measurements.lcp:>2.5s",
+    "release:[frontend@1.2.3, frontend@1.2.4] !user.email:*@example.com",
+    "p95(transaction.duration):>300ms count():>100 has:user.id",
+    'message:"Connection reset by peer" level:error error.handled:false',
+    "event.type:error error.type:[TypeError, ValueError] stack.filename:*.py",
+]
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("cached", [False, True])
+def test_benchmark_parse_search_query(benchmark, cached):
+    def run():
+        if not cached:
+            _tree_cache.clear()
+            _result_cache.clear()
+        for query in BENCHMARK_QUERIES:
+            parse_search_query(query)
+
+    benchmark(run)
+
+
+def test_parse_search_query_is_cached():
+    query = "event.type:error release:[a, b] !user.email:*@example.com"
+    result = parse_search_query(query)
+    result.append("garbage")
+
+    with patch("sentry.api.event_search.SearchVisitor.visit") as visit:
+        cached = parse_search_query(query)
+    assert not visit.called
+    assert cached == result[:-1]
+
+    # Another config yields another result.
+    remapped = parse_search_query(query, config=SearchConfig(key_mappings={"env": ["release"]}))
+    assert remapped[1].key.name == "env"
+    # Queries with a custom builder are not cached, but share the parse tree.
+    with patch("sentry.api.event_search.event_search_grammar.parse") as parse:
+        parse_search_query(query, builder=Mock())
+    assert not parse.called
+
+
+def test_parse_search_query_relative_dates_not_cached():
+    now = timezone.now()
+    with freeze_time(now):
+        parse_search_query("time:-2w")
+    with freeze_time(now + timedelta(hours=1)):
+        assert parse_search_query("time:-2w")[0].value.raw_value == (
+            now + timedelta(hours=1) - timedelta(days=14)
+        )
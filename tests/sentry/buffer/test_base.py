@@ -75,3 +75,28 @@ class BufferTest(TestCase):
         self.buf.process(Group, columns, filters, {"last_seen": the_date}, signal_only=True)
         group.refresh_from_db()
         assert group.times_seen == prev_times_seen
+
+    def test_process_batch(self):
+        groups = [Group.objects.create(project=Project(id=1)) for _ in range(2)]
+        the_date = timezone.now() + timedelta(days=5)
+        leftover = self.buf.process_batch(
+            Group,
+            [
+                ({"times_seen": 2}, {"id": groups[0].id}, {"last_seen": the_date}),
+                ({"times_seen": 3}, {"id": groups[1].id}, {"last_seen": the_date}),
+                ({"times_seen": 1}, {"id": groups[1].id, "project_id": 1}, {}),
+            ],
+        )
+        assert leftover == [({"times_seen": 1}, {"id": groups[1].id, "project_id": 1}, {})]
+        for group, incr in zip(groups, (2, 3)):
+            group_ = Group.objects.get(id=group.id)
+            assert group_.times_seen == group.times_seen + incr
+            assert group_.last_seen == the_date
+
+    def test_process_batch_falls_back_when_update_fails(self):
+        group = Group.objects.create(project=Project(id=1))
+        update = ({"times_seen": 2}, {"id": group.id}, {})
+        with mock.patch.object(self.buf, "_bulk_update", side_effect=Exception("boom")):
+            leftover = self.buf.process_batch(Group, [update])
+        assert leftover == [update]
+        assert Group.objects.get(id=group.id).times_seen == group.times_seen
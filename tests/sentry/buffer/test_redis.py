@@ -3,6 +3,7 @@ import pickle
 from unittest import mock
 
 import pytest
+from celery.signals import task_postrun
 from django.utils import timezone
 
 from sentry import options
@@ -57,6 +58,43 @@ class TestRedisBuffer:
         client = self.buf.get_routing_client()
         assert client.zrange("b:p", 0, -1) == []
 
+    @mock.patch("sentry.buffer.redis.process_incr")
+    def test_process_pending_streaming(self, process_incr):
+        self.buf.incr_batch_size = 2
+        self.buf.pending_drain_chunk_size = 2
+        client = self.buf.get_routing_client()
+        client.zadd("b:p", {"foo": 1, "bar": 2, "baz": 3})
+        self.buf.process_pending()
+        assert process_incr.apply_async.mock_calls == [
+            mock.call(kwargs={"batch_keys": ["foo", "bar"]}),
+            mock.call(kwargs={"batch_keys": ["baz"]}),
+        ]
+        assert client.zrange("b:p", 0, -1) == []
+        assert client.get("l:b:p") is None
+
+    @mock.patch("sentry.buffer.redis.process_incr")
+    def test_process_pending_streaming_dispatch_failure(self, process_incr):
+        self.buf.incr_batch_size = 2
+        self.buf.pending_drain_chunk_size = 2
+        process_incr.apply_async.side_effect = Exception("boom")
+        client = self.buf.get_routing_client()
+        client.zadd("b:p", {"foo": 1, "bar": 2})
+        with pytest.raises(Exception):
+            self.buf.process_pending()
+        assert len(client.zrange("b:p", 0, -1)) == 2
+        assert client.get("l:b:p") is None
+
+    @mock.patch("sentry.buffer.redis.process_incr")
+    def test_process_pending_streaming_time_budget(self, process_incr):
+        self.buf.pending_drain_chunk_size = 1
+        self.buf.pending_drain_time_budget = 0
+        client = self.buf.get_routing_client()
+        client.zadd("b:p", {"foo": 1, "bar": 2})
+        self.buf.process_pending()
+        assert not process_incr.apply_async.called
+        assert len(client.zrange("b:p", 0, -1)) == 2
+        assert client.get("l:b:p") is None
+
     @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
     @mock.patch("sentry.buffer.base.Buffer.process")
     def test_process_does_bubble_up_json(self, process):
@@ -120,6 +158,71 @@ class TestRedisBuffer:
         group = Group.objects.get_from_cache(id=default_group.id)
         assert group.times_seen == orig_times_seen + times_seen_incr
 
+    @django_db_all
+    @freeze_time()
+    def test_bulk_process_coalesces_updates(self, default_project, task_runner):
+        self.buf.bulk_process = True
+        self.buf.incr_batch_size = 10
+        groups = [Group.objects.create(project=default_project, times_seen=1) for _ in range(3)]
+        last_seen = timezone.now()
+        for i, group in enumerate(groups):
+            self.buf.incr(Group, {"times_seen": i + 1}, {"id": group.id}, {"last_seen": last_seen})
+
+        with mock.patch("sentry.buffer.base.buffer_incr_complete") as signal, mock.patch(
+            "sentry.buffer.redis.RedisBuffer._process"
+        ) as process, task_runner(), mock.patch("sentry.buffer", self.buf):
+            self.buf.process_pending()
+
+        assert not process.called
+        assert len(signal.send_robust.mock_calls) == 3
+        for i, group in enumerate(groups):
+            group = Group.objects.get_from_cache(id=group.id)
+            assert group.times_seen == 1 + i + 1
+            assert group.last_seen == last_seen
+        client = self.buf.get_routing_client()
+        assert client.zrange("b:p", 0, -1) == []
+
+    @django_db_all
+    def test_bulk_process_falls_back_for_non_pk_filters(self, default_project):
+        self.buf.bulk_process = True
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        self.buf.incr(model, {"times_seen": 1}, {"project_id": 1})
+        self.buf.incr(model, {"times_seen": 1}, {"project_id": 2})
+        keys = [
+            self.buf._make_key(model, {"project_id": 1}),
+            self.buf._make_key(model, {"project_id": 2}),
+        ]
+
+        with mock.patch("sentry.buffer.redis.import_string", return_value=model), mock.patch(
+            "sentry.buffer.redis.RedisBuffer._process"
+        ) as process:
+            self.buf.process(batch_keys=keys)
+
+        assert process.mock_calls == [
+            mock.call(model, {"times_seen": 1}, {"project_id": 1}, {}),
+            mock.call(model, {"times_seen": 1}, {"project_id": 2}, {}),
+        ]
+
+    @django_db_all
+    def test_bulk_process_fallback_continues_after_failure(self, default_project):
+        self.buf.bulk_process = True
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        self.buf.incr(model, {"times_seen": 1}, {"project_id": 1})
+        self.buf.incr(model, {"times_seen": 1}, {"project_id": 2})
+        keys = [
+            self.buf._make_key(model, {"project_id": 1}),
+            self.buf._make_key(model, {"project_id": 2}),
+        ]
+
+        with mock.patch("sentry.buffer.redis.import_string", return_value=model), mock.patch(
+            "sentry.buffer.redis.RedisBuffer._process", side_effect=[Exception("boom"), None]
+        ) as process:
+            self.buf.process(batch_keys=keys)
+
+        assert process.call_count == 2
+
     def test_get(self):
         model = mock.Mock()
         model.__name__ = "Mock"
@@ -132,6 +235,94 @@ class TestRedisBuffer:
         self.buf.incr(model, {"times_seen": 5}, filters)
         assert self.buf.get(model, columns, filters=filters) == {"times_seen": 6}
 
+    def test_incr_local_aggregation(self):
+        self.buf.local_aggregation_window = 60
+        self.buf.local_aggregation_max_events = 3
+        client = self.buf.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        filters = {"pk": 1}
+        key = self.buf._make_key(model, filters=filters)
+
+        self.buf.incr(model, {"times_seen": 1}, filters)
+        self.buf.incr(model, {"times_seen": 2}, filters)
+        # Nothing hits Redis until the window passes or the limit is reached
+        assert client.hgetall(key) == {}
+        assert client.zrange("b:p", 0, -1) == []
+        assert self.buf.get(model, ["times_seen"], filters=filters) == {"times_seen": 3}
+
+        self.buf.incr(model, {"times_seen": 4}, filters)
+        assert self.buf.get(model, ["times_seen"], filters=filters) == {"times_seen": 7}
+        result = client.hget(key, "i+times_seen")
+        assert int(result) == 7
+        assert len(client.zrange("b:p", 0, -1)) == 1
+
+    def test_flush_local_buffer(self):
+        self.buf.local_aggregation_window = 60
+        client = self.buf.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        self.buf.incr(model, {"times_seen": 1}, {"pk": 1})
+        self.buf.incr(model, {"times_seen": 1}, {"pk": 2}, signal_only=True)
+        self.buf.flush_local_buffer()
+        assert int(client.hget(self.buf._make_key(model, {"pk": 1}), "i+times_seen")) == 1
+        assert client.hget(self.buf._make_key(model, {"pk": 2}), "s") in ("1", b"1")
+        assert len(client.zrange("b:p", 0, -1)) == 2
+        # A second flush has nothing left to write
+        self.buf.flush_local_buffer()
+        assert int(client.hget(self.buf._make_key(model, {"pk": 1}), "i+times_seen")) == 1
+
+    def test_flush_local_buffer_failure_keeps_increments(self):
+        self.buf.local_aggregation_window = 60
+        client = self.buf.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        key = self.buf._make_key(model, {"pk": 1})
+        add_incr_to_pipeline = self.buf._add_incr_to_pipeline
+
+        def add_to_failing_pipeline(pipe, *args):
+            add_incr_to_pipeline(pipe, *args)
+            pipe.execute = mock.Mock(side_effect=ConnectionError("unavailable"))
+
+        self.buf.incr(model, {"times_seen": 2}, {"pk": 1}, extra={"foo": "old"})
+        with mock.patch.object(
+            self.buf, "_add_incr_to_pipeline", side_effect=add_to_failing_pipeline
+        ):
+            with pytest.raises(ConnectionError):
+                self.buf.flush_local_buffer()
+        assert client.hgetall(key) == {}
+        assert self.buf.get(model, ["times_seen"], filters={"pk": 1}) == {"times_seen": 2}
+        assert self.buf._local_buffer_events == 1
+
+        # Newer increments are merged with the ones that failed to flush
+        self.buf.incr(model, {"times_seen": 1}, {"pk": 1}, extra={"foo": "new"})
+        assert self.buf._local_buffer[key]["columns"] == {"times_seen": 3}
+        assert self.buf._local_buffer[key]["extra"] == {"foo": "new"}
+        self.buf.flush_local_buffer()
+        assert int(client.hget(key, "i+times_seen")) == 3
+        assert self.buf._local_buffer == {}
+
+    def test_incr_local_aggregation_validates_eagerly(self):
+        self.buf.local_aggregation_window = 60
+        model = mock.Mock()
+        model.__name__ = "Mock"
+
+        with pytest.raises(TypeError):
+            self.buf.incr(model, {"times_seen": "1"}, {"pk": 1})
+        assert self.buf._local_buffer == {}
+
+    def test_local_buffer_flushed_after_task(self):
+        # Uses the cluster configured by the `buffer` fixture.
+        buf = RedisBuffer(local_aggregation_window=60)
+        client = buf.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+
+        buf.incr(model, {"times_seen": 1}, {"pk": 1})
+        assert client.hgetall(buf._make_key(model, {"pk": 1})) == {}
+        task_postrun.send(sender=None)
+        assert int(client.hget(buf._make_key(model, {"pk": 1}), "i+times_seen")) == 1
+
     def test_incr_saves_to_redis(self):
         now = datetime.datetime(2017, 5, 3, 6, 6, 6, tzinfo=timezone.utc)
         client = self.buf.get_routing_client()
@@ -12,6 +12,7 @@ from sentry.debug_files.artifact_bundle_indexing import (
     BundleManifest,
     BundleMeta,
     FlatFileIndex,
+    FlatFileIndexView,
     backfill_artifact_index_updates,
     get_all_deletions_key,
     get_deletion_key,
@@ -617,6 +618,39 @@ class FlatFileIndexTest(FlatFileTestCase):
             "files_by_debug_id": {},
         }
 
+    def test_flat_file_index_binary_roundtrip(self):
+        now = timezone.now()
+        json_index = {
+            "is_complete": False,
+            "bundles": [
+                {"bundle_id": "artifact_bundle/3", "timestamp": now.isoformat()},
+                {"bundle_id": "artifact_bundle/5", "timestamp": (now + timedelta(1)).isoformat()},
+            ],
+            "files_by_url": {"~/path/to/app.js": [0, 1], "~/b.js": [1], "~/ä.js": [0]},
+            "files_by_debug_id": {"f206e0e7-3d0c-41cb-bccc-11b716728e27": [1]},
+        }
+        flat_file_index = FlatFileIndex()
+        flat_file_index.from_json(json.dumps(json_index))
+        binary_index = flat_file_index.to_binary()
+
+        view = FlatFileIndexView(memoryview(binary_index))
+        assert not view.is_complete
+        assert [bundle.id for bundle in view.bundles] == [3, 5]
+        assert view.get_bundle_indexes_by_url("~/path/to/app.js") == [0, 1]
+        assert view.get_bundle_indexes_by_url("~/ä.js") == [0]
+        assert view.get_bundle_indexes_by_url("~/a.js") == []
+        assert view.get_bundle_indexes_by_url("~/zzz.js") == []
+        assert view.get_bundle_indexes_by_debug_id("f206e0e7-3d0c-41cb-bccc-11b716728e27") == [1]
+        assert view.get_bundle_indexes_by_debug_id("00000000-0000-0000-0000-000000000000") == []
+
+        roundtripped = FlatFileIndex()
+        roundtripped.from_binary(binary_index)
+        assert json.loads(roundtripped.to_json()) == json_index
+        assert roundtripped.to_binary() == binary_index
+
+        with pytest.raises(ValueError):
+            FlatFileIndexView(b"{}")
+
     # The first "bundle limit" test needs 2 minutes to run, the complete test
     # does not finish at all in reasonable time.
     # I'm just losing my mind how python / pytest can be *this* slow?
@@ -34,11 +34,13 @@ from sentry.dynamic_sampling import (
 from sentry.event_manager import (
     EventManager,
     HashDiscarded,
+    TransactionBatchSaveError,
     _get_event_instance,
     _save_grouphash_and_group,
     get_event_type,
     has_pending_commit_resolution,
     materialize_metadata,
+    save_transactions_batch,
 )
 from sentry.eventstore.models import Event
 from sentry.grouping.utils import hash_from_values
@@ -1482,6 +1484,54 @@ class EventManagerTest(TestCase, SnubaTestCase, EventManagerTestMixin, Performan
         # the basic strategy is to simply use the description
         assert spans == [{"hash": hash_values([span["description"]])} for span in data["spans"]]
 
+    def _make_transaction_managers(self, count):
+        managers = []
+        for _ in range(count):
+            manager = EventManager(
+                make_event(
+                    transaction="wait",
+                    contexts={
+                        "trace": {
+                            "parent_span_id": "bce14471e0e9654d",
+                            "op": "foobar",
+                            "trace_id": "a0fa8803753e40fd8124b21eeb2986b5",
+                            "span_id": "bf5be759039ede9a",
+                        }
+                    },
+                    spans=[],
+                    timestamp="2019-06-14T14:01:40Z",
+                    start_timestamp="2019-06-14T14:01:40Z",
+                    type="transaction",
+                )
+            )
+            manager.normalize()
+            managers.append(manager)
+        return managers
+
+    def test_save_transactions_batch(self):
+        managers = self._make_transaction_managers(2)
+
+        events = save_transactions_batch(self.project.id, managers, [None, None])
+
+        assert [event.event_id for event in events] == [
+            manager.get_data()["event_id"] for manager in managers
+        ]
+        for event in events:
+            assert event.data["type"] == "transaction"
+            assert event.project.organization == self.project.organization
+
+    @mock.patch("sentry.event_manager.eventstream.backend.insert")
+    def test_save_transactions_batch_partial_failure(self, eventstream_insert):
+        eventstream_insert.side_effect = [None, Exception("boom"), None]
+        managers = self._make_transaction_managers(3)
+
+        with pytest.raises(TransactionBatchSaveError) as excinfo:
+            save_transactions_batch(self.project.id, managers, [None, None, None])
+
+        # Only the first event made it into the eventstream.
+        assert excinfo.value.persisted == [0]
+        assert eventstream_insert.call_count == 2
+
     def test_sdk(self):
         manager = EventManager(make_event(**{"sdk": {"name": "sentry-unity", "version": "1.0"}}))
         manager.normalize()
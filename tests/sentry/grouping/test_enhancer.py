@@ -5,7 +5,12 @@ from typing import Any
 import pytest
 
 from sentry.grouping.component import GroupingComponent
-from sentry.grouping.enhancer import Enhancements
+from sentry.grouping.enhancer import (
+    ENHANCEMENT_BASES,
+    CompiledRule,
+    Enhancements,
+    _get_frames_by_family,
+)
 from sentry.grouping.enhancer.exceptions import InvalidEnhancerConfig
 from sentry.grouping.enhancer.matchers import create_match_frame
 
@@ -448,3 +453,82 @@ def test_app_no_matches(frame):
     enhancements = Enhancements.from_config_string("app:no +app")
     enhancements.apply_modifications_to_frame([frame], "native", None)
     assert frame.get("in_app")
+
+
+def test_compiled_rules_match_like_rules():
+    enhancements = Enhancements.from_config_string(
+        """
+        family:native function:std::*                  -app
+        family:native,javascript !package:/usr/lib/**  +app
+        family:javascript path:**/node_modules/**      -group
+        [ function:foo ] | function:bar                +group
+        function:bar | [ category:telemetry ]          ^-group
+        !family:native category:telemetry              v-group
+        type:ValueError function:baz                   +app
+        app:yes                                        max-frames=3
+        """
+    )
+    frames = [
+        {"function": "std::abort", "package": "/usr/lib/libc.so", "platform": "native"},
+        {"function": "main", "package": "/app/main", "platform": "native"},
+        {"function": "foo", "abs_path": "/app/node_modules/foo.js", "platform": "javascript"},
+        {"function": "bar", "abs_path": "/app/src/bar.js", "platform": "javascript"},
+        {"function": "baz", "data": {"category": "telemetry"}},
+        {"function": "bar", "abs_path": "/app/src/bar.js", "platform": "javascript"},
+        {"function": "baz", "data": {"category": "telemetry"}},
+    ]
+
+    for exception_data in (None, {"type": "ValueError"}, {"type": "TypeError"}):
+        match_frames = [create_match_frame(frame, "python") for frame in frames]
+        frames_by_family = _get_frames_by_family(match_frames)
+        match_cache: dict[Any, bool] = {}
+        for rule in enhancements.rules:
+            assert CompiledRule(rule).get_matching_frame_actions(
+                match_frames, frames_by_family, "python", exception_data, {}, match_cache
+            ) == rule.get_matching_frame_actions(match_frames, "python", exception_data, {})
+
+
+def test_compiled_rules_see_modified_frames():
+    enhancements = Enhancements.from_config_string(
+        """
+        function:foo                   category=telemetry
+        category:telemetry             +app
+        [ app:yes ] | function:bar     category=internal
+        """
+    )
+    frames = [{"function": "foo"}, {"function": "bar"}, {"function": "foo"}]
+    enhancements.apply_modifications_to_frame(frames, "python", None)
+
+    assert [frame.get("in_app") for frame in frames] == [True, None, True]
+    assert [frame.get("data", {}).get("category") for frame in frames] == [
+        "telemetry",
+        "internal",
+        "telemetry",
+    ]
+
+
+def test_loads_is_cached():
+    enhancements = Enhancements.from_config_string("function:foo +app", bases=["common:2019-03-23"])
+    dumped = enhancements.dumps()
+
+    loaded = Enhancements.loads(dumped)
+    cached = Enhancements.loads(dumped)
+    assert cached is not loaded
+    assert cached._modifier_rules[-1] is loaded._modifier_rules[-1]
+    assert loaded._to_config_structure() == enhancements._to_config_structure()
+    assert (
+        len(loaded._modifier_rules)
+        == len(ENHANCEMENT_BASES["common:2019-03-23"]._modifier_rules) + 1
+    )
+
+
+def test_loads_returns_copy():
+    dumped = Enhancements.from_config_string("function:foo +app").dumps()
+
+    loaded = Enhancements.loads(dumped)
+    loaded.bases.append("common:2019-03-23")
+    loaded.id = "modified"
+
+    fresh = Enhancements.loads(dumped)
+    assert fresh.bases == []
+    assert fresh.id is None
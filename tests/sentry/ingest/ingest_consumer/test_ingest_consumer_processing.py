@@ -3,17 +3,23 @@ import time
 import uuid
 import zipfile
 from io import BytesIO
+from unittest import mock
 from unittest.mock import Mock
 
+import msgpack
 import pytest
+from arroyo.backends.kafka.consumer import KafkaPayload
+from arroyo.types import BrokerValue, Message, Partition, Topic, Value
 
 from sentry.event_manager import EventManager
 from sentry.ingest.consumer.processors import (
     process_attachment_chunk,
     process_event,
+    process_event_batch,
     process_individual_attachment,
     process_userreport,
 )
+from sentry.ingest.consumer.simple_event import process_simple_event_batch
 from sentry.models.debugfile import create_files_from_dif_zip
 from sentry.models.eventattachment import EventAttachment
 from sentry.models.eventuser import EventUser
@@ -48,6 +54,13 @@ def save_event_transaction(monkeypatch):
     return mock
 
 
+@pytest.fixture
+def save_event_transaction_batch(monkeypatch):
+    mock = Mock()
+    monkeypatch.setattr("sentry.ingest.consumer.processors.save_event_transaction_batch", mock)
+    return mock
+
+
 @pytest.fixture
 def preprocess_event(monkeypatch):
     calls = []
@@ -138,6 +151,143 @@ def test_transactions_spawn_save_event_transaction(
     )
 
 
+@django_db_all
+def test_transaction_batches_spawn_save_event_transaction_batch(
+    default_project,
+    task_runner,
+    preprocess_event,
+    save_event_transaction,
+    save_event_transaction_batch,
+):
+    project_id = default_project.id
+    now = datetime.datetime.now()
+    start_time = time.time() - 3600
+
+    messages = []
+    for _ in range(3):
+        payload = get_normalized_event(
+            {
+                "type": "transaction",
+                "timestamp": now.isoformat(),
+                "start_timestamp": now.isoformat(),
+                "spans": [],
+                "contexts": {
+                    "trace": {"trace_id": uuid.uuid4().hex, "span_id": "babaae0d4b7512d9"}
+                },
+            },
+            default_project,
+        )
+        messages.append(payload)
+    error = get_normalized_event({"message": "hello world"}, default_project)
+    messages.append(error)
+
+    process_event_batch(
+        [
+            (
+                {
+                    "payload": json.dumps(payload),
+                    "start_time": start_time,
+                    "event_id": payload["event_id"],
+                    "project_id": project_id,
+                    "remote_addr": "127.0.0.1",
+                },
+                default_project,
+            )
+            for payload in messages
+        ],
+        max_save_batch_size=2,
+    )
+
+    assert not save_event_transaction.delay.called
+    assert [call[1] for call in save_event_transaction_batch.delay.call_args_list] == [
+        dict(
+            cache_keys=[f"e:{payload['event_id']}:{project_id}" for payload in chunk],
+            start_times=[start_time] * len(chunk),
+            event_ids=[payload["event_id"] for payload in chunk],
+            project_id=project_id,
+        )
+        for chunk in (messages[:2], messages[2:3])
+    ]
+
+    (kwargs,) = preprocess_event
+    assert kwargs["event_id"] == error["event_id"]
+
+
+@django_db_all
+def test_event_batch_deduplicates_events(
+    default_project, task_runner, save_event_transaction_batch
+):
+    project_id = default_project.id
+    now = datetime.datetime.now()
+    start_time = time.time() - 3600
+    payload = get_normalized_event(
+        {
+            "type": "transaction",
+            "timestamp": now.isoformat(),
+            "start_timestamp": now.isoformat(),
+            "spans": [],
+            "contexts": {"trace": {"trace_id": uuid.uuid4().hex, "span_id": "babaae0d4b7512d9"}},
+        },
+        default_project,
+    )
+    message = {
+        "payload": json.dumps(payload),
+        "start_time": start_time,
+        "event_id": payload["event_id"],
+        "project_id": project_id,
+        "remote_addr": "127.0.0.1",
+    }
+
+    process_event_batch([(message, default_project), (message, default_project)], 10)
+
+    ((_, kwargs),) = save_event_transaction_batch.delay.call_args_list
+    assert kwargs["event_ids"] == [payload["event_id"]]
+
+
+@django_db_all
+def test_simple_event_batch_prefetches_projects(default_project, task_runner, preprocess_event):
+    start_time = time.time() - 3600
+    payloads = [get_normalized_event({"message": "hello world"}, default_project) for _ in range(2)]
+    values = [
+        BrokerValue(
+            KafkaPayload(
+                None,
+                msgpack.packb(
+                    {
+                        "type": "event",
+                        "payload": json.dumps(payload),
+                        "start_time": start_time,
+                        "event_id": payload["event_id"],
+                        "project_id": project_id,
+                        "remote_addr": "127.0.0.1",
+                    }
+                ),
+                [],
+            ),
+            Partition(Topic("ingest-events"), 0),
+            offset,
+            datetime.datetime.now(),
+        )
+        for offset, (payload, project_id) in enumerate(
+            # The second message belongs to a project that does not exist.
+            zip(payloads, (default_project.id, default_project.id + 1000))
+        )
+    ]
+
+    with mock.patch(
+        "sentry.models.project.Project.objects.get_from_cache"
+    ) as get_from_cache, mock.patch(
+        "sentry.models.project.Project.objects.get_many_from_cache",
+        return_value=[default_project],
+    ) as get_many_from_cache:
+        process_simple_event_batch(Message(Value(values, values[-1].committable)))
+
+    assert not get_from_cache.called
+    assert get_many_from_cache.call_count == 1
+    (kwargs,) = preprocess_event
+    assert kwargs["event_id"] == payloads[0]["event_id"]
+
+
 @django_db_all
 @pytest.mark.parametrize("missing_chunks", (True, False))
 def test_with_attachments(default_project, task_runner, missing_chunks, monkeypatch, django_cache):
@@ -0,0 +1,125 @@
+import threading
+from unittest import mock
+
+from sentry.ingest import profiler
+from sentry.testutils.helpers.options import override_options
+
+
+def make_sample():
+    sample = profiler.Sample("save_event", project_id=1, event_type="error")
+    sample.records = [
+        ("save_event;grouping", 0.002, 0.002),
+        ("save_event;nodestore", 0.005, 0.001),
+        ("save_event", 0.010, 0.004),
+    ]
+    return sample
+
+
+def test_profile_not_sampled():
+    with override_options({"ingest.stage-profiler.sample-rate": 0.0}), mock.patch.object(
+        profiler, "record_sample"
+    ) as record_sample:
+        with profiler.profile("save_event", project_id=1):
+            with profiler.stage("grouping"):
+                pass
+
+    assert not record_sample.called
+
+
+def test_profile_records_stages():
+    with override_options({"ingest.stage-profiler.sample-rate": 1.0}), mock.patch.object(
+        profiler, "record_sample"
+    ) as record_sample:
+        with profiler.profile("save_event", project_id=1):
+            profiler.set_context(event_type="error")
+            with profiler.stage("grouping"):
+                pass
+            # A nested unit of work is recorded as a stage of the outer one.
+            with profiler.profile("post_process_group"):
+                with profiler.stage("process_rules"):
+                    pass
+
+    ((sample,), _) = record_sample.call_args
+    assert sample.project_id == 1
+    assert sample.event_type == "error"
+    assert [path for path, _, _ in sample.records] == [
+        "save_event;grouping",
+        "save_event;post_process_group;process_rules",
+        "save_event;post_process_group",
+        "save_event",
+    ]
+
+
+def test_profile_records_stages_of_other_threads():
+    def run_stage(forked):
+        with profiler.attach(forked), profiler.stage("process_similarity"):
+            pass
+
+    with override_options({"ingest.stage-profiler.sample-rate": 1.0}), mock.patch.object(
+        profiler, "record_sample"
+    ) as record_sample:
+        with profiler.profile("post_process_group", project_id=1):
+            thread = threading.Thread(target=run_stage, args=(profiler.fork(),))
+            thread.start()
+            thread.join()
+
+    ((sample,), _) = record_sample.call_args
+    assert [path for path, _, _ in sample.records] == [
+        "post_process_group;process_similarity",
+        "post_process_group",
+    ]
+
+
+def test_histogram():
+    histogram = profiler.StageHistogram()
+    profiler.record_sample(make_sample(), histogram)
+    profiler.record_sample(make_sample(), histogram)
+
+    entry = histogram.entries[(profiler.KIND_STAGE, "error", "save_event")]
+    assert entry.count == 2
+    assert entry.percentile(0.5) == 0.016
+    assert histogram.entries[(profiler.KIND_PROJECT, "error", "1;save_event")].count == 2
+
+    assert profiler.format_collapsed(histogram) == [
+        "error;save_event 6000",
+        "error;save_event;grouping 4000",
+        "error;save_event;nodestore 10000",
+    ]
+
+    table = profiler.format_table(histogram, kind=profiler.KIND_PROJECT)
+    assert len(table) == 2
+    assert table[1].split() == [
+        "error",
+        "1;save_event",
+        "2",
+        "0.02",
+        "0.01",
+        "10.0",
+        "16",
+        "16",
+        "16",
+    ]
+
+
+def test_histogram_bounded():
+    histogram = profiler.StageHistogram(max_keys=4)
+    for project_id in range(1, 5):
+        sample = make_sample()
+        sample.project_id = project_id
+        profiler.record_sample(sample, histogram)
+
+    assert len(histogram) == 5
+    assert histogram.entries[(profiler.KIND_PROJECT, "error", "other;save_event")].count == 3
+
+
+def test_flush_and_load():
+    histogram = profiler.StageHistogram()
+    profiler.record_sample(make_sample(), histogram)
+    profiler.flush(histogram, 7200)
+    profiler.flush(histogram, 7200)
+
+    loaded = profiler.load(hours=1, now=7200)
+    assert loaded.entries.keys() == histogram.entries.keys()
+    entry = loaded.entries[(profiler.KIND_STAGE, "error", "save_event;nodestore")]
+    assert entry.count == 2
+    assert entry.buckets[profiler.get_bucket(0.005)] == 2
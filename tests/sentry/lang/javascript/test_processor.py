@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import base64
 import errno
 import re
 import unittest
@@ -13,6 +14,7 @@ from uuid import uuid4
 
 import pytest
 import responses
+from django.test import override_settings
 from requests.exceptions import RequestException
 from sentry_relay.processing import StoreNormalizer
 
@@ -2340,6 +2342,38 @@ class FetchSourcemapTest(TestCase):
             )
             processor._fetch_sourcemap_cache_by_url("http://example.com")
 
+    @override_settings(SENTRY_SOURCEMAP_CACHE={"max_size": 10})
+    def test_store(self):
+        project = self.create_project()
+        release = Release.objects.create(organization_id=project.organization_id, version="abc")
+        sourcemap = base64.b64decode(base64_sourcemap.split(",", 1)[1])
+
+        def fetch_sourcemap(url, source=b"", release=release):
+            processor = JavaScriptStacktraceProcessor(
+                data={}, stacktrace_infos=None, project=project
+            )
+            processor.fetcher.bind_release(release)
+            return processor._fetch_sourcemap_cache_by_url(url, source=source)
+
+        # Parsed sourcemaps are shared between processors.
+        smap_view = fetch_sourcemap(base64_sourcemap)
+        assert fetch_sourcemap(base64_sourcemap) is smap_view
+
+        with patch(
+            "sentry.lang.javascript.processor.Fetcher.fetch_by_url",
+            return_value=MagicMock(body=sourcemap),
+        ) as fetch_by_url:
+            smap_view = fetch_sourcemap("http://example.com/test.js.map")
+            assert fetch_sourcemap("http://example.com/test.js.map") is smap_view
+            assert fetch_by_url.call_count == 1
+
+            # Another minified source, or a scraped sourcemap, is fetched again.
+            assert fetch_sourcemap("http://example.com/test.js.map", source=b"x") is not smap_view
+            assert fetch_by_url.call_count == 2
+            fetch_sourcemap("http://example.com/test.js.map", release=None)
+            fetch_sourcemap("http://example.com/test.js.map", release=None)
+            assert fetch_by_url.call_count == 4
+
 
 class TrimLineTest(unittest.TestCase):
     long_line = "The public is more familiar with bad design than good design. It is, in effect, conditioned to prefer bad design, because that is what it lives with. The new becomes threatening, the old reassuring."
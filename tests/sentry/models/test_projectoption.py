@@ -30,3 +30,21 @@ class ProjectOptionManagerTest(TestCase):
         ProjectOption.objects.create(project=self.project, key="foo", value="bar")
         result = ProjectOption.objects.get_value_bulk([self.project], "foo")
         assert result == {self.project: "bar"}
+
+    def test_get_all_values_many(self):
+        other_project = self.create_project()
+        ProjectOption.objects.create(project=self.project, key="foo", value="bar")
+
+        result = ProjectOption.objects.get_all_values_many([self.project.id, other_project.id])
+        assert result == {self.project.id: {"foo": "bar"}, other_project.id: {}}
+
+        # Loaded from the local cache now. Delete the rows without firing
+        # post_delete, which would reload the caches.
+        queryset = ProjectOption.objects.filter(project=self.project)
+        queryset._raw_delete(queryset.db)
+        assert ProjectOption.objects.get_all_values(self.project) == {"foo": "bar"}
+
+        ProjectOption.objects.clear_local_cache()
+        with self.assertNumQueries(0):
+            result = ProjectOption.objects.get_all_values_many([self.project.id, other_project.id])
+        assert result == {self.project.id: {"foo": "bar"}, other_project.id: {}}
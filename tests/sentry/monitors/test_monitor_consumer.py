@@ -1,18 +1,22 @@
 import uuid
 from datetime import datetime, timedelta
-from typing import Any, Optional
+from typing import Any, List, Optional
 from unittest import mock
 
 import msgpack
 from arroyo.backends.kafka import KafkaPayload
-from arroyo.types import BrokerValue, Message, Partition, Topic
+from arroyo.types import BrokerValue, Message, Partition, Topic, Value
 from django.conf import settings
 from django.test.utils import override_settings
 
 from sentry import killswitches
 from sentry.db.models import BoundedPositiveIntegerField
 from sentry.monitors.constants import TIMEOUT
-from sentry.monitors.consumers.monitor_consumer import StoreMonitorCheckInStrategyFactory
+from sentry.models.environment import Environment
+from sentry.monitors.consumers.monitor_consumer import (
+    StoreMonitorCheckInStrategyFactory,
+    process_batch,
+)
 from sentry.monitors.models import (
     CheckInStatus,
     Monitor,
@@ -25,6 +29,7 @@ from sentry.monitors.models import (
 )
 from sentry.testutils.cases import TestCase
 from sentry.utils import json
+from sentry.utils.concurrent import SynchronousExecutor
 from sentry.utils.locking.manager import LockManager
 from sentry.utils.services import build_instance_from_options
 
@@ -592,3 +597,154 @@ class MonitorConsumerTest(TestCase):
             assert MonitorCheckIn.objects.filter(guid=self.guid).exists()
             logger.exception.assert_called_with("Failed to trigger monitor tasks", exc_info=True)
             try_monitor_tasks_trigger.side_effect = None
+
+
+class ParallelMonitorConsumerTest(TestCase):
+    def _create_monitor(self, **kwargs):
+        return Monitor.objects.create(
+            organization_id=self.organization.id,
+            project_id=self.project.id,
+            type=MonitorType.CRON_JOB,
+            config={
+                "schedule": "* * * * *",
+                "schedule_type": ScheduleType.CRONTAB,
+                "checkin_margin": 5,
+                "max_runtime": None,
+            },
+            **kwargs,
+        )
+
+    def make_checkin(
+        self,
+        monitor_slug: str,
+        guid: Optional[str] = None,
+        ts: Optional[datetime] = None,
+        **overrides: Any,
+    ) -> BrokerValue[KafkaPayload]:
+        if ts is None:
+            ts = datetime.now()
+
+        payload = {
+            "monitor_slug": monitor_slug,
+            "status": "ok",
+            "duration": None,
+            "check_in_id": guid or uuid.uuid4().hex,
+            "environment": "production",
+            "contexts": {"trace": {"trace_id": uuid.uuid4().hex}},
+        }
+        payload.update(overrides)
+
+        wrapper = {
+            "start_time": ts.timestamp(),
+            "project_id": self.project.id,
+            "payload": json.dumps(payload),
+            "sdk": "test/1.0",
+        }
+        return BrokerValue(
+            KafkaPayload(b"fake-key", msgpack.packb(wrapper), []),
+            Partition(Topic("test"), 0),
+            1,
+            ts,
+        )
+
+    def send_batch(self, values: List[BrokerValue[KafkaPayload]]) -> None:
+        # Process the check-ins of unrelated monitors in the test thread, which
+        # can see the data of the test transaction.
+        with mock.patch("sentry.monitors.consumers.monitor_consumer.close_old_connections"):
+            process_batch(SynchronousExecutor(), Message(Value(values, {})))
+
+    def test_parallel_mode(self):
+        factory = StoreMonitorCheckInStrategyFactory(mode="parallel", max_workers=2)
+        assert factory.executor is not None
+        factory.shutdown()
+
+        assert StoreMonitorCheckInStrategyFactory().executor is None
+
+    @mock.patch("sentry.monitors.consumers.monitor_consumer.try_monitor_tasks_trigger")
+    def test_batch(self, try_monitor_tasks_trigger):
+        monitor = self._create_monitor(slug="my-monitor")
+        other_monitor = self._create_monitor(slug="other-monitor")
+        monitor_environment = MonitorEnvironment.objects.create(
+            monitor=monitor,
+            environment=Environment.get_or_create(self.project, "production"),
+            status=MonitorStatus.ACTIVE,
+        )
+
+        now = datetime.now().replace(second=0, microsecond=0)
+        guid = uuid.uuid4().hex
+        self.send_batch(
+            [
+                self.make_checkin(monitor.slug, guid=guid, status="in_progress", ts=now),
+                self.make_checkin(other_monitor.slug, status="error", ts=now),
+                self.make_checkin(monitor.slug, guid=guid, ts=now + timedelta(seconds=1)),
+                self.make_checkin(monitor.slug, ts=now + timedelta(seconds=2)),
+            ]
+        )
+
+        # Check-ins of the same monitor are processed in order.
+        checkin = MonitorCheckIn.objects.get(guid=guid)
+        assert checkin.status == CheckInStatus.OK
+        assert checkin.monitor_environment_id == monitor_environment.id
+        assert checkin.duration is not None
+
+        checkins = MonitorCheckIn.objects.filter(monitor=monitor).order_by("date_added")
+        assert len(checkins) == 2
+        # The monitor environment was updated by the check-ins before.
+        assert checkins[1].expected_time == monitor.get_next_expected_checkin(
+            checkin.date_added
+        )
+
+        monitor_environment.refresh_from_db()
+        assert monitor_environment.status == MonitorStatus.OK
+        assert monitor_environment.last_checkin == checkins[1].date_added
+
+        other_checkin = MonitorCheckIn.objects.get(monitor=other_monitor)
+        assert other_checkin.status == CheckInStatus.ERROR
+        assert other_checkin.monitor_environment.status == MonitorStatus.ERROR
+
+        # The tasks are triggered once per partition with the latest timestamp.
+        try_monitor_tasks_trigger.assert_called_once_with(now + timedelta(seconds=2), 0)
+
+    def test_batch_monitor_upsert(self):
+        monitor_config = {"schedule": {"type": "crontab", "value": "13 * * * *"}}
+        self.send_batch(
+            [
+                self.make_checkin("my-monitor", monitor_config=monitor_config),
+                self.make_checkin("my-monitor", monitor_config=monitor_config),
+            ]
+        )
+
+        monitor = Monitor.objects.get(slug="my-monitor")
+        assert MonitorEnvironment.objects.filter(monitor=monitor).count() == 1
+        assert MonitorCheckIn.objects.filter(monitor=monitor).count() == 2
+
+    def test_batch_rate_limit(self):
+        monitor = self._create_monitor(slug="my-monitor")
+
+        with mock.patch("sentry.monitors.consumers.monitor_consumer.CHECKIN_QUOTA_LIMIT", 1):
+            self.send_batch(
+                [
+                    self.make_checkin(monitor.slug),
+                    self.make_checkin(monitor.slug),
+                    self.make_checkin(monitor.slug, environment="dev"),
+                ]
+            )
+
+        checkins = MonitorCheckIn.objects.filter(monitor=monitor)
+        assert len(checkins) == 2
+        assert {checkin.monitor_environment.environment.name for checkin in checkins} == {
+            "production",
+            "dev",
+        }
+
+    def test_batch_organization_killswitch(self):
+        monitor = self._create_monitor(slug="my-monitor")
+
+        opt_val = killswitches.validate_user_input(
+            "crons.organization.disable-check-in", [{"organization_id": self.organization.id}]
+        )
+
+        with self.options({"crons.organization.disable-check-in": opt_val}):
+            self.send_batch([self.make_checkin(monitor.slug)])
+
+        assert not MonitorCheckIn.objects.filter(monitor=monitor).exists()
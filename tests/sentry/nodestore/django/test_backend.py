@@ -1,4 +1,5 @@
 import pickle
+import zlib
 from datetime import timedelta
 from unittest import mock
 
@@ -6,7 +7,8 @@ import pytest
 from django.utils import timezone
 
 from sentry.nodestore.base import json_dumps
-from sentry.nodestore.django.backend import DjangoNodeStorage
+from sentry.nodestore.dictionaries import ZSTD_MAGIC
+from sentry.nodestore.django.backend import RAW_PREFIX, DjangoNodeStorage
 from sentry.nodestore.django.models import Node
 from sentry.testutils.pytest.fixtures import django_db_all
 from sentry.testutils.silo import region_silo_test
@@ -56,6 +58,19 @@ class TestDjangoNodeStorage:
             b'{"foo":"bar"}'
         )
 
+    @region_silo_test(stable=True)
+    @pytest.mark.parametrize(
+        "payload", [ZSTD_MAGIC + b"\x00\x01", zlib.compress(b'{"foo":"bar"}')]
+    )
+    def test_set_bytes_already_compressed(self, payload):
+        self.ns._set_bytes("d2502ebbd7df41ceba8d3275595cac33", payload)
+        data = Node.objects.get(id="d2502ebbd7df41ceba8d3275595cac33").data
+        assert data.startswith(RAW_PREFIX)
+        assert self.ns._get_bytes("d2502ebbd7df41ceba8d3275595cac33") == payload
+        assert self.ns._get_bytes_multi(["d2502ebbd7df41ceba8d3275595cac33"]) == {
+            "d2502ebbd7df41ceba8d3275595cac33": payload
+        }
+
     @region_silo_test(stable=True)
     def test_delete(self):
         node = Node.objects.create(id="d2502ebbd7df41ceba8d3275595cac33", data=b'{"foo": "bar"}')
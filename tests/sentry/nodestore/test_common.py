@@ -3,8 +3,10 @@ Testsuite of backend-independent nodestore tests. Add your backend to the
 `ns` fixture to have it tested.
 """
 from contextlib import nullcontext
+from unittest import mock
 
 import pytest
+from django.test import override_settings
 
 from sentry.nodestore.django.backend import DjangoNodeStorage
 from sentry.testutils.silo import region_silo_test
@@ -97,3 +99,47 @@ def test_set_subkeys(ns):
     ns.delete("node_1")
     assert ns.get("node_1") is None
     assert ns.get("node_1", subkey="other") is None
+
+
+@region_silo_test(stable=True)
+def test_set_subkeys_multi(ns):
+    ns.set_subkeys_multi(
+        {
+            "node_1": {None: {"foo": "a"}, "other": {"foo": "b"}},
+            "node_2": {None: {"foo": "c"}},
+        }
+    )
+    assert ns.get_multi(["node_1", "node_2"]) == {"node_1": {"foo": "a"}, "node_2": {"foo": "c"}}
+    assert ns.get("node_1", subkey="other") == {"foo": "b"}
+
+
+@region_silo_test(stable=True)
+def test_local_cache(ns):
+    node_id = "d2502ebbd7df41ceba8d3275595cac33"
+    with override_settings(SENTRY_NODESTORE_LOCAL_CACHE={"max_bytes": 1024}):
+        ns.set(node_id, {"foo": "bar"})
+
+        with mock.patch.object(ns, "_get_bytes") as get_bytes, mock.patch.object(
+            ns, "_get_bytes_multi"
+        ) as get_bytes_multi, mock.patch.object(ns, "cache") as cache:
+            assert ns.get(node_id) == {"foo": "bar"}
+            assert ns.get_multi([node_id]) == {node_id: {"foo": "bar"}}
+            assert ns.get_bytes(node_id) == b'{"foo":"bar"}'
+            assert not get_bytes.called
+            assert not get_bytes_multi.called
+            # local hits must not go through the shared cache
+            assert not cache.method_calls
+
+        ns.delete(node_id)
+        assert ns._get_local_cache().get(node_id) is None
+        assert ns.get(node_id) is None
+
+
+@region_silo_test(stable=True)
+def test_local_cache_per_backend(ns):
+    node_id = "d2502ebbd7df41ceba8d3275595cac33"
+    with override_settings(SENTRY_NODESTORE_LOCAL_CACHE={"max_bytes": 1024}):
+        ns.set(node_id, {"foo": "bar"})
+        other = DjangoNodeStorage()
+        assert other._get_local_cache() is not ns._get_local_cache()
+        assert other._get_local_cache().get(node_id) is None
@@ -0,0 +1,65 @@
+import os
+
+import zstandard
+from django.test import override_settings
+
+from sentry.nodestore.dictionaries import (
+    DictionaryRegistry,
+    get_dictionary_filename,
+    get_registry,
+    train_dictionary,
+)
+from sentry.nodestore.django.backend import DjangoNodeStorage
+from sentry.testutils.pytest.fixtures import django_db_all
+
+SAMPLES = [
+    f'{{"event_id":"{i:032x}","platform":"python","sdk":{{"name":"sentry.python"}}}}'.encode()
+    for i in range(200)
+]
+
+
+def write_dictionary(path, platform, version):
+    dictionary = train_dictionary(SAMPLES, platform, version, dict_size=1024)
+    with open(os.path.join(path, get_dictionary_filename(platform, version)), "wb") as f:
+        f.write(dictionary.as_bytes())
+    return dictionary
+
+
+def test_registry_versions(tmp_path):
+    old = write_dictionary(tmp_path, "python", 1)
+    old_payload = DictionaryRegistry(str(tmp_path)).compress(SAMPLES[0], "python")
+    assert zstandard.get_frame_parameters(old_payload).dict_id == old.dict_id()
+
+    new = write_dictionary(tmp_path, "python", 2)
+    registry = DictionaryRegistry(str(tmp_path))
+    assert registry.get_latest_version("python") == 2
+    assert registry.get_latest_version("javascript") is None
+
+    payload = registry.compress(SAMPLES[0], "python")
+    assert zstandard.get_frame_parameters(payload).dict_id == new.dict_id()
+    assert registry.decompress(payload) == SAMPLES[0]
+    assert registry.decompress(old_payload) == SAMPLES[0]
+    # Uncompressed payloads are passed through as is
+    assert registry.decompress(SAMPLES[0]) == SAMPLES[0]
+
+
+def test_registry_fallback(tmp_path):
+    write_dictionary(tmp_path, "other", 1)
+    registry = DictionaryRegistry(str(tmp_path))
+    payload = registry.compress(SAMPLES[0], "cocoa")
+    assert zstandard.get_frame_parameters(payload).dict_id
+    assert registry.decompress(payload) == SAMPLES[0]
+
+
+@django_db_all
+def test_nodestore_roundtrip(tmp_path):
+    write_dictionary(tmp_path, "python", 1)
+    ns = DjangoNodeStorage()
+    node_id = "d2502ebbd7df41ceba8d3275595cac33"
+    data = {"platform": "python", "sdk": {"name": "sentry.python"}}
+
+    with override_settings(SENTRY_NODESTORE_DICTIONARY_DIR=str(tmp_path)):
+        assert get_registry()
+        ns.set(node_id, data)
+        assert ns._get_bytes(node_id).startswith(b"\x28\xb5\x2f\xfd")
+        assert ns.get(node_id) == data
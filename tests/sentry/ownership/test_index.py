@@ -0,0 +1,153 @@
+import os
+
+import pytest
+
+from sentry.ownership.grammar import (
+    Matcher,
+    Owner,
+    Rule,
+    dump_schema,
+    get_codeowners_path_and_owners,
+    load_schema,
+    parse_rules,
+)
+from sentry.ownership.index import OwnershipIndex, _required_segment, get_ownership_index
+
+fixture_data = r"""
+*.js                    #frontend
+url:http://google.com/* #backend
+path:src/sentry/*       david@sentry.io
+path:**/App Delegate/*  david@sentry.io
+path:C:\code\*.cs       david@sentry.io
+path:*                  everyone@sentry.io
+tags.foo:bar            tagperson@sentry.io
+module:foo.bar          #workflow
+module:foo.*            #workflow
+codeowners:/src/components/  githubuser@sentry.io
+codeowners:frontend/*.ts     githubmod@sentry.io
+codeowners:**/logs           githubmod@sentry.io
+codeowners:src/sentry/       githubuser@sentry.io
+"""
+
+
+def _frames_data(platform, frames, **kwargs):
+    return {"platform": platform, "stacktrace": {"frames": frames}, **kwargs}
+
+
+EVENTS = [
+    {},
+    _frames_data("python", [{"filename": "src/sentry/models/project.py", "module": "foo.bar"}]),
+    _frames_data("python", [{"filename": "SRC/Sentry/Models/Project.py"}]),
+    _frames_data("javascript", [{"abs_path": "webpack:///src/components/button.js"}]),
+    _frames_data(
+        "javascript",
+        [{"filename": "frontend/app.ts"}, {"filename": "node_modules/lib/logs/index.js"}],
+        request={"url": "http://google.com/search"},
+        tags=[["foo", "bar"]],
+    ),
+    _frames_data("csharp", [{"abs_path": "C:\\code\\Program.cs"}]),
+    _frames_data(
+        "cocoa",
+        [
+            {
+                "package": "SampleProject",
+                "abs_path": "/Users/gszeto/code/Sample/SampleProject/Classes/App Delegate/AppDelegate.swift",
+            }
+        ],
+    ),
+    _frames_data("java", [{"module": "jdk.internal.reflect.Native", "filename": "Native.java"}]),
+]
+
+
+def test_required_segment():
+    assert _required_segment("src/sentry/*.py") == "sentry"
+    assert _required_segment("/src/components/") == "components"
+    assert _required_segment("**/App Delegate/*") == "app delegate"
+    assert _required_segment("*.js") == ".js"
+    assert _required_segment("*") is None
+    assert _required_segment("./*") is None
+    assert _required_segment("src/[ab]/*") is None
+    assert _required_segment("C:\\code\\*") is None
+
+
+@pytest.mark.parametrize("data", EVENTS)
+def test_matching_rules_equal_rule_test(data):
+    rules = parse_rules(fixture_data)
+    expected = [rule for rule in rules if rule.test(data)]
+    assert OwnershipIndex(rules).matching_rules(data) == expected
+
+
+def test_matching_rules_keeps_order():
+    rules = [
+        Rule(Matcher("codeowners", "*.py"), [Owner("team", "a")]),
+        Rule(Matcher("path", "src/*"), [Owner("team", "b")]),
+        Rule(Matcher("codeowners", "/src/sentry/"), [Owner("team", "c")]),
+    ]
+    data = _frames_data("python", [{"filename": "src/sentry/models/project.py"}])
+    assert OwnershipIndex(rules).matching_rules(data) == rules
+
+
+def test_get_ownership_index_is_cached():
+    schema = dump_schema(parse_rules(fixture_data))
+    index = get_ownership_index(schema)
+    assert get_ownership_index(dump_schema(load_schema(schema))) is index
+    assert get_ownership_index({**schema, "rules": schema["rules"][:1]}) is not index
+
+
+def benchmark_available() -> bool:
+    try:
+        __import__("pytest_benchmark")
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+CODEOWNERS_PATH = os.path.join(
+    os.path.dirname(__file__), os.pardir, os.pardir, os.pardir, ".github", "CODEOWNERS"
+)
+
+
+def _load_codeowners_rules():
+    rules = []
+    with open(CODEOWNERS_PATH) as f:
+        for line in f:
+            if not line.strip() or line.startswith("#"):
+                continue
+            path, owners = get_codeowners_path_and_owners(line)
+            rules.append(
+                Rule(Matcher("codeowners", path), [Owner("team", owner) for owner in owners])
+            )
+    # Scale the file up to the size of the largest files seen in production.
+    return [rule for _ in range(4) for rule in rules]
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.skipif(not os.path.exists(CODEOWNERS_PATH), reason="requires CODEOWNERS")
+@pytest.mark.parametrize("indexed", [False, True])
+def test_benchmark_codeowners(benchmark, indexed):
+    rules = _load_codeowners_rules()
+    data = _frames_data(
+        "python",
+        [
+            {"filename": f"src/sentry/{module}.py", "abs_path": f"/usr/src/sentry/{module}.py"}
+            for module in (
+                "api/base",
+                "api/endpoints/project_details",
+                "models/project",
+                "tasks/post_process",
+                "eventstore/models",
+                "utils/snuba",
+                "snuba/metrics/query",
+                "integrations/github/client",
+            )
+        ],
+    )
+    index = OwnershipIndex(rules)
+
+    def run():
+        if indexed:
+            return index.matching_rules(data)
+        return [rule for rule in rules if rule.test(data)]
+
+    assert benchmark(run) == [rule for rule in rules if rule.test(data)]
@@ -66,3 +66,10 @@ class RedisRateLimiterTest(TestCase):
             assert not limited
             assert value == 1
             assert reset_time == expected_reset_time + 5
+
+    def test_is_limited_many(self):
+        with freeze_time("2000-01-01"):
+            assert self.backend.is_limited_many([], 1) == []
+            assert self.backend.is_limited_many(["foo", "bar", "foo"], 1) == [False, False, True]
+            assert self.backend.is_limited("bar", 1)
+            assert self.backend.current_value("foo") == 2
@@ -1,5 +1,7 @@
 import datetime
+import gzip
 import uuid
+import zlib
 
 from django.urls import reverse
 
@@ -71,6 +73,17 @@ class EnvironmentBase(APITestCase):
             assert response.get("Content-Type") == "application/json"
             assert self.segment_data == close_streaming_response(response)
 
+    def test_get_replay_recording_segment_download_uncompressed_accepts_gzip(self):
+        self.login_as(user=self.user)
+
+        with self.feature("organizations:session-replay"):
+            response = self.client.get(self.url + "?download", HTTP_ACCEPT_ENCODING="gzip")
+
+            assert response.status_code == 200, response.content
+            assert response.get("Content-Encoding") is None
+            assert response.get("Content-Length") == str(self.segment_data_size)
+            assert self.segment_data == close_streaming_response(response)
+
 
 @region_silo_test(stable=True)
 class FilestoreReplayRecordingSegmentDetailsTestCase(EnvironmentBase):
@@ -85,6 +98,36 @@ class FilestoreReplayRecordingSegmentDetailsTestCase(EnvironmentBase):
         self.segment_filename = make_filename(metadata)
         FilestoreBlob().set(metadata, self.segment_data)
 
+    def test_get_replay_recording_segment_download_compressed(self):
+        self.login_as(user=self.user)
+        metadata = RecordingSegmentStorageMeta(
+            project_id=self.project.id,
+            replay_id=self.replay_id,
+            segment_id=1,
+            retention_days=None,
+        )
+        FilestoreBlob().set(metadata, zlib.compress(self.segment_data))
+        url = reverse(
+            self.endpoint, args=(self.organization.slug, self.project.slug, self.replay_id, 1)
+        )
+
+        with self.feature("organizations:session-replay"):
+            response = self.client.get(url + "?download")
+
+            assert response.status_code == 200, response.content
+            assert response.get("Content-Encoding") is None
+            assert self.segment_data == close_streaming_response(response)
+
+            # Clients accepting gzip receive the compressed segment.
+            response = self.client.get(url + "?download", HTTP_ACCEPT_ENCODING="gzip, deflate")
+
+            assert response.status_code == 200, response.content
+            assert response.get("Content-Encoding") == "gzip"
+            assert "Accept-Encoding" in response.get("Vary")
+            content = close_streaming_response(response)
+            assert response.get("Content-Length") == str(len(content))
+            assert self.segment_data == gzip.decompress(content)
+
 
 @region_silo_test(stable=True)
 class StorageReplayRecordingSegmentDetailsTestCase(EnvironmentBase, ReplaysSnubaTestCase):
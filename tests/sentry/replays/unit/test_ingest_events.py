@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from typing import Any
+from unittest import mock
+
+import pytest
+import rapidjson
+
+from sentry.replays.usecases.ingest.dom_index import get_user_actions
+from sentry.replays.usecases.ingest.events import iter_custom_events
+from sentry.utils import json
+
+
+def _click_event(node_id: int) -> dict[str, Any]:
+    return {
+        "type": 5,
+        "timestamp": 1674298825,
+        "data": {
+            "tag": "breadcrumb",
+            "payload": {
+                "timestamp": 1674298825.403,
+                "type": "default",
+                "category": "ui.click",
+                "message": "div#hello.hello.world",
+                "data": {
+                    "nodeId": node_id,
+                    "node": {
+                        "id": node_id,
+                        "tagName": "div",
+                        "attributes": {"id": "hello", "class": "hello world"},
+                        "textContent": 'Hello, {"type": 5} world!',
+                    },
+                },
+            },
+        },
+    }
+
+
+def _full_snapshot_event(size: int) -> dict[str, Any]:
+    # Comment nodes are of type 5 too.
+    nodes = [
+        {
+            "type": 2,
+            "tagName": "div",
+            "attributes": {"class": "row", "data-json": '[{"type":5,"data":{}}]'},
+            "childNodes": [
+                {"type": 5, "textContent": "comment", "id": i * 3 + 1},
+                {"type": 3, "textContent": f"text {i}", "id": i * 3 + 2},
+            ],
+            "id": i * 3,
+        }
+        for i in range(size)
+    ]
+    return {
+        "type": 2,
+        "data": {"node": {"type": 0, "childNodes": nodes, "id": 1}},
+        "timestamp": 1674298825,
+    }
+
+
+def _incremental_event() -> dict[str, Any]:
+    # Focus mouse interactions have a "type" of 5.
+    return {"type": 3, "data": {"source": 2, "type": 5, "id": 1}, "timestamp": 1674298825}
+
+
+def _make_segment(size: int = 10) -> list[dict[str, Any]]:
+    return [
+        {"type": 4, "data": {"href": "http://localhost/"}, "timestamp": 1674298825},
+        _full_snapshot_event(size),
+        _click_event(1),
+        _incremental_event(),
+        {"type": 5, "timestamp": 1674298825, "data": {"tag": "options", "payload": {}}},
+        _click_event(2),
+    ]
+
+
+def test_iter_custom_events():
+    segment = _make_segment()
+    expected = [event for event in segment if event["type"] == 5]
+
+    # Compact as sent by the SDKs and with whitespace.
+    for encoded in (json.dumps(segment).encode(), rapidjson.dumps(segment, indent=2)):
+        assert list(iter_custom_events(encoded, limit=1000)) == expected
+
+    assert list(iter_custom_events(json.dumps(segment), limit=2)) == expected[:2]
+    assert list(iter_custom_events(b"[]", limit=1000)) == []
+    assert list(iter_custom_events(b'{"type":5,"data":{}}', limit=1000)) == []
+
+
+def test_iter_custom_events_key_order():
+    segment = _make_segment()
+    # Custom events with their keys in another order than the SDKs use.
+    segment.append({"data": {"tag": "breadcrumb", "payload": {}}, "timestamp": 1, "type": 5})
+    segment.append(
+        {"timestamp": 1, "data": {"tag": "options", "payload": {"nested": [{"a": 1}]}}, "type": 5}
+    )
+    expected = [event for event in segment if event["type"] == 5]
+
+    assert list(iter_custom_events(json.dumps(segment), limit=1000)) == expected
+
+
+def test_iter_custom_events_fallback():
+    # Pretend the scan can not locate the event.
+    segment = '[{"type":4,"data":{}},\n{"type":5,"timestamp":1,"data":{"tag":"options"}}]'
+    with mock.patch(
+        "sentry.replays.usecases.ingest.events._decode_enclosing_element", return_value=None
+    ):
+        assert list(iter_custom_events(segment, limit=1000)) == [
+            {"type": 5, "timestamp": 1, "data": {"tag": "options"}}
+        ]
+
+    # Without any type 5 key there is nothing to find, the segment is not decoded.
+    with mock.patch("sentry.replays.usecases.ingest.events.json.loads") as loads:
+        assert list(iter_custom_events('[{"type":4,"data":{}}]', limit=1000)) == []
+    assert not loads.called
+
+
+def test_iter_custom_events_user_actions():
+    segment = _make_segment()
+    encoded = json.dumps(segment).encode()
+    assert get_user_actions(1, "1", iter_custom_events(encoded, limit=1000)) == get_user_actions(
+        1, "1", segment
+    )
+
+
+def benchmark_available() -> bool:
+    try:
+        __import__("pytest_benchmark")
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("partial", [False, True])
+def test_benchmark_get_user_actions(benchmark, partial):
+    # A segment of a couple of megabytes, most of which is a full DOM snapshot.
+    segment = _make_segment(size=20000) + [_click_event(i) for i in range(3, 50)]
+    encoded = json.dumps(segment).encode()
+
+    def run():
+        if partial:
+            return get_user_actions(1, "1", iter_custom_events(encoded, limit=1000))
+        return get_user_actions(1, "1", json.loads(encoded, use_rapid_json=True))
+
+    assert len(benchmark(run)) == 20
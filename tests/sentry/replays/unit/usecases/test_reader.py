@@ -0,0 +1,68 @@
+import gzip
+import threading
+import zlib
+from unittest import mock
+
+import pytest
+
+from sentry.replays.lib.storage import RecordingSegmentStorageMeta
+from sentry.replays.usecases import reader
+from sentry.replays.usecases.reader import (
+    gzip_encoded_size,
+    is_gzip_encodable,
+    iter_decompressed,
+    iter_gzip_encoded,
+    prefetch_segments,
+)
+
+DATA = b"[" + b",".join(b'{"i":%d}' % i for i in range(20000)) + b"]"
+
+
+def test_iter_decompressed():
+    """Test segments are decompressed in bounded chunks."""
+    for buffer in (zlib.compress(DATA), gzip.compress(DATA)):
+        chunks = list(iter_decompressed(buffer, chunk_size=1024))
+        assert b"".join(chunks) == DATA
+        assert all(len(chunk) <= 1024 for chunk in chunks)
+
+    # Uncompressed segments are passed through.
+    assert list(iter_decompressed(b'[{"a":1}]')) == [b'[{"a":1}]']
+
+    # Truncated segments fail like `decompress` does.
+    with pytest.raises(zlib.error):
+        list(iter_decompressed(zlib.compress(DATA)[:-10]))
+
+
+def test_iter_gzip_encoded():
+    """Test compressed segments are converted to gzip streams."""
+    for buffer in (zlib.compress(DATA), gzip.compress(DATA)):
+        assert is_gzip_encodable(buffer)
+        encoded = b"".join(iter_gzip_encoded(buffer, chunk_size=1024))
+        assert len(encoded) == gzip_encoded_size(buffer)
+        assert gzip.decompress(encoded) == DATA
+
+    assert not is_gzip_encodable(b'[{"a":1}]')
+
+
+def test_prefetch_segments():
+    """Test segments are yielded in order with a bounded number of downloads in flight."""
+    segments = [
+        RecordingSegmentStorageMeta(project_id=1, replay_id="a", segment_id=i, retention_days=30)
+        for i in range(25)
+    ]
+    lock = threading.Lock()
+    fetched = []
+
+    def fetch_segment(segment, transaction, current_hub):
+        with lock:
+            fetched.append(segment.segment_id)
+        return b"%d" % segment.segment_id
+
+    with mock.patch.object(reader, "fetch_segment", side_effect=fetch_segment):
+        results = prefetch_segments(segments, transaction=mock.Mock(), current_hub=mock.Mock())
+        assert next(results) == b"0"
+        # Only the window (and the segment replacing the consumed one) has been requested.
+        assert len(fetched) <= reader.SEGMENT_PREFETCH_WINDOW + 1
+        assert list(results) == [b"%d" % i for i in range(1, 25)]
+
+    assert sorted(fetched) == list(range(25))
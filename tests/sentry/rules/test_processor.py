@@ -373,6 +373,45 @@ class RuleProcessorTest(TestCase):
         # mock condition first.
         assert passes.call_count == 0
 
+    @patch(
+        "sentry.constants._SENTRY_RULES",
+        [
+            "sentry.mail.actions.NotifyEmailAction",
+            "sentry.rules.conditions.event_frequency.EventFrequencyCondition",
+        ],
+    )
+    def test_frequency_queries_shared_between_rules(self):
+        condition = {
+            "id": "sentry.rules.conditions.event_frequency.EventFrequencyCondition",
+            "interval": "1h",
+            "value": 100,
+        }
+        self.rule.update(data={"conditions": [condition], "actions": [EMAIL_ACTION_DATA]})
+        Rule.objects.create(
+            project=self.group_event.project,
+            data={
+                "conditions": [condition, {**condition, "value": 1000}],
+                "action_match": "any",
+                "actions": [EMAIL_ACTION_DATA],
+            },
+        )
+        with patch("sentry.rules.processor.rules", init_registry()), patch(
+            "sentry.rules.conditions.event_frequency.EventFrequencyCondition.query_hook",
+            return_value=0,
+        ) as query_hook:
+            rp = RuleProcessor(
+                self.group_event,
+                is_new=True,
+                is_regression=True,
+                is_new_group_environment=True,
+                has_reappeared=True,
+            )
+            results = rp.apply()
+        assert len(results) == 0
+        # The identical condition of both rules is only evaluated once, and the
+        # other condition with the same interval reuses its query.
+        assert query_hook.call_count == 1
+
 
 class MockFilterTrue(EventFilter):
     id = "tests.sentry.rules.test_processor.MockFilterTrue"
@@ -209,3 +209,54 @@ def test_separate_namespacing() -> None:
         indexer_cache.set(namespace, "transactions:3:what", 2)
         assert indexer_cache.get(namespace, "sessions:3:what") == 1
         assert indexer_cache.get(namespace, "transactions:3:what") == 2
+
+
+def test_local_cache(use_case_id: str) -> None:
+    local_indexer_cache = StringIndexerCache(
+        **settings.SENTRY_STRING_INDEXER_CACHE_OPTIONS,
+        partition_key=_PARTITION_KEY,
+        local_cache={"max_size": 10},
+        negative_ttl=60,
+    )
+    cache.clear()
+    namespace = "test"
+    key = f"{use_case_id}:1:blah:123"
+
+    local_indexer_cache.set(namespace, key, 1)
+    cache.clear()
+    # served from the local tier after the shared cache was cleared
+    assert local_indexer_cache.get(namespace, key) == 1
+    assert local_indexer_cache.get_many(namespace, [key, f"{use_case_id}:1:other"]) == {
+        key: 1,
+        f"{use_case_id}:1:other": None,
+    }
+
+    local_indexer_cache.delete(namespace, key)
+    assert local_indexer_cache.get(namespace, key) is None
+
+    assert not local_indexer_cache.is_missing(namespace, key)
+    local_indexer_cache.set_missing(namespace, key)
+    assert local_indexer_cache.is_missing(namespace, key)
+    local_indexer_cache.set(namespace, key, 2)
+    assert not local_indexer_cache.is_missing(namespace, key)
+    assert local_indexer_cache.get(namespace, key) == 2
+
+
+def test_local_cache_prefetch(use_case_id: str) -> None:
+    local_indexer_cache = StringIndexerCache(
+        **settings.SENTRY_STRING_INDEXER_CACHE_OPTIONS,
+        partition_key=_PARTITION_KEY,
+        local_cache={"max_size": 10},
+    )
+    cache.clear()
+    namespace = "test"
+    values = {f"{use_case_id}:100:hello": 2, f"{use_case_id}:100:bye": 3}
+    indexer_cache.set_many(namespace, values)
+
+    future = local_indexer_cache.prefetch_many(namespace, values.keys())
+    assert future is not None
+    future.result()
+    assert local_indexer_cache.prefetch_many(namespace, values.keys()) is None
+
+    cache.clear()
+    assert local_indexer_cache.get_many(namespace, values.keys()) == values
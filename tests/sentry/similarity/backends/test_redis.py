@@ -1,7 +1,10 @@
 import time
 from functools import cached_property
+from unittest import mock
 
 import msgpack
+from redis import StrictRedis
+from rediscluster import RedisCluster
 
 from sentry.similarity.backends.redis import RedisScriptMinHashIndexBackend
 from sentry.similarity.signatures import MinHashSignatureBuilder
@@ -222,3 +225,81 @@ class RedisScriptMinHashIndexBackendTestCase(TestCase):
 
         self.index.flush("*", ["index"])
         assert self.index.classify("example", [("index", 0, ["foo", "bar"])]) == []
+
+    def test_record_many_classify_many(self):
+        results = self.index.record_many(
+            [
+                ("example", "1", [("index", ["foo", "bar"])]),
+                ("example", "2", []),
+                ("other", "1", [("index", ["baz"])]),
+                ("other", "2", [("index", ["foo", "bar"])]),
+            ]
+        )
+        assert len(results) == 4
+        assert results[1] is None
+
+        assert self.index.classify_many(
+            [
+                ("example", [("index", 0, ["foo", "bar"])]),
+                ("other", [("index", 0, ["baz"])]),
+                ("missing", [("index", 0, ["baz"])]),
+            ]
+        ) == [
+            self.index.classify("example", [("index", 0, ["foo", "bar"])]),
+            self.index.classify("other", [("index", 0, ["baz"])]),
+            [],
+        ]
+        assert self.index.classify("example", [("index", 0, ["foo", "bar"])]) == [("1", [1.0])]
+
+    def test_record_many_request_timestamp(self):
+        now = int(time.time())
+        yesterday = now - 60 * 60 * 24
+        self.index.record_many(
+            [
+                ("example", "1", [("index", ["foo", "bar"])], yesterday),
+                ("example", "2", [("index", ["foo", "bar"])]),
+            ],
+            timestamp=now,
+        )
+
+        items = [("index", 0, ["foo", "bar"])]
+        assert self.index.classify("example", items, timestamp=now) == [("2", [1.0])]
+        assert self.index.classify("example", items, timestamp=yesterday) == [("1", [1.0])]
+
+    def test_record_many_classify_many_redis_cluster(self):
+        client = redis.clusters.get("default").get_local_client(0)
+        # Two "nodes", which happen to be backed by the same server.
+        node_clients = {
+            "example": StrictRedis(connection_pool=client.connection_pool),
+            "other": StrictRedis(connection_pool=client.connection_pool),
+        }
+        index = RedisScriptMinHashIndexBackend(
+            mock.Mock(spec=RedisCluster), "sim", signature_builder, 16, 60 * 60, 12, 10
+        )
+
+        with mock.patch.object(
+            index,
+            "_RedisScriptMinHashIndexBackend__get_node_client",
+            side_effect=lambda scope: node_clients[scope],
+        ), mock.patch.object(
+            StrictRedis, "pipeline", autospec=True, side_effect=StrictRedis.pipeline
+        ) as pipeline:
+            index.record_many(
+                [
+                    ("example", "1", [("index", ["foo", "bar"])]),
+                    ("other", "1", [("index", ["baz"])]),
+                    ("example", "2", [("index", ["foo", "bar"])]),
+                ]
+            )
+            # One pipeline per node
+            assert pipeline.call_count == 2
+
+            assert index.classify_many(
+                [
+                    ("other", [("index", 0, ["baz"])]),
+                    ("example", [("index", 0, ["foo", "bar"])]),
+                ]
+            ) == [
+                self.index.classify("other", [("index", 0, ["baz"])]),
+                self.index.classify("example", [("index", 0, ["foo", "bar"])]),
+            ]
@@ -1,8 +1,23 @@
+from __future__ import annotations
+
 from collections import Counter
+from random import Random
+from typing import Sequence
 
+import mmh3
 import pytest
 
 from sentry.similarity.signatures import MinHashSignatureBuilder
+from sentry.utils.iterators import shingle
+
+
+def benchmark_available() -> bool:
+    try:
+        __import__("pytest_benchmark")
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
 
 
 def test_signatures() -> None:
@@ -24,3 +39,48 @@ def test_signatures() -> None:
     estimation = results[True] / float(sum(results.values()))
 
     assert similarity == pytest.approx(estimation, 0.1)
+
+
+def get_reference_signature(columns: int, rows: int, features: Sequence[bytes]) -> list[int]:
+    return [
+        min(mmh3.hash(feature, column) % rows for feature in features) for column in range(columns)
+    ]
+
+
+def get_frame_shingles(count: int, seed: int = 0) -> list[list[bytes]]:
+    random = Random(seed)
+    frames = [
+        f"sentry.module{random.randrange(100)}\x01handle{random.randrange(500)}".encode()
+        for _ in range(1000)
+    ]
+
+    feature_sets = []
+    for _ in range(count):
+        start = random.randrange(len(frames) - 50)
+        stacktrace = frames[start : start + random.randint(2, 50)]
+        feature_sets.append([b"\x00".join(pair) for pair in shingle(2, stacktrace)])
+    return feature_sets
+
+
+@pytest.mark.parametrize("cache_size", [None, 100])
+def test_build_many(cache_size: int | None) -> None:
+    get_signature = MinHashSignatureBuilder(16, 0xFFFF, cache_size=cache_size)
+    feature_sets = get_frame_shingles(50)
+
+    expected = [get_reference_signature(16, 0xFFFF, features) for features in feature_sets]
+    assert get_signature.build_many(feature_sets) == expected
+    assert [get_signature(features) for features in feature_sets] == expected
+    # Cached hashes produce the same signatures
+    assert get_signature.build_many(feature_sets) == expected
+
+    with pytest.raises(ValueError):
+        get_signature.build_many([[b"foo"], []])
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("cache_size", [None, 10000])
+def test_benchmark_signatures(benchmark, cache_size: int | None) -> None:
+    get_signature = MinHashSignatureBuilder(16, 0xFFFF, cache_size=cache_size)
+    feature_sets = get_frame_shingles(200)
+
+    benchmark(get_signature.build_many, feature_sets)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import abc
+import threading
 import time
 import uuid
 from datetime import datetime, timedelta, timezone
@@ -52,6 +53,7 @@ from sentry.tasks.post_process import (
     ISSUE_OWNERS_PER_PROJECT_PER_MIN_RATELIMIT,
     post_process_group,
     process_event,
+    run_pipeline_concurrently,
 )
 from sentry.testutils.cases import BaseTestCase, PerformanceIssueTestCase, SnubaTestCase, TestCase
 from sentry.testutils.helpers import with_feature
@@ -2144,3 +2146,60 @@ class PostProcessGroupGenericTest(
     @pytest.mark.skip(reason="those tests do not work with the given call_post_process_group impl")
     def test_processing_cache_cleared_with_commits(self):
         pass
+
+
+def test_run_pipeline_concurrently_defers_concurrent_steps():
+    started = threading.Event()
+    calls = []
+
+    def slow_step(job):
+        started.set()
+        time.sleep(0.1)
+        calls.append("slow_step")
+
+    def concurrent_step(job):
+        # Runs while slow_step is still busy.
+        assert started.wait(1)
+        calls.append("concurrent_step")
+
+    def mutating_step(job):
+        calls.append("mutating_step")
+
+    run_pipeline_concurrently(
+        {"event": Mock()},
+        [slow_step, concurrent_step, mutating_step],
+        "error",
+        concurrent_steps={slow_step, concurrent_step},
+    )
+
+    # Steps that are not known to be safe to run concurrently run first.
+    assert calls == ["mutating_step", "concurrent_step", "slow_step"]
+
+
+@patch("sentry.tasks.post_process.metrics")
+def test_run_pipeline_concurrently_timeout(mock_metrics):
+    release = threading.Event()
+    calls = []
+
+    def stuck_step(job):
+        release.wait(1)
+
+    def other_step(job):
+        calls.append("other_step")
+
+    try:
+        run_pipeline_concurrently(
+            {"event": Mock()},
+            [stuck_step, other_step],
+            "error",
+            concurrent_steps={stuck_step, other_step},
+            timeouts={stuck_step: 0.05},
+        )
+    finally:
+        release.set()
+
+    assert calls == ["other_step"]
+    mock_metrics.incr.assert_any_call(
+        "sentry.tasks.post_process.post_process_group.timeout",
+        tags={"issue_category": "error", "pipeline": "stuck_step"},
+    )
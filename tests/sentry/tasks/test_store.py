@@ -5,12 +5,13 @@ import pytest
 from django.test.utils import override_settings
 
 from sentry import quotas
-from sentry.event_manager import EventManager, HashDiscarded
+from sentry.event_manager import EventManager, HashDiscarded, TransactionBatchSaveError
 from sentry.plugins.base.v2 import Plugin2
 from sentry.tasks.store import (
     preprocess_event,
     process_event,
     save_event,
+    save_event_transaction_batch,
     time_synthetic_monitoring_event,
 )
 from sentry.testutils.pytest.fixtures import django_db_all
@@ -213,6 +214,101 @@ def test_process_event_unprocessed(
     )
 
 
+@django_db_all
+def test_save_event_transaction_batch(default_project, mock_event_processing_store):
+    transaction = {
+        "project": default_project.id,
+        "type": "transaction",
+        "platform": "python",
+        "event_id": EVENT_ID,
+    }
+    error = {"project": default_project.id, "platform": "python", "event_id": EVENT_ID}
+    mock_event_processing_store.get.side_effect = [transaction, error, None]
+
+    with mock.patch("sentry.event_manager.save_transactions_batch") as mock_save_batch, mock.patch(
+        "sentry.tasks.store._do_save_event"
+    ) as mock_do_save_event:
+        save_event_transaction_batch(
+            cache_keys=["e:1", "e:2", "e:3"],
+            start_times=[None, None, None],
+            event_ids=[EVENT_ID, EVENT_ID, EVENT_ID],
+            project_id=default_project.id,
+        )
+
+    # Only the plain transaction is saved as part of the batch, the others
+    # take the regular path.
+    ((project_id, managers, start_times), _) = mock_save_batch.call_args
+    assert project_id == default_project.id
+    assert [manager.get_data()["type"] for manager in managers] == ["transaction"]
+    assert start_times == [None]
+    assert [call[0][0] for call in mock_do_save_event.call_args_list] == ["e:2", "e:3"]
+    assert mock_event_processing_store.store.call_count == 1
+
+
+@django_db_all
+def test_save_event_transaction_batch_partial_failure(
+    default_project, mock_event_processing_store
+):
+    transaction = {
+        "project": default_project.id,
+        "type": "transaction",
+        "platform": "python",
+        "event_id": EVENT_ID,
+    }
+    mock_event_processing_store.get.side_effect = [dict(transaction), dict(transaction)]
+
+    with mock.patch(
+        "sentry.event_manager.save_transactions_batch",
+        side_effect=TransactionBatchSaveError([0]),
+    ) as mock_save_batch, mock.patch("sentry.tasks.store._do_save_event") as mock_do_save_event:
+        save_event_transaction_batch(
+            cache_keys=["e:1", "e:2"],
+            start_times=[None, None],
+            event_ids=[EVENT_ID, EVENT_ID],
+            project_id=default_project.id,
+        )
+
+    assert mock_save_batch.call_args[1] == {"assume_normalized": True}
+    # Only the event which was not persisted is saved again.
+    assert [call[0][0] for call in mock_do_save_event.call_args_list] == ["e:2"]
+    assert mock_event_processing_store.store.call_count == 1
+
+
+@django_db_all
+def test_save_event_transaction_batch_fallback_failure(
+    default_project, mock_event_processing_store
+):
+    transaction = {
+        "project": default_project.id,
+        "type": "transaction",
+        "platform": "python",
+        "event_id": EVENT_ID,
+    }
+    mock_event_processing_store.get.side_effect = [
+        dict(transaction),
+        dict(transaction),
+        dict(transaction),
+    ]
+
+    with mock.patch(
+        "sentry.event_manager.save_transactions_batch",
+        side_effect=TransactionBatchSaveError([1]),
+    ), mock.patch(
+        "sentry.tasks.store._do_save_event", side_effect=[Exception("boom"), None]
+    ) as mock_do_save_event:
+        save_event_transaction_batch(
+            cache_keys=["e:1", "e:2", "e:3"],
+            start_times=[None, None, None],
+            event_ids=[EVENT_ID, EVENT_ID, EVENT_ID],
+            project_id=default_project.id,
+        )
+
+    # A failing retry does not prevent the others, nor the cleanup of the
+    # persisted event.
+    assert [call[0][0] for call in mock_do_save_event.call_args_list] == ["e:1", "e:3"]
+    assert mock_event_processing_store.store.call_count == 1
+
+
 @django_db_all
 def test_hash_discarded_raised(default_project, mock_refund, register_plugin):
     register_plugin(globals(), BasicPreprocessorPlugin)
@@ -6,6 +6,7 @@ from django.test import override_settings
 
 from sentry.testutils.cases import TestCase
 from sentry.tsdb.base import ONE_DAY, ONE_HOUR, ONE_MINUTE, TSDBModel
+from sentry.tsdb.batch import TSDBWriteBatch
 from sentry.tsdb.redis import CountMinScript, RedisTSDB, SuppressionWrapper
 from sentry.utils.dates import to_datetime, to_timestamp
 
@@ -325,6 +326,58 @@ class RedisTSDBTest(TestCase):
         )
         assert results == {1: 0, 2: 0}
 
+    def test_write_batch(self):
+        now = datetime.utcnow().replace(tzinfo=timezone.utc)
+        other_db = RedisTSDB(
+            prefix="other:",
+            rollups=self.db.rollups.items(),
+            vnodes=64,
+            enable_frequency_sketches=True,
+        )
+        other_db.cluster = self.db.cluster
+        frequency_model = TSDBModel.frequent_environments_by_group
+
+        batch = TSDBWriteBatch(self.db)
+        for i, environment_id in enumerate([None, 1, 1, 2]):
+            timestamp = now - timedelta(seconds=i * 20)
+            items = [(TSDBModel.project, 1), (TSDBModel.group, 2), (TSDBModel.group, 3)]
+            records = [(TSDBModel.users_affected_by_group, 2, (f"user:{i}", "user:a"))]
+            frequencies = [(frequency_model, {2: {environment_id or 0: 1, 5: i + 1}})]
+            batch.incr_multi(items, timestamp=timestamp, environment_id=environment_id)
+            other_db.incr_multi(items, timestamp=timestamp, environment_id=environment_id)
+            batch.record_multi(records, timestamp=timestamp, environment_id=environment_id)
+            other_db.record_multi(records, timestamp=timestamp, environment_id=environment_id)
+            batch.record_frequency_multi(frequencies, timestamp=timestamp)
+            other_db.record_frequency_multi(frequencies, timestamp=timestamp)
+
+        # Identical writes are merged.
+        assert len(batch.incrs) == 3 * 4
+        batch.incr_multi([(TSDBModel.project, 1)], timestamp=now)
+        other_db.incr_multi([(TSDBModel.project, 1)], timestamp=now)
+        assert len(batch.incrs) == 3 * 4
+
+        batch.flush()
+        assert not batch
+
+        start = now - timedelta(hours=1)
+        for environment_id in [None, 1, 2]:
+            for model, keys in [(TSDBModel.project, [1]), (TSDBModel.group, [2, 3])]:
+                for rollup in [10, 3600]:
+                    assert self.db.get_sums(
+                        model, keys, start, now, rollup, environment_id=environment_id
+                    ) == other_db.get_sums(
+                        model, keys, start, now, rollup, environment_id=environment_id
+                    )
+            assert self.db.get_distinct_counts_totals(
+                TSDBModel.users_affected_by_group, [2], start, now, environment_id=environment_id
+            ) == other_db.get_distinct_counts_totals(
+                TSDBModel.users_affected_by_group, [2], start, now, environment_id=environment_id
+            )
+        assert self.db.get_most_frequent(frequency_model, [2], start, now) == (
+            other_db.get_most_frequent(frequency_model, [2], start, now)
+        )
+        assert self.db.get_sums(TSDBModel.project, [1], start, now)[1] == 5
+
     def test_frequency_tables(self):
         now = datetime.utcnow().replace(tzinfo=timezone.utc)
         model = TSDBModel.frequent_issues_by_project
@@ -0,0 +1,197 @@
+from datetime import datetime, timedelta, timezone
+
+from sentry.testutils.cases import TestCase
+from sentry.tsdb.base import ONE_DAY, ONE_HOUR, ONE_MINUTE, TSDBModel
+from sentry.tsdb.sketch import CountMinSketch, HyperLogLog, SketchParameters, SketchTSDB
+from sentry.utils.dates import to_timestamp
+
+
+def test_hyperloglog():
+    precision = HyperLogLog.precision_for_error(0.01)
+    assert precision == 14
+
+    hll = HyperLogLog(precision)
+    hll.update(["foo", "bar", "foo"])
+    assert hll.cardinality() == 2
+
+    hll.update(range(50000))
+    assert abs(hll.cardinality() - 50002) < 50002 * 0.03
+
+    other = HyperLogLog(precision)
+    other.update(range(25000, 75000))
+    hll.merge(other)
+    assert abs(hll.cardinality() - 75002) < 75002 * 0.03
+
+
+def test_count_min_sketch():
+    sketch = CountMinSketch(SketchParameters(depth=3, width=64, capacity=3))
+
+    sketch.increment({"foo": 1.0, "bar": 2.0})
+    assert sketch.estimates is None
+    assert sketch.ranked() == [("bar", 2.0), ("foo", 1.0)]
+
+    sketch.increment({"baz": 3.0, "qux": 0.5})
+    assert sketch.estimates is not None
+    assert sketch.ranked() == [("baz", 3.0), ("bar", 2.0), ("foo", 1.0)]
+    assert sketch.estimate("qux") >= 0.5
+
+    sketch.increment({"qux": 4.0})
+    assert sketch.ranked(2) == [("qux", 4.5), ("baz", 3.0)]
+
+
+class SketchTSDBTest(TestCase):
+    def setUp(self):
+        self.db = SketchTSDB(
+            rollups=(
+                # time in seconds, samples to keep
+                (10, 30),  # 5 minutes at 10 seconds
+                (ONE_MINUTE, 120),  # 2 hours at 1 minute
+                (ONE_HOUR, 24),  # 1 days at 1 hour
+                (ONE_DAY, 30),  # 30 days at 1 day
+            ),
+            frequency_capacity=10,
+        )
+
+    def test_simple(self):
+        now = datetime.utcnow().replace(tzinfo=timezone.utc) - timedelta(hours=4)
+        dts = [now + timedelta(hours=i) for i in range(4)]
+
+        def timestamp(d):
+            t = int(to_timestamp(d))
+            return t - (t % 3600)
+
+        self.db.incr(TSDBModel.project, 1, dts[0])
+        self.db.incr(TSDBModel.project, 1, dts[1], count=2)
+        self.db.incr(TSDBModel.project, 1, dts[1], environment_id=1)
+        self.db.incr(TSDBModel.project, 1, dts[2])
+        self.db.incr_multi(
+            [(TSDBModel.project, 1), (TSDBModel.project, 2)], dts[3], count=3, environment_id=1
+        )
+
+        results = self.db.get_range(TSDBModel.project, [1], dts[0], dts[-1])
+        assert results == {
+            1: [
+                (timestamp(dts[0]), 1),
+                (timestamp(dts[1]), 3),
+                (timestamp(dts[2]), 1),
+                (timestamp(dts[3]), 3),
+            ]
+        }
+
+        results = self.db.get_sums(TSDBModel.project, [1, 2], dts[0], dts[-1], environment_id=1)
+        assert results == {1: 4, 2: 3}
+
+        self.db.merge(TSDBModel.project, 1, [2], now, environment_ids=[1])
+
+        results = self.db.get_sums(TSDBModel.project, [1, 2], dts[0], dts[-1])
+        assert results == {1: 11, 2: 0}
+
+        self.db.delete([TSDBModel.project], [1, 2], dts[0], dts[-1], environment_ids=[1])
+
+        results = self.db.get_sums(TSDBModel.project, [1, 2], dts[0], dts[-1])
+        assert results == {1: 0, 2: 0}
+
+    def test_eviction(self):
+        start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+        for i in range(ONE_DAY // ONE_MINUTE):
+            self.db.incr(TSDBModel.project, 1, start + timedelta(minutes=i))
+
+        assert len(self.db.counters[10]) == 5
+        assert len(self.db.counters[ONE_MINUTE]) == 120
+        assert len(self.db.counters[ONE_HOUR]) == 24
+
+        # Writes older than the retention window of a rollup are dropped.
+        self.db.incr(TSDBModel.project, 1, start)
+        assert self.db.normalize_to_rollup(start, ONE_MINUTE) not in self.db.counters[ONE_MINUTE]
+
+        end = start + timedelta(days=1)
+        results = self.db.get_sums(TSDBModel.project, [1], end - timedelta(hours=2), end)
+        assert results == {1: 120}
+
+    def test_count_distinct(self):
+        now = datetime.utcnow().replace(tzinfo=timezone.utc) - timedelta(hours=4)
+        dts = [now + timedelta(hours=i) for i in range(4)]
+
+        model = TSDBModel.users_affected_by_group
+
+        def timestamp(d):
+            t = int(to_timestamp(d))
+            return t - (t % 3600)
+
+        self.db.record(model, 1, ("foo", "bar"), dts[0])
+        self.db.record(model, 1, ("baz",), dts[1], environment_id=1)
+        self.db.record_multi(((model, 1, ("foo", "bar")), (model, 2, ("bar",))), dts[2])
+        self.db.record(model, 2, ("foo",), dts[3])
+
+        assert self.db.get_distinct_counts_series(model, [1], dts[0], dts[-1], rollup=3600) == {
+            1: [
+                (timestamp(dts[0]), 2),
+                (timestamp(dts[1]), 1),
+                (timestamp(dts[2]), 2),
+                (timestamp(dts[3]), 0),
+            ]
+        }
+
+        results = self.db.get_distinct_counts_totals(model, [1, 2], dts[0], dts[-1], rollup=3600)
+        assert results == {1: 3, 2: 2}
+
+        results = self.db.get_distinct_counts_totals(
+            model, [1, 2], dts[0], dts[-1], rollup=3600, environment_id=1
+        )
+        assert results == {1: 1, 2: 0}
+
+        assert self.db.get_distinct_counts_union(model, [1, 2], dts[0], dts[-1], rollup=3600) == 3
+
+        self.db.merge_distinct_counts(model, 1, [2], dts[0])
+
+        results = self.db.get_distinct_counts_totals(model, [1, 2], dts[0], dts[-1], rollup=3600)
+        assert results == {1: 3, 2: 0}
+
+        self.db.delete_distinct_counts([model], [1, 2], dts[0], dts[-1], environment_ids=[1])
+
+        results = self.db.get_distinct_counts_totals(model, [1, 2], dts[0], dts[-1])
+        assert results == {1: 0, 2: 0}
+
+    def test_frequency_tables(self):
+        now = datetime.utcnow().replace(tzinfo=timezone.utc)
+        model = TSDBModel.frequent_issues_by_project
+
+        rollup = 3600
+
+        self.db.record_frequency_multi(
+            ((model, {"organization:1": {"project:1": 1, "project:2": 2, "project:3": 4}}),),
+            now - timedelta(hours=1),
+        )
+        self.db.record_frequency_multi(
+            ((model, {"organization:1": {"project:1": 1, "project:2": 1}}),), now
+        )
+
+        assert self.db.get_most_frequent(
+            model, ("organization:1",), now - timedelta(hours=1), now, rollup=rollup
+        ) == {"organization:1": [("project:3", 4.0), ("project:2", 3.0), ("project:1", 2.0)]}
+
+        assert self.db.get_most_frequent(
+            model, ("organization:1",), now - timedelta(hours=1), now, rollup=rollup, limit=1
+        ) == {"organization:1": [("project:3", 4.0)]}
+
+        assert self.db.get_frequency_totals(
+            model,
+            {"organization:1": ("project:1", "project:4")},
+            now - timedelta(hours=1),
+            now,
+            rollup=rollup,
+        ) == {"organization:1": {"project:1": 2.0, "project:4": 0.0}}
+
+        self.db.record_frequency_multi(((model, {"organization:2": {"project:4": 5}}),), now)
+        self.db.merge_frequencies(model, "organization:1", ["organization:2"], now)
+
+        assert self.db.get_most_frequent(
+            model, ("organization:1",), now, now, rollup=rollup, limit=1
+        ) == {"organization:1": [("project:4", 5.0)]}
+
+        self.db.delete_frequencies([model], ["organization:1"], now - timedelta(hours=1), now)
+
+        assert self.db.get_most_frequent(
+            model, ("organization:1",), now - timedelta(hours=1), now, rollup=rollup
+        ) == {"organization:1": []}
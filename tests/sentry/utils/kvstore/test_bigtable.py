@@ -3,10 +3,12 @@ from __future__ import annotations
 import functools
 import os
 from typing import Optional
+from unittest import mock
 
 import pytest
+from google.api_core import exceptions
 
-from sentry.utils.kvstore.bigtable import BigtableKVStorage
+from sentry.utils.kvstore.bigtable import BigtableError, BigtableKVStorage
 
 
 def create_store(request, compression: Optional[str] = None) -> BigtableKVStorage:
@@ -81,3 +83,40 @@ def test_compression_compatibility(request, store_factory) -> None:
 
         for reader in stores.values():
             assert reader.get(key) == value
+
+
+def _mocked_store(table: mock.Mock) -> BigtableKVStorage:
+    store = BigtableKVStorage(project="test", instance="test", table_name="test")
+    # Stands in for the cached client, which is dropped before retrying.
+    store._BigtableKVStorage__table = table  # type: ignore[attr-defined]
+    return store
+
+
+def test_set_many_retries_service_unavailable() -> None:
+    table = mock.Mock()
+    table.mutate_rows.side_effect = [
+        exceptions.ServiceUnavailable("unavailable"),
+        [mock.Mock(code=0), mock.Mock(code=0)],
+    ]
+    store = _mocked_store(table)
+
+    with mock.patch.object(store, "_get_table", return_value=table):
+        store.set_many([("a", b"a"), ("b", b"b")])
+
+    assert table.mutate_rows.call_count == 2
+
+
+def test_set_many_partial_failure() -> None:
+    table = mock.Mock()
+    table.mutate_rows.return_value = [
+        mock.Mock(code=0),
+        mock.Mock(code=4, message="deadline exceeded"),
+    ]
+    store = _mocked_store(table)
+
+    with mock.patch.object(store, "_get_table", return_value=table), pytest.raises(
+        BigtableError
+    ) as excinfo:
+        store.set_many([("a", b"a"), ("b", b"b")])
+
+    assert excinfo.value.args == (4, "deadline exceeded")
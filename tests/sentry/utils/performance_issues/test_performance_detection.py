@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import random
 import unittest
 from unittest.mock import Mock, call, patch
 
@@ -14,7 +15,7 @@ from sentry.issues.grouptype import (
 )
 from sentry.testutils.cases import TestCase
 from sentry.testutils.helpers import override_options
-from sentry.testutils.performance_issues.event_generators import get_event
+from sentry.testutils.performance_issues.event_generators import EVENTS, get_event
 from sentry.testutils.silo import no_silo_test, region_silo_test
 from sentry.utils.performance_issues.base import (
     DETECTOR_TYPE_TO_GROUP_TYPE,
@@ -25,10 +26,13 @@ from sentry.utils.performance_issues.detectors.n_plus_one_db_span_detector impor
     NPlusOneDBSpanDetector,
 )
 from sentry.utils.performance_issues.performance_detection import (
+    DETECTOR_CLASSES,
     EventPerformanceProblem,
     _detect_performance_problems,
     detect_performance_problems,
     get_detection_settings,
+    run_detector_on_data,
+    run_detectors_on_data,
 )
 from sentry.utils.performance_issues.performance_problem import PerformanceProblem
 
@@ -492,6 +496,55 @@ class PerformanceDetectionTest(TestCase):
         pre_checked_keys = ["sdk_name", "is_early_adopter", "browser_name", "uncompressed_assets"]
         assert not any([v for k, v in tags.items() if k not in pre_checked_keys])
 
+    @patch("sentry.utils.metrics.timing")
+    def test_single_pass_detects_same_problems(self, timing_mock):
+        settings = get_detection_settings(self.project.id)
+
+        def get_event_with_spans(event_name, shuffled):
+            event = get_event(event_name)
+            if shuffled:
+                # Detectors can depend on spans they do not report on, e.g.
+                # to stop detection once spans start after some point.
+                random.Random(event_name).shuffle(event.get("spans", []))
+            return event
+
+        for event_name in EVENTS:
+            for shuffled in (False, True):
+                event = get_event_with_spans(event_name, shuffled)
+                detectors = [cls(settings, event) for cls in DETECTOR_CLASSES]
+                for detector in detectors:
+                    run_detector_on_data(detector, event)
+
+                event = get_event_with_spans(event_name, shuffled)
+                single_pass_detectors = [cls(settings, event) for cls in DETECTOR_CLASSES]
+                run_detectors_on_data(single_pass_detectors, event, record_cpu_time=True)
+
+                for detector, single_pass_detector in zip(detectors, single_pass_detectors):
+                    assert detector.stored_problems == single_pass_detector.stored_problems, (
+                        event_name,
+                        shuffled,
+                        detector.type,
+                    )
+
+        assert all(
+            call.args[0] == "performance.performance_issue.detector_cpu_time"
+            for call in timing_mock.mock_calls
+        )
+
+    @patch("sentry.utils.performance_issues.performance_detection.run_detectors_on_data")
+    def test_skips_detectors_disabled_for_project(self, run_detectors_mock):
+        self.project_option_mock.return_value = {
+            "slow_db_queries_detection_enabled": False,
+            "uncompressed_assets_detection_enabled": False,
+        }
+        event = get_event("n-plus-one-in-django-index-view")
+        _detect_performance_problems(event, Mock(), self.project)
+
+        detector_types = {detector.type for detector in run_detectors_mock.call_args.args[0]}
+        assert DetectorType.N_PLUS_ONE_DB_QUERIES in detector_types
+        assert DetectorType.SLOW_DB_QUERY not in detector_types
+        assert DetectorType.UNCOMPRESSED_ASSETS not in detector_types
+
 
 @no_silo_test(stable=True)
 class DetectorTypeToGroupTypeTest(unittest.TestCase):
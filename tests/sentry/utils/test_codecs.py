@@ -1,6 +1,7 @@
 import pytest
+import zstandard
 
-from sentry.utils.codecs import BytesCodec, JSONCodec, ZlibCodec, ZstdCodec
+from sentry.utils.codecs import BytesCodec, JSONCodec, ZlibCodec, ZstdCodec, ZstdDictCodec
 
 
 @pytest.mark.parametrize(
@@ -22,3 +23,29 @@ def test_codec_chaining() -> None:
 
     assert codec.encode([1, 2, 3]) == b"[1,2,3]"
     assert codec.decode(b"[1,2,3]") == [1, 2, 3]
+
+
+def test_zstd_dict_codec() -> None:
+    samples = [
+        f'{{"platform":"python","event_id":"{i:032x}","sdk":"sentry.python"}}'.encode()
+        for i in range(200)
+    ]
+    old = zstandard.train_dictionary(1024, samples, dict_id=40000)
+    new = zstandard.train_dictionary(1024, samples, dict_id=40001)
+
+    old_codec = ZstdDictCodec(old)
+    codec = ZstdDictCodec(new, dictionaries=[old])
+
+    value = samples[0]
+    encoded = old_codec.encode(value)
+    assert zstandard.get_frame_parameters(encoded).dict_id == 40000
+    # payloads written with a previous dictionary stay readable
+    assert codec.decode(encoded) == value
+    assert codec.decode(codec.encode(value)) == value
+    assert codec.decode(ZstdCodec().encode(value)) == value
+    # compressors and decompressors are prepared once per thread
+    assert codec._get_compressor() is codec._get_compressor()
+    assert codec._get_decompressor(40000) is codec._get_decompressor(40000)
+
+    with pytest.raises(ValueError):
+        ZstdDictCodec().decode(codec.encode(value))
@@ -0,0 +1,58 @@
+from sentry.utils.lru import LRUCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_max_size():
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    # "b" was the least recently used item
+    assert cache.get("b") is None
+    assert cache.get_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+    assert cache.evictions == 1
+
+
+def test_max_bytes():
+    cache = LRUCache(max_bytes=10)
+    cache.set("a", b"12345")
+    cache.set("b", b"12345")
+    assert cache.total_bytes == 10
+    cache.set("c", b"1")
+    assert "a" not in cache
+    assert cache.total_bytes == 6
+    # values larger than the whole cache are not stored
+    cache.set("d", b"12345678901")
+    assert "d" not in cache
+    assert cache.total_bytes == 6
+
+
+def test_ttl():
+    timer = FakeTimer()
+    cache = LRUCache(max_size=10, ttl=5, timer=timer)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=20)
+    timer.now = 10
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert len(cache) == 1
+
+
+def test_delete():
+    cache = LRUCache(max_bytes=100)
+    cache.set_many({"a": b"1", "b": b"22", "c": b"333"})
+    cache.delete("a")
+    cache.delete_many(["b", "missing"])
+    assert cache.get_many(["a", "b", "c"]) == {"c": b"333"}
+    assert cache.total_bytes == 3
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.total_bytes == 0
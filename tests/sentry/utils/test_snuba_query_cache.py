@@ -0,0 +1,128 @@
+from concurrent.futures import Future
+
+import pytest
+from django.core.cache import cache
+
+from sentry.testutils.helpers.options import override_options
+from sentry.utils.lru import LRUCache
+from sentry.utils.snuba_query_cache import (
+    CachedResult,
+    SnubaQueryCache,
+    get_ttls,
+    is_cached_referrer,
+)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.parametrize("local", [False, True])
+def test_set_get_many(local):
+    clock = Clock()
+    local_cache = LRUCache(max_size=10) if local else None
+    query_cache = SnubaQueryCache(local_cache, timer=clock)
+
+    query_cache.set("a", {"data": [1]}, ttl=10, stale_ttl=20)
+    items = query_cache.get_many(["a", "b"])
+    assert list(items) == ["a"]
+    assert items["a"].result == {"data": [1]}
+    assert items["a"].fresh_until == 1010
+    assert items["a"].stale_until == 1030
+
+    # Every reader gets its own copy of the result.
+    items["a"].result["data"].append(2)
+    assert query_cache.get_many(["a"])["a"].result == {"data": [1]}
+
+    # Stale results are still returned, it is up to the caller to refresh them.
+    clock.now = 1015
+    assert query_cache.get_many(["a"])["a"].fresh_until <= clock.now
+
+
+def test_get_many_prefers_fresher_shared_result():
+    clock = Clock()
+    query_cache = SnubaQueryCache(LRUCache(max_size=10), timer=clock)
+    query_cache.set("a", {"data": [1]}, ttl=10, stale_ttl=20)
+
+    # Another process refreshed the result.
+    other = SnubaQueryCache(timer=clock)
+    clock.now = 1015
+    other.set("a", {"data": [2]}, ttl=10, stale_ttl=20)
+
+    item = query_cache.get_many(["a"])["a"]
+    assert item.result == {"data": [2]}
+    assert item.fresh_until == 1025
+
+
+def test_begin_finish():
+    query_cache = SnubaQueryCache()
+
+    is_leader, future = query_cache.begin("a")
+    assert is_leader
+    is_leader, other_future = query_cache.begin("a")
+    assert not is_leader
+    assert other_future is future
+
+    item = CachedResult(0, 0, "{}")
+    query_cache.finish("a", future, item)
+    assert other_future.result() is item
+
+    # The next query for the key starts over.
+    is_leader, future = query_cache.begin("a")
+    assert is_leader
+    query_cache.finish("a", future, exception=ValueError("boom"))
+    with pytest.raises(ValueError):
+        future.result()
+
+
+def test_refresh_once():
+    clock = Clock()
+    query_cache = SnubaQueryCache(timer=clock)
+    calls = []
+    blocker: Future = Future()
+
+    def query_fn(queries):
+        calls.append(queries)
+        blocker.result(timeout=5)
+        return [{"data": [query]} for query in queries]
+
+    future = query_cache.refresh([("q1", "a")], query_fn, ttl=10, stale_ttl=20)
+    # Already being refreshed.
+    assert query_cache.refresh([("q1", "a")], query_fn, ttl=10, stale_ttl=20) is None
+    blocker.set_result(None)
+    future.result(timeout=5)
+
+    assert calls == [["q1"]]
+    assert query_cache.get_many(["a"])["a"].result == {"data": ["q1"]}
+    assert cache.get("a:refresh") is None
+
+
+def test_refresh_failure_releases_lock():
+    query_cache = SnubaQueryCache()
+
+    def query_fn(queries):
+        raise ValueError("boom")
+
+    query_cache.refresh([("q1", "a")], query_fn, ttl=10, stale_ttl=20).result(timeout=5)
+    assert cache.get("a:refresh") is None
+    assert query_cache.get_many(["a"]) == {}
+
+
+@override_options({"snuba.query-cache.referrer-ttls": {"api.foo": 300}})
+def test_referrer_ttls():
+    assert is_cached_referrer("api.foo")
+    assert not is_cached_referrer("api.bar")
+    assert not is_cached_referrer(None)
+    assert get_ttls("api.foo") == (300, 0)
+    assert get_ttls("api.bar")[0] == 60
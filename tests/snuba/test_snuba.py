@@ -11,6 +11,7 @@ from snuba_sdk.column import InvalidColumnError
 from sentry.testutils.cases import SnubaTestCase, TestCase
 from sentry.testutils.helpers.datetime import before_now, iso_format
 from sentry.utils import snuba
+from sentry.utils.snuba_query_cache import get_query_cache
 
 
 class SnubaTest(TestCase, SnubaTestCase):
@@ -201,3 +202,21 @@ class BulkRawQueryTest(TestCase, SnubaTestCase):
             {(event_2.group.id, event_2.event_id)},
         ]
         assert _bulk_snuba_query.call_count == 0
+
+    @mock.patch(
+        "sentry.utils.snuba_query_cache.SnubaQueryCache.set", side_effect=Exception("boom")
+    )
+    def test_cache_failure_releases_inflight(self, _set):
+        params = snuba.SnubaQueryParams(
+            start=timezone.now() - timedelta(days=1),
+            end=timezone.now(),
+            selected_columns=["event_id", "group_id", "timestamp"],
+            filter_keys={"project_id": [self.project.id]},
+            tenant_ids={"referrer": "testing.test", "organization_id": 1},
+        )
+
+        with pytest.raises(Exception, match="boom"):
+            snuba.bulk_raw_query([params], use_cache=True)
+
+        # Identical queries must not wait for the failed one.
+        assert get_query_cache()._inflight == {}